@@ -1,20 +1,17 @@
-
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
 
 from application_pages.data_lookups import (
     ROLE_MULTIPLIERS, EDUCATION_LEVEL_FACTORS, EDUCATION_FIELD_FACTORS,
     SCHOOL_TIER_FACTORS, COMPANY_RISK_FACTORS, INDUSTRY_HAZARDS
 )
-from application_pages.calculations import (
-    calculate_human_capital_factor, calculate_company_risk_factor,
-    calculate_upskilling_factor, calculate_idiosyncratic_risk,
-    calculate_base_occupational_hazard, calculate_systematic_risk,
-    calculate_total_payout, calculate_annual_claim_probability,
-    calculate_expected_loss, calculate_final_monthly_premium
+from application_pages.app_stages import (
+    idiosyncratic_stage, systematic_stage, premium_stage,
+    explanation_stage, premium_gauge_figure, premium_attribution_figure,
+    premium_sensitivity_figure, premium_trajectory_figure
 )
+from application_pages.target_premium_page import render_target_premium_section
+from application_pages.what_if_page import render_what_if_section
+from application_pages import instrumentation
 
 st.set_page_config(page_title="AI-Q Premium Predictor", layout="wide")
 st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
@@ -77,21 +74,41 @@ months_elapsed_transition = st.sidebar.slider("Months Elapsed Since Transition (
 st.markdown("## Premium Calculation Breakdown")
 
 # --- Calculations ---
-# Idiosyncratic Risk (Vi(t))
-f_hc = calculate_human_capital_factor(job_role, education_level, education_field, school_tier, years_experience)
-f_cr = calculate_company_risk_factor(company_type)
-f_us = calculate_upskilling_factor(general_upskilling_progress, firm_specific_upskilling_progress)
-v_i = calculate_idiosyncratic_risk(f_hc, f_cr, f_us)
-
-# Systematic Risk (Hi)
-h_base_t = calculate_base_occupational_hazard(current_industry, target_industry, months_elapsed_transition)
-h_i = calculate_systematic_risk(h_base_t, economic_climate_modifier, ai_innovation_index)
-
-# Premium Determination
-l_payout = calculate_total_payout(annual_salary, coverage_percentage, coverage_duration_months)
-p_claim = calculate_annual_claim_probability(h_i, v_i, beta_systemic, beta_individual)
-e_loss = calculate_expected_loss(p_claim, l_payout)
-p_monthly = calculate_final_monthly_premium(e_loss, lambda_factor, p_min)
+# Each stage is cached on its own inputs (see application_pages/app_stages.py),
+# so a widget change only recomputes the stages downstream of it.
+with instrumentation.stage("app.calculations"):
+    # Idiosyncratic Risk (Vi(t))
+    f_hc, f_cr, f_us, v_i = idiosyncratic_stage(
+        job_role, education_level, education_field, school_tier, years_experience,
+        company_type, general_upskilling_progress, firm_specific_upskilling_progress
+    )
+
+    # Systematic Risk (Hi)
+    h_base_t, h_i = systematic_stage(
+        current_industry, target_industry, months_elapsed_transition,
+        economic_climate_modifier, ai_innovation_index
+    )
+
+    # Premium Determination
+    l_payout, p_claim, e_loss, p_monthly = premium_stage(
+        annual_salary, coverage_percentage, coverage_duration_months, h_i, v_i,
+        beta_systemic, beta_individual, lambda_factor, p_min
+    )
+
+profile = {
+    "job_role": job_role, "years_experience": years_experience,
+    "education_level": education_level, "education_field": education_field,
+    "school_tier": school_tier, "company_type": company_type,
+    "general_upskilling_progress": general_upskilling_progress,
+    "firm_specific_upskilling_progress": firm_specific_upskilling_progress,
+    "annual_salary": annual_salary, "coverage_percentage": coverage_percentage,
+    "coverage_duration_months": coverage_duration_months,
+    "beta_systemic": beta_systemic, "beta_individual": beta_individual,
+    "lambda_factor": lambda_factor, "p_min": p_min,
+    "economic_climate_modifier": economic_climate_modifier, "ai_innovation_index": ai_innovation_index,
+    "current_industry": current_industry, "target_industry": target_industry,
+    "months_elapsed_transition": months_elapsed_transition,
+}
 
 # --- Display Results ---
 
@@ -156,61 +173,43 @@ This is the final cost to you for the hypothetical AI-driven job displacement in
 """)
 st.markdown(r"$$ P_{monthly} = \max\left(\frac{E[\text{Loss}] \cdot \lambda}{12}, P_{min}\right) $$")
 
-col1, col2 = st.columns([1, 2])
-
-with col1:
-    # Gauge chart for monthly premium
-    fig = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = p_monthly,
-        title = {'text': "Calculated Monthly Premium"},
-        gauge = {'axis': {'range': [p_min, 100 + p_min], 'tickwidth': 1, 'tickcolor': "darkblue"},
-                 'bar': {'color': "darkblue"},
-                 'steps': [
-                     {'range': [p_min, p_min + 20], 'color': "lightgreen"},
-                     {'range': [p_min + 20, p_min + 50], 'color': "lightyellow"},
-                     {'range': [p_min + 50, p_min + 100], 'color': "lightcoral"}],
-                 'threshold' : {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': p_min + 75}}
-    ))
-    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    st.metric(label="Your Estimated Monthly Premium", value=f"${p_monthly:.2f}")
-    if p_monthly <= p_min:
-        st.info(f"Note: Your calculated premium hit the minimum threshold of ${p_min:.2f}.")
+with instrumentation.stage("app.render.final_premium"):
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        # Gauge chart for monthly premium
+        st.plotly_chart(premium_gauge_figure(p_monthly, p_min), use_container_width=True)
+
+    with col2:
+        st.metric(label="Your Estimated Monthly Premium", value=f"${p_monthly:.2f}")
+        if p_monthly <= p_min:
+            st.info(f"Note: Your calculated premium hit the minimum threshold of ${p_min:.2f}.")
     
-    st.subheader("Contribution Breakdown")
-    data = {
-        'Factor': ['Human Capital (F_HC)', 'Company Risk (F_CR)', 'Upskilling (F_US)'],
-        'Value': [f_hc, f_cr, f_us]
-    }
-    df_idiosyncratic = pd.DataFrame(data)
-    fig_idiosyncratic = px.bar(df_idiosyncratic, x='Factor', y='Value', 
-                               title='Idiosyncratic Risk Factor Contributions',
-                               color='Factor',
-                               color_discrete_map={
-                                   'Human Capital (F_HC)': 'lightblue',
-                                   'Company Risk (F_CR)': 'lightcoral',
-                                   'Upskilling (F_US)': 'lightgreen'
-                               })
-    st.plotly_chart(fig_idiosyncratic, use_container_width=True)
-
-    data_sys = {
-        'Factor': ['Base Occupational Hazard', 'Economic Climate', 'AI Innovation'],
-        'Value': [h_base_t, economic_climate_modifier * 100, ai_innovation_index * 100] # Scale for better visualization
-    }
-    df_systematic = pd.DataFrame(data_sys)
-    fig_systematic = px.bar(df_systematic, x='Factor', y='Value', 
-                            title='Systematic Risk Component Contributions (Scaled)',
-                            color='Factor',
-                            color_discrete_map={
-                                'Base Occupational Hazard': 'lightgray',
-                                'Economic Climate': 'lightgoldenrodyellow',
-                                'AI Innovation': 'lightpink'
-                            })
-    st.plotly_chart(fig_systematic, use_container_width=True)
+        st.subheader("Contribution Breakdown")
+        st.markdown("""
+        How each factor moves your premium away from a reference policy with the same coverage, where every looked-up factor is neutral, there is no experience or upskilling and the environment is neutral.
+        Below it, the exact change in your premium for one step of each slider.
+        """)
+        explanation = explanation_stage(profile)
+        if explanation["pinned_v_i"]:
+            st.info("Your Idiosyncratic Risk is pinned at its clamp, so small changes to human capital, company or upskilling inputs do not move your premium.")
+        if explanation["pinned_p_min"]:
+            st.info("Your premium is the minimum premium floor, so only P_min moves it until the risk premium rises above the floor.")
+        st.plotly_chart(premium_attribution_figure(profile), use_container_width=True)
+        st.plotly_chart(premium_sensitivity_figure(profile), use_container_width=True)
+
+
+st.markdown("## Premium Trajectory")
+st.markdown("""
+How your premium evolves month by month as your career transition progresses towards the target industry, all other inputs held at their sidebar values.
+The benefit of the transition accrues linearly until the Time-to-Value (TTV) period, after which the target industry's hazard applies in full.
+""")
+with instrumentation.stage("app.render.trajectory"):
+    st.plotly_chart(premium_trajectory_figure(profile), use_container_width=True)
+
+render_target_premium_section(profile, p_monthly)
 
+render_what_if_section(profile)
 
 st.markdown("## Education is Insurance")
 st.markdown("""
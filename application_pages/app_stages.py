@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from application_pages.calculations import (
+    calculate_human_capital_factor, calculate_company_risk_factor,
+    calculate_upskilling_factor, calculate_idiosyncratic_risk,
+    calculate_base_occupational_hazard, calculate_systematic_risk,
+    calculate_total_payout, calculate_annual_claim_probability,
+    calculate_expected_loss, calculate_final_monthly_premium
+)
+from application_pages import instrumentation
+from application_pages.data_lookups import TTV_PERIOD_DEFAULT
+from application_pages.trajectory import premium_trajectories
+from application_pages.sensitivity import premium_sensitivities, premium_attribution, ATTRIBUTION_COLUMNS
+from application_pages.solver import SOLVERS
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Cached computation stages and figure builders for app.py. Each stage is keyed
+# only on the inputs it actually reads, so a rerun triggered by one widget
+# reuses every stage and figure that does not depend on it (changing p_min, for
+# example, never recomputes the idiosyncratic stage). Caches are
+# shared across sessions and bounded by max_entries (least recently used
+# entries are evicted first). Stage bodies are timed by instrumentation only when
+# they run, so their counts are cache misses.
+
+STAGE_CACHE_ENTRIES = 1024
+FIGURE_CACHE_ENTRIES = 256
+
+# --- Calculation stages ---
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES, show_spinner=False)
+def idiosyncratic_stage(
+    job_role: str,
+    education_level: str,
+    education_field: str,
+    school_tier: str,
+    years_experience: float,
+    company_type: str,
+    general_upskilling_progress: float,
+    firm_specific_upskilling_progress: float
+) -> tuple:
+    """
+    Returns (F_HC, F_CR, F_US, V_i(t)).
+    """
+    with instrumentation.stage("app.stage.idiosyncratic"):
+        f_hc = calculate_human_capital_factor(job_role, education_level, education_field, school_tier, years_experience)
+        f_cr = calculate_company_risk_factor(company_type)
+        f_us = calculate_upskilling_factor(general_upskilling_progress, firm_specific_upskilling_progress)
+        v_i = calculate_idiosyncratic_risk(f_hc, f_cr, f_us)
+    return f_hc, f_cr, f_us, v_i
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES, show_spinner=False)
+def systematic_stage(
+    current_industry: str,
+    target_industry: str,
+    months_elapsed_transition: int,
+    economic_climate_modifier: float,
+    ai_innovation_index: float
+) -> tuple:
+    """
+    Returns (H_base(t), H_i).
+    """
+    with instrumentation.stage("app.stage.systematic"):
+        h_base_t = calculate_base_occupational_hazard(current_industry, target_industry, months_elapsed_transition)
+        h_i = calculate_systematic_risk(h_base_t, economic_climate_modifier, ai_innovation_index)
+    return h_base_t, h_i
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES, show_spinner=False)
+def premium_stage(
+    annual_salary: float,
+    coverage_percentage: float,
+    coverage_duration_months: int,
+    h_i: float,
+    v_i: float,
+    beta_systemic: float,
+    beta_individual: float,
+    lambda_factor: float,
+    p_min: float
+) -> tuple:
+    """
+    Returns (L_payout, P_claim, E[Loss], P_monthly).
+    """
+    with instrumentation.stage("app.stage.premium"):
+        l_payout = calculate_total_payout(annual_salary, coverage_percentage, coverage_duration_months)
+        p_claim = calculate_annual_claim_probability(h_i, v_i, beta_systemic, beta_individual)
+        e_loss = calculate_expected_loss(p_claim, l_payout)
+        p_monthly = calculate_final_monthly_premium(e_loss, lambda_factor, p_min)
+    return l_payout, p_claim, e_loss, p_monthly
+
+# --- Figures ---
+# Figures are cached as shared objects (st.cache_resource): st.plotly_chart only
+# serializes them, so no per-hit copy is needed.
+# Plotly is imported inside each builder, so the stages above can be used
+# without loading it.
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def premium_gauge_figure(p_monthly: float, p_min: float) -> go.Figure:
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = p_monthly,
+        title = {'text': "Calculated Monthly Premium"},
+        gauge = {'axis': {'range': [p_min, 100 + p_min], 'tickwidth': 1, 'tickcolor': "darkblue"},
+                 'bar': {'color': "darkblue"},
+                 'steps': [
+                     {'range': [p_min, p_min + 20], 'color': "lightgreen"},
+                     {'range': [p_min + 20, p_min + 50], 'color': "lightyellow"},
+                     {'range': [p_min + 50, p_min + 100], 'color': "lightcoral"}],
+                 'threshold' : {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': p_min + 75}}
+    ))
+    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+    return fig
+
+# Sidebar inputs shown in the sensitivity chart: label and one slider step
+SENSITIVITY_STEPS = {
+    "years_experience": ("Years of Experience (+1)", 1.0),
+    "general_upskilling_progress": ("General Upskilling (+1%)", 1.0),
+    "firm_specific_upskilling_progress": ("Firm-Specific Upskilling (+1%)", 1.0),
+    "annual_salary": ("Annual Salary (+$5,000)", 5000.0),
+    "coverage_percentage": ("Coverage Percentage (+1%)", 1.0),
+    "coverage_duration_months": ("Coverage Duration (+1 month)", 1.0),
+    "months_elapsed_transition": ("Months Since Transition (+1)", 1.0),
+    "economic_climate_modifier": ("Economic Climate M_econ (+0.05)", 0.05),
+    "ai_innovation_index": ("AI Innovation I_AI (+0.05)", 0.05),
+    "beta_systemic": ("β_systemic (+0.01)", 0.01),
+    "beta_individual": ("β_individual (+0.01)", 0.01),
+    "lambda_factor": ("Loading Factor λ (+0.1)", 0.1),
+    "p_min": ("Minimum Premium P_min (+$5)", 5.0),
+}
+ATTRIBUTION_LABELS = {
+    "loading": "Loading (λ)",
+    "payout": "Payout (L_payout)",
+    "occupational_hazard": "Occupational Hazard (H_base)",
+    "environment": "Economic & AI Environment",
+    "beta_systemic": "β_systemic",
+    "idiosyncratic_risk": "Idiosyncratic Risk (V_i)",
+    "beta_individual": "β_individual",
+    "minimum_premium": "Minimum Premium Floor",
+}
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES, show_spinner=False)
+def explanation_stage(profile: dict) -> dict:
+    """
+    Premium sensitivities and attribution for one profile, as plain floats:
+    {"partials", "attribution", "reference_premium", "pinned_v_i", "pinned_p_min"}.
+    """
+    with instrumentation.stage("app.stage.explanation"):
+        sensitivities = premium_sensitivities(profile)
+        attribution = premium_attribution(profile)
+    return {
+        "partials": {name: value.item() for name, value in sensitivities["partials"].items()},
+        "attribution": {name: attribution[name].item() for name in ATTRIBUTION_COLUMNS},
+        "reference_premium": attribution["reference_premium"].item(),
+        "pinned_v_i": sensitivities["pinned_v_i"].item(),
+        "pinned_p_min": sensitivities["pinned_p_min"].item(),
+    }
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES, show_spinner=False)
+def target_premium_stage(profile: dict, target_premium: float) -> dict:
+    """
+    For each input in solver.SOLVERS, the value that brings the profile's
+    premium to `target_premium`, as plain values:
+    {input: {"value", "premium", "feasible", "reason"}}.
+    """
+    with instrumentation.stage("app.stage.target_premium"):
+        solutions = {name: solve(profile, target_premium) for name, solve in SOLVERS.items()}
+    return {name: {key: values.tolist()[0] for key, values in solution.items()} for name, solution in solutions.items()}
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def premium_attribution_figure(profile: dict) -> go.Figure:
+    """
+    Waterfall from the reference premium (every factor at its neutral value)
+    to the profile's premium, one step per attribution factor.
+    """
+    import plotly.graph_objects as go
+    explanation = explanation_stage(profile)
+    steps = [(ATTRIBUTION_LABELS[name], value) for name, value in explanation["attribution"].items() if value != 0.0]
+    premium = explanation["reference_premium"] + sum(value for _, value in steps)
+    fig = go.Figure(go.Waterfall(
+        x=["Reference Premium"] + [label for label, _ in steps] + ["Your Premium"],
+        y=[explanation["reference_premium"]] + [value for _, value in steps] + [premium],
+        measure=["absolute"] + ["relative"] * len(steps) + ["total"],
+        texttemplate="$%{y:.2f}",
+        increasing={'marker': {'color': "lightcoral"}},
+        decreasing={'marker': {'color': "lightgreen"}},
+        totals={'marker': {'color': "darkblue"}},
+    ))
+    fig.update_layout(
+        title="Premium Attribution by Factor",
+        yaxis={'title': {'text': "Monthly Premium ($)"}},
+        showlegend=False,
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def premium_sensitivity_figure(profile: dict) -> go.Figure:
+    """
+    Premium change per one slider step of each input (exact derivative times
+    the step), largest effects on top.
+    """
+    import plotly.graph_objects as go
+    partials = explanation_stage(profile)["partials"]
+    effects = sorted(
+        ((label, partials[name] * step) for name, (label, step) in SENSITIVITY_STEPS.items()),
+        key=lambda effect: abs(effect[1]),
+    )
+    fig = go.Figure(go.Bar(
+        x=[value for _, value in effects],
+        y=[label for label, _ in effects],
+        orientation="h",
+        marker_color=["lightcoral" if value > 0 else "lightgreen" for _, value in effects],
+        texttemplate="%{x:+.2f}",
+    ))
+    fig.update_layout(
+        title="What Moves Your Premium (per Slider Step)",
+        xaxis={'title': {'text': "Change in Monthly Premium ($)"}},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def premium_trajectory_figure(profile: dict) -> go.Figure:
+    """
+    Monthly premium and H_base(k) over k = 0..24 months of the career
+    transition, with the profile's current month marked.
+    """
+    import plotly.graph_objects as go
+    path = premium_trajectories(profile)
+    months = path["months"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=months, y=path["p_monthly"][0], mode="lines+markers", name="Monthly Premium ($)", line={'color': "darkblue"}))
+    fig.add_trace(go.Scatter(x=months, y=path["h_base_t"][0], mode="lines", name="H_base(k)", line={'color': "gray", 'dash': "dot"}, yaxis="y2"))
+    fig.add_vline(x=profile["months_elapsed_transition"], line_dash="dash", line_color="red", annotation_text="Now")
+    fig.add_vline(x=TTV_PERIOD_DEFAULT, line_dash="dot", line_color="green", annotation_text="TTV")
+    fig.update_layout(
+        title="Premium Trajectory Over the Career Transition",
+        xaxis={'title': {'text': "Months Elapsed Since Transition (k)"}},
+        yaxis={'title': {'text': "Monthly Premium ($)"}},
+        yaxis2={'title': {'text': "H_base(k)"}, 'overlaying': "y", 'side': "right"},
+        legend={'orientation': "h", 'y': -0.2},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
@@ -0,0 +1,319 @@
+import sys
+
+import numpy as np
+
+from application_pages.data_lookups import (
+    W_CR_DEFAULT, W_US_DEFAULT, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    GAMMA_GEN_DEFAULT, GAMMA_SPEC_DEFAULT,
+    BETA_SYSTEMIC_DEFAULT, BETA_INDIVIDUAL_DEFAULT, LAMBDA_FACTOR_DEFAULT,
+    P_MIN_DEFAULT, M_ECON_DEFAULT, I_AI_DEFAULT, TTV_PERIOD_DEFAULT
+)
+from application_pages import instrumentation
+from application_pages.factor_tables import (
+    COLUMN_TABLES, CompiledFactorTables, default_factor_tables, encode_column,
+    human_capital_factor_from_codes
+)
+
+# Vectorized counterparts of the functions in calculations.py. Every function
+# accepts NumPy arrays (or scalars, which broadcast) and performs the exact same
+# floating point operations in the same order as its scalar twin, so results
+# match the per-policy path bit for bit. Categorical arguments may be labels
+# or integer codes from factor_tables; labels are encoded against the
+# compiled tables (default_factor_tables() unless `tables` is given).
+
+# Input columns, named after the sidebar variables in app.py
+CATEGORICAL_COLUMNS = (
+    "job_role", "education_level", "education_field", "school_tier",
+    "company_type", "current_industry", "target_industry",
+)
+NUMERIC_COLUMNS = (
+    "years_experience", "general_upskilling_progress",
+    "firm_specific_upskilling_progress", "annual_salary",
+    "coverage_percentage", "coverage_duration_months",
+    "months_elapsed_transition",
+)
+# Optional per-policy columns; when absent the keyword argument of
+# price_policies is used for every row.
+PARAMETER_DEFAULTS = {
+    "beta_systemic": BETA_SYSTEMIC_DEFAULT,
+    "beta_individual": BETA_INDIVIDUAL_DEFAULT,
+    "lambda_factor": LAMBDA_FACTOR_DEFAULT,
+    "p_min": P_MIN_DEFAULT,
+    "economic_climate_modifier": M_ECON_DEFAULT,
+    "ai_innovation_index": I_AI_DEFAULT,
+    "ttv_period": TTV_PERIOD_DEFAULT,
+}
+# Intermediates returned by price_policies, in pipeline order
+OUTPUT_COLUMNS = (
+    "f_hc", "f_cr", "f_us", "v_i", "h_base_t", "h_i",
+    "l_payout", "p_claim", "e_loss", "p_monthly",
+)
+
+def column_factors(column: str, values, tables: CompiledFactorTables | None = None) -> np.ndarray:
+    """
+    Gathers the factor of each category label (or code) in a policy column.
+    Unknown labels get the table's fallback, matching the dict.get default
+    of the scalar functions.
+    """
+    tables = tables or default_factor_tables()
+    return tables.factors[COLUMN_TABLES[column]][encode_column(tables, column, values)]
+
+# --- Idiosyncratic Risk (Vi(t)) Calculations ---
+
+def calculate_experience_factor_batch(years_experience) -> np.ndarray:
+    """
+    Vectorized Experience Factor (f_exp).
+    f_exp = 1 - (0.015 * min(Yrs, 20))
+    """
+    return 1 - (0.015 * np.minimum(years_experience, 20.0))
+
+def calculate_human_capital_factor_batch(
+    job_role,
+    education_level,
+    education_field,
+    school_tier,
+    years_experience,
+    tables: CompiledFactorTables | None = None
+) -> np.ndarray:
+    """
+    Vectorized Human Capital Factor (F_HC).
+    F_HC = f_role * f_level * f_field * f_school * f_exp, gathered from the
+    precomputed F_HC cube.
+    """
+    tables = tables or default_factor_tables()
+    return human_capital_factor_from_codes(
+        tables,
+        encode_column(tables, "job_role", job_role),
+        encode_column(tables, "education_level", education_level),
+        encode_column(tables, "education_field", education_field),
+        encode_column(tables, "school_tier", school_tier),
+        years_experience,
+    )
+
+def calculate_company_risk_factor_batch(company_type, tables: CompiledFactorTables | None = None) -> np.ndarray:
+    """
+    Vectorized Company Risk Factor (F_CR) lookup.
+    """
+    return column_factors("company_type", company_type, tables)
+
+def calculate_upskilling_factor_batch(
+    p_general_progress,
+    p_specific_progress,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT
+) -> np.ndarray:
+    """
+    Vectorized Upskilling Factor (F_US).
+    F_US = 1 - (gamma_gen * P_gen(t) + gamma_spec * P_spec(t))
+    """
+    p_gen_normalized = np.asarray(p_general_progress, dtype=np.float64) / 100.0
+    p_spec_normalized = np.asarray(p_specific_progress, dtype=np.float64) / 100.0
+    return 1 - (gamma_gen * p_gen_normalized + gamma_spec * p_spec_normalized)
+
+def calculate_idiosyncratic_risk_batch(
+    f_hc,
+    f_cr,
+    f_us,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT
+) -> np.ndarray:
+    """
+    Vectorized Idiosyncratic Risk score (Vi(t)).
+    V_i(t) = min(100.0, max(5.0, V_raw - 50.0))
+    """
+    v_raw = f_hc * (w_cr * f_cr + w_us * f_us)
+    return np.minimum(100.0, np.maximum(5.0, v_raw - 50.0))
+
+# --- Systematic Risk (Hi) Calculations ---
+
+def interpolate_occupational_hazard_batch(h_current, h_target, months_elapsed_transition, ttv_period) -> np.ndarray:
+    """
+    Vectorized H_base(k) from numeric current/target hazards.
+    H_base(k) = (1 - k/TTV) * H_current + (k/TTV) * H_target, pinned outside [0, TTV].
+    """
+    k = np.asarray(months_elapsed_transition, dtype=np.float64)
+    ttv = np.asarray(ttv_period, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = k / ttv
+        blended = (1 - ratio) * h_current + ratio * h_target
+    return np.where(k >= ttv, h_target, np.where(k <= 0, h_current, blended))
+
+def calculate_base_occupational_hazard_batch(
+    current_industry,
+    target_industry,
+    months_elapsed_transition,
+    ttv_period=TTV_PERIOD_DEFAULT,
+    tables: CompiledFactorTables | None = None
+) -> np.ndarray:
+    """
+    Vectorized Base Occupational Hazard (H_base(k)).
+    Unknown industries default to a hazard of 50, as in the scalar function.
+    """
+    h_current = column_factors("current_industry", current_industry, tables)
+    h_target = column_factors("target_industry", target_industry, tables)
+    return interpolate_occupational_hazard_batch(h_current, h_target, months_elapsed_transition, ttv_period)
+
+def calculate_systematic_risk_batch(
+    h_base_t,
+    m_econ,
+    i_ai,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT
+) -> np.ndarray:
+    """
+    Vectorized Systematic Risk score (H_i).
+    H_i = H_base(t) * (w_econ * M_econ + w_inno * I_AI)
+    """
+    return h_base_t * (w_econ * np.asarray(m_econ, dtype=np.float64) + w_inno * np.asarray(i_ai, dtype=np.float64))
+
+# --- Premium Determination Calculations ---
+
+def calculate_total_payout_batch(annual_salary, coverage_percentage, coverage_duration_months) -> np.ndarray:
+    """
+    Vectorized Total Payout Amount (L_payout).
+    L_payout = (Annual Salary / 12) * Coverage Duration * Coverage Percentage
+    """
+    annual_salary = np.asarray(annual_salary, dtype=np.float64)
+    coverage_percentage = np.asarray(coverage_percentage, dtype=np.float64)
+    coverage_duration_months = np.asarray(coverage_duration_months, dtype=np.float64)
+    return (annual_salary / 12.0) * coverage_duration_months * (coverage_percentage / 100.0)
+
+def calculate_annual_claim_probability_batch(h_i, v_i, beta_systemic, beta_individual) -> np.ndarray:
+    """
+    Vectorized Annual Claim Probability (P_claim).
+    P_claim = (H_i / 100 * beta_systemic) * (V_i(t) / 100 * beta_individual)
+    """
+    return (h_i / 100.0 * beta_systemic) * (v_i / 100.0 * beta_individual)
+
+def calculate_final_monthly_premium_batch(e_loss, lambda_factor, p_min) -> np.ndarray:
+    """
+    Vectorized Final Monthly Premium (P_monthly).
+    P_monthly = max((E[Loss] * lambda) / 12, P_min)
+    """
+    return np.maximum((e_loss * lambda_factor) / 12.0, p_min)
+
+# --- Whole-book pricing ---
+
+def policy_columns(policies) -> dict:
+    """
+    Normalizes a DataFrame or a mapping of column name -> array-like into
+    a dict of NumPy arrays (scalars are kept and broadcast later).
+    """
+    pd = sys.modules.get("pandas") # a DataFrame implies pandas is already loaded
+    if pd is not None and isinstance(policies, pd.DataFrame):
+        return {name: policies[name].to_numpy() for name in policies.columns}
+    return {name: np.asarray(value) for name, value in policies.items()}
+
+def require_policy_columns(policies) -> dict:
+    """
+    policy_columns(), raising KeyError if any required input column is missing.
+    """
+    columns = policy_columns(policies)
+    missing = [name for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS if name not in columns]
+    if missing:
+        raise KeyError(f"Missing policy columns: {', '.join(missing)}")
+    return columns
+
+def resolve_parameters(columns: dict, **parameters) -> dict:
+    """
+    The value of each PARAMETER_DEFAULTS entry for a book: the policy column
+    if present, else the keyword argument, else the default. Raises KeyError
+    for a keyword that is not a PARAMETER_DEFAULTS entry.
+    """
+    for name in parameters:
+        if name not in PARAMETER_DEFAULTS:
+            raise KeyError(f"Unknown parameter {name!r}")
+    resolved = dict(PARAMETER_DEFAULTS)
+    resolved.update(parameters)
+    for name in PARAMETER_DEFAULTS:
+        if name in columns:
+            resolved[name] = np.asarray(columns[name], dtype=np.float64)
+    return resolved
+
+def price_policies(
+    policies,
+    beta_systemic: float = BETA_SYSTEMIC_DEFAULT,
+    beta_individual: float = BETA_INDIVIDUAL_DEFAULT,
+    lambda_factor: float = LAMBDA_FACTOR_DEFAULT,
+    p_min: float = P_MIN_DEFAULT,
+    economic_climate_modifier: float = M_ECON_DEFAULT,
+    ai_innovation_index: float = I_AI_DEFAULT,
+    ttv_period: int = TTV_PERIOD_DEFAULT,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None
+) -> dict:
+    """
+    Prices a whole book of policies in one vectorized pass.
+
+    `policies` is a DataFrame or a dict of arrays with one row per policy and
+    the columns in CATEGORICAL_COLUMNS and NUMERIC_COLUMNS. Any column named in
+    PARAMETER_DEFAULTS overrides the matching keyword argument per policy.
+    Categorical columns may hold labels or integer codes from `tables`.
+    Returns a dict mapping each name in OUTPUT_COLUMNS to a float64 array.
+    """
+    columns = require_policy_columns(policies)
+    parameters = resolve_parameters(
+        columns,
+        beta_systemic=beta_systemic,
+        beta_individual=beta_individual,
+        lambda_factor=lambda_factor,
+        p_min=p_min,
+        economic_climate_modifier=economic_climate_modifier,
+        ai_innovation_index=ai_innovation_index,
+        ttv_period=ttv_period,
+    )
+
+    rows = max(np.size(columns[name]) for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS) if instrumentation.is_enabled() else 1
+
+    # Idiosyncratic Risk (Vi(t))
+    with instrumentation.stage("price_policies.human_capital", rows):
+        f_hc = calculate_human_capital_factor_batch(
+            columns["job_role"], columns["education_level"], columns["education_field"],
+            columns["school_tier"], columns["years_experience"], tables
+        )
+    with instrumentation.stage("price_policies.company_risk", rows):
+        f_cr = calculate_company_risk_factor_batch(columns["company_type"], tables)
+    with instrumentation.stage("price_policies.upskilling", rows):
+        f_us = calculate_upskilling_factor_batch(
+            columns["general_upskilling_progress"], columns["firm_specific_upskilling_progress"],
+            gamma_gen, gamma_spec
+        )
+    with instrumentation.stage("price_policies.idiosyncratic_risk", rows):
+        v_i = calculate_idiosyncratic_risk_batch(f_hc, f_cr, f_us, w_cr, w_us)
+
+    # Systematic Risk (Hi)
+    with instrumentation.stage("price_policies.base_hazard", rows):
+        h_base_t = calculate_base_occupational_hazard_batch(
+            columns["current_industry"], columns["target_industry"],
+            columns["months_elapsed_transition"], parameters["ttv_period"], tables
+        )
+    with instrumentation.stage("price_policies.systematic_risk", rows):
+        h_i = calculate_systematic_risk_batch(
+            h_base_t, parameters["economic_climate_modifier"], parameters["ai_innovation_index"],
+            w_econ, w_inno
+        )
+
+    # Premium Determination
+    with instrumentation.stage("price_policies.payout", rows):
+        l_payout = calculate_total_payout_batch(
+            columns["annual_salary"], columns["coverage_percentage"], columns["coverage_duration_months"]
+        )
+    with instrumentation.stage("price_policies.claim_probability", rows):
+        p_claim = calculate_annual_claim_probability_batch(
+            h_i, v_i, parameters["beta_systemic"], parameters["beta_individual"]
+        )
+    with instrumentation.stage("price_policies.premium", rows):
+        e_loss = p_claim * l_payout
+        p_monthly = calculate_final_monthly_premium_batch(e_loss, parameters["lambda_factor"], parameters["p_min"])
+
+    results = dict(zip(OUTPUT_COLUMNS, (f_hc, f_cr, f_us, v_i, h_base_t, h_i, l_payout, p_claim, e_loss, p_monthly)))
+    shape = np.broadcast_shapes(*(np.shape(value) for value in results.values()))
+    return {
+        name: value if np.shape(value) == shape else np.broadcast_to(value, shape).copy()
+        for name, value in results.items()
+    }
@@ -0,0 +1,300 @@
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from application_pages.data_lookups import POLICY_INPUT_RANGES
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, OUTPUT_COLUMNS, price_policies
+)
+from application_pages.factor_tables import COLUMN_TABLES, default_factor_tables, encode_column
+from application_pages.parallel_pricing import ParallelPricer
+
+# Headless bulk pricing: streams a CSV or Parquet policy file through the
+# batch pipeline chunk by chunk, so peak memory is bounded by the chunk size
+# rather than the file size. Invalid rows go to a reject file with a reason.
+#
+#   python -m application_pages.bulk_pricing policies.csv priced.parquet \
+#       --rejects rejected.csv --chunk-size 250000
+
+CHUNK_SIZE_DEFAULT = 250_000
+REJECT_REASON_COLUMN = "reject_reason"
+
+# --- Input validation ---
+
+def find_rejects(chunk: pd.DataFrame, tables=None) -> tuple:
+    """
+    Encodes the categorical columns of `chunk` and checks every row against the
+    known categories and POLICY_INPUT_RANGES.
+    Returns (encoded columns, array of reject reasons with "" for valid rows).
+    """
+    tables = tables or default_factor_tables()
+    reasons = np.full(len(chunk), "", dtype=object)
+
+    def flag(mask, reason):
+        mask = mask & (reasons == "")
+        reasons[mask] = reason
+
+    missing = [name for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS if name not in chunk.columns]
+    if missing:
+        raise KeyError(f"Missing policy columns: {', '.join(missing)}")
+
+    columns = {}
+    for name in CATEGORICAL_COLUMNS:
+        codes = encode_column(tables, name, chunk[name].to_numpy())
+        flag(codes == tables.unknown_code(COLUMN_TABLES[name]), f"unknown {name}")
+        columns[name] = codes
+    for name in NUMERIC_COLUMNS + tuple(n for n in PARAMETER_DEFAULTS if n in chunk.columns):
+        values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=np.float64)
+        low, high = POLICY_INPUT_RANGES[name]
+        flag(np.isnan(values), f"missing or non-numeric {name}")
+        flag((values < low) | (values > high), f"{name} out of range [{low}, {high}]")
+        columns[name] = values
+    return columns, reasons
+
+# --- Chunked readers and writers ---
+
+def file_format(path: str) -> str:
+    lowered = path.lower()
+    extension = os.path.splitext(lowered[:-3] if lowered.endswith(".gz") else lowered)[1]
+    if extension in (".parquet", ".pq") and not lowered.endswith(".gz"):
+        return "parquet"
+    if extension in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"Unsupported file type for {path!r}; expected .csv, .csv.gz or .parquet")
+
+def policy_file_columns(path: str) -> list:
+    """
+    Column names of a policy file, read from its header or Parquet schema.
+    """
+    if file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def iter_policy_chunks(path: str, chunk_size: int = CHUNK_SIZE_DEFAULT):
+    """
+    Yields the policy file as DataFrames of at most `chunk_size` rows.
+    """
+    if file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={name: str for name in CATEGORICAL_COLUMNS})
+
+def priced_schema(input_columns: list):
+    """
+    Output schema for a policy file with `input_columns`: validated numeric
+    inputs and every pipeline output as float64, everything else passed
+    through as text.
+    """
+    import pyarrow as pa
+    numeric = set(NUMERIC_COLUMNS) | set(PARAMETER_DEFAULTS) | set(OUTPUT_COLUMNS)
+    names = list(input_columns) + [name for name in OUTPUT_COLUMNS if name not in input_columns]
+    return pa.schema([(name, pa.float64() if name in numeric else pa.string()) for name in names])
+
+def rejects_schema(input_columns: list):
+    """
+    Reject file schema: every input column as text, plus the reject reason.
+    """
+    import pyarrow as pa
+    names = [name for name in input_columns if name != REJECT_REASON_COLUMN] + [REJECT_REASON_COLUMN]
+    return pa.schema([(name, pa.string()) for name in names])
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to a CSV, gzipped CSV or Parquet file through
+    pyarrow's streaming writers. The file is created, with `schema`, when the
+    writer is, so it exists (header only) even if no chunk is written; every
+    chunk is converted to that schema.
+    """
+
+    def __init__(self, path: str, schema):
+        import pyarrow as pa
+        self.path = path
+        self.format = file_format(path)
+        self.schema = schema
+        self.rows = 0
+        self._sink = pa.CompressedOutputStream(path, "gzip") if path.lower().endswith(".gz") else None
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            import pyarrow.csv as pcsv
+            self._writer = pcsv.CSVWriter(self._sink or path, schema)
+
+    def write(self, frame: pd.DataFrame):
+        import pyarrow as pa
+        text = [field.name for field in self.schema if pa.types.is_string(field.type)]
+        frame = frame.astype({name: "string" for name in text if name in frame.columns})
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+        self.rows += len(frame)
+
+    def close(self):
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# --- Bulk pricing ---
+
+def submit_chunk(chunk: pd.DataFrame, tables=None, pricer=None, **parameters):
+    """
+    Validates one chunk and starts pricing its valid rows: across the worker
+    pool if a ParallelPricer is given (returning before they are priced),
+    else inline. Returns a function giving the chunk's price_chunk() result.
+    """
+    chunk = chunk.reset_index(drop=True)
+    columns, reasons = find_rejects(chunk, tables)
+    valid = reasons == ""
+    valid_columns = {name: values[valid] for name, values in columns.items()}
+    if not valid.any():
+        job = None
+    elif pricer is not None:
+        job = pricer.submit(valid_columns)
+    else:
+        results = price_policies(valid_columns, tables=tables, **parameters)
+
+    def collect() -> tuple:
+        priced = chunk[valid].reset_index(drop=True)
+        if len(priced):
+            numerics = {name: values for name, values in valid_columns.items() if name not in CATEGORICAL_COLUMNS}
+            priced = priced.assign(**numerics, **(job.result() if pricer is not None else results))
+        rejected = chunk[~valid].astype(str).assign(**{REJECT_REASON_COLUMN: reasons[~valid]})
+        return priced, rejected
+
+    return collect
+
+def price_chunk(chunk: pd.DataFrame, tables=None, pricer=None, **parameters) -> tuple:
+    """
+    Prices one chunk. Returns (priced rows with all pipeline outputs appended,
+    rejected rows with a REJECT_REASON_COLUMN). Priced rows carry the validated
+    float64 numerics; rejected rows keep their original values as text, so the
+    output schema is the same for every chunk. If a ParallelPricer is given
+    the valid rows are priced across its worker pool.
+    """
+    return submit_chunk(chunk, tables, pricer, **parameters)()
+
+def peak_memory_mb() -> float:
+    """
+    Peak resident set size of this process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+def price_file(
+    input_path: str,
+    output_path: str,
+    rejects_path: str | None = None,
+    chunk_size: int = CHUNK_SIZE_DEFAULT,
+    workers: int = 1,
+    progress=None,
+    **parameters
+) -> dict:
+    """
+    Streams `input_path` through the pricing pipeline into `output_path`.
+    Rejected rows are written to `rejects_path` (or dropped if it is None).
+    With workers > 1 each chunk is priced across a process pool while the
+    next is read, so up to two chunks are held at once.
+    `progress`, if given, is called with the running summary after each chunk.
+    Returns a summary with row counts, elapsed seconds, throughput and peak memory.
+    """
+    tables = default_factor_tables()
+    summary = {"rows_read": 0, "rows_priced": 0, "rows_rejected": 0}
+    start = time.perf_counter()
+    input_columns = policy_file_columns(input_path)
+    rejects_writer = ChunkWriter(rejects_path, rejects_schema(input_columns)) if rejects_path else None
+    pricer = ParallelPricer(workers, tables, **parameters) if workers > 1 else None
+    try:
+        with ChunkWriter(output_path, priced_schema(input_columns)) as writer:
+
+            def write(collect, rows):
+                priced, rejected = collect()
+                if len(priced):
+                    writer.write(priced)
+                if len(rejected) and rejects_writer is not None:
+                    rejects_writer.write(rejected)
+                summary["rows_read"] += rows
+                summary["rows_priced"] += len(priced)
+                summary["rows_rejected"] += len(rejected)
+                if progress is not None:
+                    progress(dict(summary, elapsed_seconds=time.perf_counter() - start))
+
+            # With a pool, chunk k+1 is read and validated while chunk k is priced
+            pending = None
+            for chunk in iter_policy_chunks(input_path, chunk_size):
+                submitted = (submit_chunk(chunk, tables, pricer, **parameters), len(chunk))
+                if pending is not None:
+                    write(*pending)
+                if pricer is None:
+                    write(*submitted)
+                else:
+                    pending = submitted
+            if pending is not None:
+                write(*pending)
+    finally:
+        if rejects_writer is not None:
+            rejects_writer.close()
+        if pricer is not None:
+            pricer.close()
+    elapsed = time.perf_counter() - start
+    summary["elapsed_seconds"] = elapsed
+    summary["rows_per_second"] = summary["rows_read"] / elapsed if elapsed > 0 else float("inf")
+    summary["peak_memory_mb"] = peak_memory_mb()
+    return summary
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m application_pages.bulk_pricing",
+        description="Price a CSV/Parquet policy file with the AI-Q premium model.",
+    )
+    parser.add_argument("input", help="Policy file (.csv, .csv.gz or .parquet), one row per policy")
+    parser.add_argument("output", help="Priced output file (.csv, .csv.gz or .parquet)")
+    parser.add_argument("--rejects", help="File for rows with unknown categories or out-of-range values")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_DEFAULT, help="Rows per chunk (bounds peak memory)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for pricing (default: 1)")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    for name, default in PARAMETER_DEFAULTS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", dest=name, type=float, default=default,
+            help=f"Default {name} for rows without that column (default: {default})",
+        )
+    return parser
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    parameters = {name: getattr(args, name) for name in PARAMETER_DEFAULTS}
+    for name, value in parameters.items():
+        # The same ranges a per-policy column is checked against
+        low, high = POLICY_INPUT_RANGES[name]
+        if not low <= value <= high:
+            parser.error(f"--{name.replace('_', '-')} {value} out of range [{low}, {high}]")
+
+    def report(summary):
+        rate = summary["rows_read"] / summary["elapsed_seconds"] if summary["elapsed_seconds"] > 0 else 0.0
+        print(f"{summary['rows_read']:,} rows read, {summary['rows_rejected']:,} rejected ({rate:,.0f} rows/s)", file=sys.stderr)
+
+    summary = price_file(
+        args.input, args.output, args.rejects, args.chunk_size, args.workers,
+        progress=None if args.quiet else report, **parameters
+    )
+    print(
+        f"Priced {summary['rows_priced']:,} of {summary['rows_read']:,} rows "
+        f"({summary['rows_rejected']:,} rejected) in {summary['elapsed_seconds']:.2f}s: "
+        f"{summary['rows_per_second']:,.0f} rows/s, peak memory {summary['peak_memory_mb']:.0f} MB"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import numpy as np
+
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, OUTPUT_COLUMNS,
+    require_policy_columns, resolve_parameters, price_policies,
+    calculate_total_payout_batch, calculate_final_monthly_premium_batch
+)
+from application_pages.factor_tables import (
+    COLUMN_TABLES, CompiledFactorTables, default_factor_tables, encode_column
+)
+from application_pages.priced_book import MODEL_WEIGHT_DEFAULTS
+
+# Risk cohorts: policies that agree on every input behind P_claim (the
+# categories, experience, upskilling, transition month and any per-policy
+# risk parameters) share one risk cell, whatever their salary and coverage.
+# Each cell is priced once up to P_claim; a policy then only needs
+# E[Loss] = P_claim[cell] * L_payout and the P_min floor. Those are the same
+# operations price_policies performs, so premiums match it bit for bit while
+# every numeric key stays on its sidebar step (the default buckets).
+# Coarser buckets trade that exactness for fewer cells: each cell is priced at
+# the values of the first policy that created it.
+#
+# A PortfolioCube keeps policy count, premium, expected loss and exposure
+# (L_payout) summed by current industry x company type x role, so dashboard
+# totals and slices come from the cube rather than a scan of the book.
+
+# Numeric inputs that set P_claim -> default bucket width (the sidebar step)
+RISK_BUCKETS = {
+    "years_experience": 1.0,
+    "general_upskilling_progress": 1.0,
+    "firm_specific_upskilling_progress": 1.0,
+    "months_elapsed_transition": 1.0,
+}
+# Per-policy parameter columns that set P_claim -> default bucket width
+RISK_PARAMETER_BUCKETS = {
+    "beta_systemic": 0.01,
+    "beta_individual": 0.01,
+    "economic_climate_modifier": 0.05,
+    "ai_innovation_index": 0.05,
+    "ttv_period": 1.0,
+}
+# Per-policy parameter columns applied after P_claim
+PREMIUM_PARAMETERS = ("lambda_factor", "p_min")
+# Stages computed once per cell
+CELL_OUTPUTS = ("f_hc", "f_cr", "f_us", "v_i", "h_base_t", "h_i", "p_claim")
+# Payout inputs a cell is priced with; its L_payout is never used
+PAYOUT_PLACEHOLDERS = {"annual_salary": 0.0, "coverage_percentage": 0.0, "coverage_duration_months": 0.0}
+
+CUBE_DIMENSIONS = ("current_industry", "company_type", "job_role")
+CUBE_MEASURES = ("policies", "premium", "expected_loss", "exposure")
+UNKNOWN_LABEL = "Unknown"
+
+KEY_SPAN_MAX = 2 ** 62
+
+# --- Cell keys ---
+
+def row_keys(digits: np.ndarray) -> np.ndarray:
+    """
+    One int64 key per row of an (n, k) integer matrix, equal exactly when the
+    rows are equal. Columns are combined in mixed radix; when the radix would
+    overflow, the partial key is first renumbered densely.
+    """
+    key = np.zeros(len(digits), dtype=np.int64)
+    span = 1
+    for column in digits.T:
+        column = column - column.min() if len(column) else column
+        radix = int(column.max()) + 1 if len(column) else 1
+        if radix > len(column):
+            column, radix = dense_codes(column)
+        if span * radix >= KEY_SPAN_MAX:
+            key, span = dense_codes(key)
+        key = key * radix + column
+        span *= radix
+    return key
+
+def dense_codes(values: np.ndarray) -> tuple:
+    """
+    (codes, count): `values` renumbered 0..count-1 in sorted order.
+    """
+    uniques, codes = np.unique(values, return_inverse=True)
+    return codes.reshape(-1).astype(np.int64), len(uniques)
+
+# --- Portfolio cube ---
+
+class PortfolioCube:
+    """
+    Policy count, monthly premium, annual expected loss and exposure summed
+    over CUBE_DIMENSIONS. sums[measure][i, c, r] is the total over policies
+    with current industry i, company type c and role r (codes of the factor
+    tables, the last code of each axis meaning an unknown label).
+    """
+
+    def __init__(self, tables: CompiledFactorTables):
+        self.labels = {
+            name: tables.categories[COLUMN_TABLES[name]] + (UNKNOWN_LABEL,) for name in CUBE_DIMENSIONS
+        }
+        self.shape = tuple(len(labels) for labels in self.labels.values())
+        self.sums = {name: np.zeros(self.shape) for name in CUBE_MEASURES}
+
+    def add(self, cells: np.ndarray, premium: np.ndarray, expected_loss: np.ndarray, exposure: np.ndarray, sign: float = 1.0):
+        """
+        Adds (or with sign=-1, removes) policies given their flat cube cells.
+        """
+        size = int(np.prod(self.shape))
+        measures = {"policies": None, "premium": premium, "expected_loss": expected_loss, "exposure": exposure}
+        for name, weights in measures.items():
+            self.sums[name] += sign * np.bincount(cells, weights, minlength=size).reshape(self.shape)
+
+    def _selection(self, filters: dict) -> tuple:
+        index = []
+        for name in CUBE_DIMENSIONS:
+            chosen = filters.get(name)
+            if chosen is None:
+                index.append(slice(None))
+                continue
+            chosen = [chosen] if isinstance(chosen, str) else list(chosen)
+            unknown = [label for label in chosen if label not in self.labels[name]]
+            if unknown:
+                raise KeyError(f"Unknown {name} label(s): {', '.join(map(str, unknown))}")
+            index.append(np.array([self.labels[name].index(label) for label in chosen], dtype=np.intp))
+        return np.ix_(*[np.arange(size)[position] for size, position in zip(self.shape, index)])
+
+    def cell_mask(self, **filters) -> np.ndarray:
+        """
+        Boolean array of the cube's shape, True for the cells matching `filters`.
+        """
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[self._selection(filters)] = True
+        return mask
+
+    def totals(self, **filters) -> dict:
+        """
+        {measure: total} over the policies matching `filters`, each a
+        dimension name mapped to one label or a list of labels.
+        """
+        selection = self._selection(filters)
+        return {name: float(values[selection].sum()) for name, values in self.sums.items()}
+
+    def by(self, dimension: str, **filters) -> dict:
+        """
+        Totals per label of `dimension` over the policies matching `filters`:
+        {"labels": labels, measure: array}, with labels that hold no policies
+        left out.
+        """
+        selection = self._selection(filters)
+        axis = CUBE_DIMENSIONS.index(dimension)
+        others = tuple(position for position in range(len(CUBE_DIMENSIONS)) if position != axis)
+        sums = {name: values[selection].sum(axis=others) for name, values in self.sums.items()}
+        labels = np.array(self.labels[dimension], dtype=object)[selection[axis].ravel()]
+        held = sums["policies"] > 0
+        return {"labels": tuple(labels[held]), **{name: values[held] for name, values in sums.items()}}
+
+# --- Cohort book ---
+
+class CohortBook:
+    """
+    A policy book priced once per risk cell, with a PortfolioCube kept in step.
+
+    Build one with CohortBook.from_policies(); append() adds policies (pricing
+    only cells not seen before) and reprice() changes book-wide parameters.
+    """
+
+    def __init__(self, buckets: dict, parameters: dict, weights: dict, tables: CompiledFactorTables | None = None):
+        self.buckets = buckets
+        self.parameters = parameters
+        self.weights = weights
+        self.tables = tables or default_factor_tables()
+        self.risk_parameters = tuple(name for name in buckets if name in RISK_PARAMETER_BUCKETS)
+        self.key_columns = CATEGORICAL_COLUMNS + tuple(buckets)
+        self.cell_digits = np.zeros((0, len(self.key_columns)), dtype=np.int64)
+        self.cell_inputs = {name: np.zeros(0, dtype=np.int16 if name in CATEGORICAL_COLUMNS else np.float64) for name in self.key_columns}
+        self.cell_outputs = {name: np.zeros(0) for name in CELL_OUTPUTS}
+        self.policy_cell = np.zeros(0, dtype=np.int64)
+        self.policy_inputs = {name: np.zeros(0) for name in PAYOUT_PLACEHOLDERS}
+        self.policy_parameters = {}
+        self.outputs = {name: np.zeros(0) for name in ("l_payout", "e_loss", "p_monthly")}
+        self.cube = PortfolioCube(self.tables)
+
+    @classmethod
+    def from_policies(cls, policies, buckets: dict | None = None, tables: CompiledFactorTables | None = None, **parameters) -> "CohortBook":
+        """
+        Prices `policies` (anything price_policies accepts) by risk cell.
+        `buckets` overrides bucket widths of RISK_BUCKETS inputs (and of the
+        per-policy parameter columns in RISK_PARAMETER_BUCKETS that the book
+        has). Keyword arguments set book-wide parameters and model weights.
+        """
+        weights = {name: parameters.pop(name, default) for name, default in MODEL_WEIGHT_DEFAULTS.items()}
+        columns = require_policy_columns(policies)
+        widths = dict(RISK_BUCKETS)
+        widths.update({name: width for name, width in RISK_PARAMETER_BUCKETS.items() if name in columns})
+        unknown = [name for name in buckets or {} if name not in widths]
+        if unknown:
+            raise KeyError(f"Not a risk input of this book: {', '.join(unknown)}")
+        widths.update(buckets or {})
+        book = cls(widths, parameters, weights, tables)
+        book.append(columns)
+        return book
+
+    def __len__(self) -> int:
+        return len(self.policy_cell)
+
+    @property
+    def cells(self) -> int:
+        return len(self.cell_digits)
+
+    def _digits(self, columns: dict, n: int) -> np.ndarray:
+        digits = np.empty((n, len(self.key_columns)), dtype=np.int64, order="F")
+        for position, name in enumerate(self.key_columns):
+            if name in CATEGORICAL_COLUMNS:
+                digits[:, position] = encode_column(self.tables, name, columns[name])
+                continue
+            values = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))
+            if not np.isfinite(values).all():
+                raise ValueError(f"{name} must be finite to key risk cells")
+            digits[:, position] = np.round(values / self.buckets[name])
+        return digits
+
+    def append(self, policies) -> slice:
+        """
+        Adds policies (anything price_policies accepts, with the same per-policy
+        parameter columns as the book) and returns the slice of their rows.
+        New risk cells are priced; known ones are reused. Raises KeyError if
+        the parameter columns differ from the book's.
+        """
+        columns = require_policy_columns(policies)
+        missing = [name for name in self.risk_parameters + tuple(self.policy_parameters) if name not in columns]
+        if missing:
+            raise KeyError(f"Missing per-policy parameter columns: {', '.join(missing)}")
+        if not len(self):
+            self.policy_parameters = {name: np.zeros(0) for name in PREMIUM_PARAMETERS if name in columns}
+        # A parameter column the book was not built with would silently lose to the book-wide value
+        unexpected = [name for name in PARAMETER_DEFAULTS if name in columns and name not in self.risk_parameters + tuple(self.policy_parameters)]
+        if unexpected:
+            raise KeyError(f"Per-policy parameter columns not in this book: {', '.join(unexpected)}")
+        n = max(np.size(columns[name]) for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+        digits = self._digits(columns, n)
+
+        # Key existing cells and new rows together, so keys are comparable
+        known = self.cells
+        unique_keys, inverse = np.unique(row_keys(np.concatenate([self.cell_digits, digits]) if known else digits), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        cell_of_key = np.full(len(unique_keys), -1, dtype=np.int64)
+        cell_of_key[inverse[:known]] = np.arange(known)
+        unseen = cell_of_key[inverse[known:]] < 0
+        new_keys, first = np.unique(inverse[known:][unseen], return_index=True)
+        cell_of_key[new_keys] = known + np.arange(len(new_keys))
+        founders = np.flatnonzero(unseen)[first] # first row of each new cell
+
+        # Price the new cells up to P_claim at their first policy's values
+        cell_columns = {}
+        for name in self.key_columns:
+            values = np.broadcast_to(np.asarray(columns[name]), (n,))[founders]
+            cell_columns[name] = encode_column(self.tables, name, values) if name in CATEGORICAL_COLUMNS else values.astype(np.float64)
+        self.cell_digits = np.concatenate([self.cell_digits, digits[founders]])
+        self.cell_inputs = {name: np.concatenate([self.cell_inputs[name], cell_columns[name]]) for name in self.key_columns}
+        priced = self._price_cells(cell_columns)
+        self.cell_outputs = {name: np.concatenate([self.cell_outputs[name], priced[name]]) for name in CELL_OUTPUTS}
+
+        # Policy rows
+        start = len(self)
+        rows = slice(start, start + n)
+        self.policy_cell = np.concatenate([self.policy_cell, cell_of_key[inverse[known:]]])
+        for name in PAYOUT_PLACEHOLDERS:
+            self.policy_inputs[name] = np.concatenate([self.policy_inputs[name], np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))])
+        for name in self.policy_parameters:
+            self.policy_parameters[name] = np.concatenate([self.policy_parameters[name], np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))])
+        self.outputs = {name: np.concatenate([values, np.empty(n)]) for name, values in self.outputs.items()}
+        self._price_policies(rows)
+        self.cube.add(self.cube_cells(rows), *(self.outputs[name][rows] for name in ("p_monthly", "e_loss", "l_payout")))
+        return rows
+
+    def _price_cells(self, cell_columns: dict) -> dict:
+        """
+        CELL_OUTPUTS for cells given their key inputs, one float64 entry per cell.
+        """
+        cells = len(cell_columns[CATEGORICAL_COLUMNS[0]])
+        if not cells:
+            return {name: np.zeros(0) for name in CELL_OUTPUTS}
+        priced = price_policies({**cell_columns, **PAYOUT_PLACEHOLDERS}, tables=self.tables, **self.weights, **self.parameters)
+        return {name: np.broadcast_to(np.asarray(priced[name], dtype=np.float64), (cells,)).copy() for name in CELL_OUTPUTS}
+
+    def _price_policies(self, rows):
+        # The same operations price_policies applies after P_claim
+        premium_parameters = resolve_parameters({name: values[rows] for name, values in self.policy_parameters.items()}, **self.parameters)
+        l_payout = calculate_total_payout_batch(*(self.policy_inputs[name][rows] for name in PAYOUT_PLACEHOLDERS))
+        e_loss = self.cell_outputs["p_claim"][self.policy_cell[rows]] * l_payout
+        self.outputs["l_payout"][rows] = l_payout
+        self.outputs["e_loss"][rows] = e_loss
+        self.outputs["p_monthly"][rows] = calculate_final_monthly_premium_batch(e_loss, premium_parameters["lambda_factor"], premium_parameters["p_min"])
+
+    def cube_cells(self, rows=slice(None)) -> np.ndarray:
+        """
+        Flat PortfolioCube cell of each policy in `rows`.
+        """
+        codes = [self.cell_inputs[name].astype(np.int64) for name in CUBE_DIMENSIONS]
+        cells = np.ravel_multi_index(codes, self.cube.shape) if self.cells else np.zeros(0, dtype=np.int64)
+        return cells[self.policy_cell[rows]]
+
+    def reprice(self, **parameters):
+        """
+        Changes book-wide parameters (or model weights) and reprices every
+        cell, policy and the cube. Per-policy parameter columns still win.
+        """
+        for name, value in parameters.items():
+            if name in MODEL_WEIGHT_DEFAULTS:
+                self.weights[name] = value
+            elif name in PARAMETER_DEFAULTS:
+                self.parameters[name] = value
+            else:
+                raise KeyError(f"Unknown parameter {name!r}")
+        self.cell_outputs = self._price_cells(self.cell_inputs)
+        self._price_policies(slice(None))
+        self.cube = PortfolioCube(self.tables)
+        self.cube.add(self.cube_cells(), self.outputs["p_monthly"], self.outputs["e_loss"], self.outputs["l_payout"])
+
+    def policy_outputs(self, rows=slice(None)) -> dict:
+        """
+        Every OUTPUT_COLUMNS value for the policies in `rows`, as price_policies
+        would return them.
+        """
+        cells = self.policy_cell[rows]
+        per_cell = {name: values[cells] for name, values in self.cell_outputs.items()}
+        return {name: per_cell[name] if name in per_cell else self.outputs[name][rows] for name in OUTPUT_COLUMNS}
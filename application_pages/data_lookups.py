@@ -1,6 +1,3 @@
-
-import pandas as pd
-
 # Data for Human Capital Factor (F_HC)
 # These are illustrative multipliers. Actual values would be derived from statistical analysis.
 ROLE_MULTIPLIERS = {
@@ -75,3 +72,31 @@ W_INNO_DEFAULT = 0.5
 # Default gamma parameters for Upskilling Factor (F_US)
 GAMMA_GEN_DEFAULT = 0.6 # portable skills are more rewarded
 GAMMA_SPEC_DEFAULT = 0.4 # firm-specific skills are less rewarded
+
+# Default policy and environment parameters (mirror the app's sidebar defaults)
+BETA_SYSTEMIC_DEFAULT = 0.10
+BETA_INDIVIDUAL_DEFAULT = 0.50
+LAMBDA_FACTOR_DEFAULT = 1.5
+P_MIN_DEFAULT = 20.0
+M_ECON_DEFAULT = 1.0
+I_AI_DEFAULT = 1.0
+TTV_PERIOD_DEFAULT = 12 # Time-to-Value period for career transitions, in months
+
+# Valid ranges for policy inputs (mirror the app's sidebar bounds); bulk pricing
+# rejects rows outside them instead of extrapolating the model.
+POLICY_INPUT_RANGES = {
+    "years_experience": (0, 30),
+    "general_upskilling_progress": (0, 100),
+    "firm_specific_upskilling_progress": (0, 100),
+    "annual_salary": (10000.0, 500000.0),
+    "coverage_percentage": (10, 75),
+    "coverage_duration_months": (1, 12),
+    "months_elapsed_transition": (0, 24),
+    "beta_systemic": (0.01, 1.0),
+    "beta_individual": (0.01, 1.0),
+    "lambda_factor": (1.0, 3.0),
+    "p_min": (0.0, 100.0),
+    "economic_climate_modifier": (0.5, 1.5),
+    "ai_innovation_index": (0.5, 1.5),
+    "ttv_period": (1, 60),
+}
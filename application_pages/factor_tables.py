@@ -0,0 +1,161 @@
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+
+from application_pages.data_lookups import (
+    ROLE_MULTIPLIERS, EDUCATION_LEVEL_FACTORS, EDUCATION_FIELD_FACTORS,
+    SCHOOL_TIER_FACTORS, COMPANY_RISK_FACTORS, INDUSTRY_HAZARDS
+)
+
+# Compiled, array-backed form of the lookup tables in data_lookups.py.
+# Every category gets a stable integer code (its position in the table's
+# insertion order) and every table becomes a contiguous float64 array with
+# one extra trailing slot holding the fallback value for unknown labels.
+# Code len(categories) therefore always means "unknown".
+
+# Table name -> (source dict, fallback for unknown keys)
+FACTOR_TABLE_SOURCES = {
+    "role": (ROLE_MULTIPLIERS, 1.0),
+    "education_level": (EDUCATION_LEVEL_FACTORS, 1.0),
+    "education_field": (EDUCATION_FIELD_FACTORS, 1.0),
+    "school_tier": (SCHOOL_TIER_FACTORS, 1.0),
+    "company": (COMPANY_RISK_FACTORS, 1.0),
+    "industry_hazard": (INDUSTRY_HAZARDS, 50), # Default to 50 if not found
+}
+
+# Policy column -> compiled table it is coded against
+COLUMN_TABLES = {
+    "job_role": "role",
+    "education_level": "education_level",
+    "education_field": "education_field",
+    "school_tier": "school_tier",
+    "company_type": "company",
+    "current_industry": "industry_hazard",
+    "target_industry": "industry_hazard",
+}
+
+# f_exp saturates at 20 years, so integer experience 0..20 covers every value
+EXPERIENCE_YEARS_MAX = 20
+
+@dataclass(frozen=True)
+class CompiledFactorTables:
+    """
+    Integer-coded factor tables plus the precomputed F_HC cube.
+    categories[name] lists the labels of table `name` in code order and
+    factors[name] holds their values followed by the unknown-key fallback.
+    f_hc_cube[role, level, field, tier, years] = F_HC for integer years 0..20.
+    """
+    categories: dict
+    factors: dict
+    f_hc_cube: np.ndarray
+
+    def unknown_code(self, name: str) -> int:
+        return len(self.categories[name])
+
+def build_experience_factors() -> np.ndarray:
+    """
+    f_exp for integer years 0..EXPERIENCE_YEARS_MAX.
+    f_exp = 1 - (0.015 * min(Yrs, 20))
+    """
+    years = np.arange(EXPERIENCE_YEARS_MAX + 1, dtype=np.float64)
+    return 1 - (0.015 * np.minimum(years, 20.0))
+
+def build_human_capital_cube(factors: dict) -> np.ndarray:
+    """
+    Precomputes F_HC = f_role * f_level * f_field * f_school * f_exp over every
+    role x level x field x tier x experience-year combination (unknown slots
+    included), multiplying in the same order as calculate_human_capital_factor.
+    """
+    return (
+        factors["role"][:, None, None, None, None]
+        * factors["education_level"][None, :, None, None, None]
+        * factors["education_field"][None, None, :, None, None]
+        * factors["school_tier"][None, None, None, :, None]
+        * build_experience_factors()[None, None, None, None, :]
+    )
+
+def compile_factor_tables(overrides: dict | None = None) -> CompiledFactorTables:
+    """
+    Compiles the data_lookups tables into a CompiledFactorTables.
+    `overrides` maps a table name to a replacement dict; any new keys are
+    appended after the existing ones so existing codes stay stable.
+    """
+    overrides = overrides or {}
+    categories, factors = {}, {}
+    for name, (source, fallback) in FACTOR_TABLE_SOURCES.items():
+        table = dict(source)
+        table.update(overrides.get(name, {}))
+        labels = tuple(table)
+        categories[name] = labels
+        factors[name] = np.array([table[label] for label in labels] + [fallback], dtype=np.float64)
+    return CompiledFactorTables(categories, factors, build_human_capital_cube(factors))
+
+@lru_cache(maxsize=1)
+def default_factor_tables() -> CompiledFactorTables:
+    """
+    The compiled form of the stock data_lookups tables, built once per process.
+    """
+    return compile_factor_tables()
+
+def encode_categories(values, categories: tuple, name: str = "category") -> np.ndarray:
+    """
+    Maps category labels to their integer codes; unknown labels (and missing
+    values) get len(categories). Integer input is taken to be codes already
+    and must lie in 0..len(categories), else ValueError is raised.
+    """
+    values = np.atleast_1d(np.asarray(values))
+    if values.dtype.kind in "iu":
+        # Out-of-range codes would wrap onto real categories or fail deep in a gather
+        if values.size and (values.min() < 0 or values.max() > len(categories)):
+            raise ValueError(
+                f"{name} codes must be in 0..{len(categories)} ({len(categories)} meaning unknown), "
+                f"got values from {values.min()} to {values.max()}"
+            )
+        return values
+    positions = {label: code for code, label in enumerate(categories)}
+    unknown = len(categories)
+    pd = sys.modules.get("pandas")
+    if pd is None:
+        # Pandas is never imported just for this: one dict lookup per label
+        labels = values.ravel().tolist()
+        return np.fromiter(map(positions.get, labels, repeat(unknown)), dtype=np.int16, count=len(labels)).reshape(values.shape)
+    # Labels from a DataFrame: pandas is loaded, and its hash factorize is faster
+    codes, uniques = pd.factorize(values.astype(object, copy=False).ravel())
+    lookup = np.array([positions.get(label, unknown) for label in uniques] + [unknown], dtype=np.int16)
+    return lookup[codes].reshape(values.shape)
+
+def encode_column(tables: CompiledFactorTables, column: str, values) -> np.ndarray:
+    """
+    Encodes a categorical policy column against the table it is scored with.
+    """
+    return encode_categories(values, tables.categories[COLUMN_TABLES[column]], column)
+
+def human_capital_factor_from_codes(
+    tables: CompiledFactorTables,
+    role_codes,
+    level_codes,
+    field_codes,
+    tier_codes,
+    years_experience
+) -> np.ndarray:
+    """
+    F_HC as a single gather from the precomputed cube. Rows whose experience is
+    not a non-negative whole number fall back to the explicit product.
+    """
+    years = np.asarray(years_experience, dtype=np.float64)
+    on_grid = (years >= 0) & (years == np.floor(years))
+    year_index = np.where(on_grid, np.minimum(years, EXPERIENCE_YEARS_MAX), 0).astype(np.intp)
+    f_hc = tables.f_hc_cube[role_codes, level_codes, field_codes, tier_codes, year_index]
+    if not np.all(on_grid):
+        f_exp = 1 - (0.015 * np.minimum(years, 20.0))
+        f_hc = np.where(
+            on_grid,
+            f_hc,
+            tables.factors["role"][role_codes] * tables.factors["education_level"][level_codes]
+            * tables.factors["education_field"][field_codes] * tables.factors["school_tier"][tier_codes]
+            * f_exp,
+        )
+    return f_hc
@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+# Opt-in timing of pipeline stages and app render sections.
+#
+#   with instrumentation.stage("price_policies.human_capital", rows=n):
+#       ...
+#
+# While disabled, stage() returns a shared no-op context manager, so an
+# instrumented block costs one flag check. Enable with enable() or by setting
+# AIQ_INSTRUMENTATION=1 before start-up; with AIQ_INSTRUMENTATION_SNAPSHOT=path
+# a JSON snapshot is also written at exit. Each stage records call count,
+# cumulative time, rows processed and a window of recent latencies for
+# percentiles, exported by snapshot() (JSON) and prometheus_text().
+#
+# SamplingProfiler is a stdlib stack sampler that tags every sample with the
+# stages active on the sampled thread, producing collapsed stacks for
+# flame-graph tools.
+
+ENABLE_ENV = "AIQ_INSTRUMENTATION"
+SNAPSHOT_ENV = "AIQ_INSTRUMENTATION_SNAPSHOT"
+LATENCY_WINDOW = 2048 # recent calls kept per stage for percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+PROFILER_INTERVAL_DEFAULT = 0.005
+METRIC_PREFIX = "aiq_stage"
+
+_NULL_STAGE = nullcontext()
+_enabled = False
+_lock = threading.Lock()
+_metrics = {}
+_active_stages = {} # thread id -> names of the stages open on that thread
+
+class StageMetrics:
+    """
+    Accumulated timings of one stage.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.recent = np.zeros(LATENCY_WINDOW)
+
+    def record(self, seconds: float, rows: int):
+        self.recent[self.count % LATENCY_WINDOW] = seconds
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+
+    def quantiles(self) -> dict:
+        recent = self.recent[:min(self.count, LATENCY_WINDOW)]
+        return dict(zip(QUANTILES, np.quantile(recent, QUANTILES).tolist())) if recent.size else {q: 0.0 for q in QUANTILES}
+
+class _StageTimer:
+    __slots__ = ("name", "rows", "start", "stack")
+
+    def __init__(self, name: str, rows: int):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.stack = _active_stages.setdefault(threading.get_ident(), [])
+        self.stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.stack.pop()
+        if not self.stack: # thread ids are reused, so drop the entry rather than keep one per thread ever seen
+            _active_stages.pop(threading.get_ident(), None)
+        with _lock:
+            metrics = _metrics.get(self.name)
+            if metrics is None:
+                metrics = _metrics[self.name] = StageMetrics()
+            metrics.record(elapsed, self.rows)
+        return False
+
+# --- Switches ---
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """
+    Drops every recorded metric.
+    """
+    with _lock:
+        _metrics.clear()
+
+def stage(name: str, rows: int = 1):
+    """
+    Context manager timing one execution of stage `name` over `rows` rows;
+    a shared no-op while instrumentation is disabled.
+    """
+    return _StageTimer(name, rows) if _enabled else _NULL_STAGE
+
+# --- Export ---
+
+def snapshot() -> dict:
+    """
+    {stage: {"count", "total_seconds", "mean_ms", "p50_ms", "p95_ms",
+    "p99_ms", "max_ms", "rows", "rows_per_s"}} for every recorded stage.
+    """
+    with _lock:
+        items = [(name, metrics.count, metrics.seconds, metrics.max_seconds, metrics.rows, metrics.quantiles()) for name, metrics in _metrics.items()]
+    result = {}
+    for name, count, seconds, max_seconds, rows, quantiles in sorted(items):
+        result[name] = {
+            "count": count,
+            "total_seconds": seconds,
+            "mean_ms": seconds / count * 1000.0,
+            **{f"p{round(q * 100)}_ms": value * 1000.0 for q, value in quantiles.items()},
+            "max_ms": max_seconds * 1000.0,
+            "rows": rows,
+            "rows_per_s": rows / seconds if seconds else 0.0,
+        }
+    return result
+
+def write_snapshot(path: str):
+    with open(path, "w") as handle:
+        json.dump(snapshot(), handle, indent=2)
+
+def prometheus_text() -> str:
+    """
+    The metrics in the Prometheus text exposition format: a latency summary
+    (quantiles, _sum, _count) and a rows counter per stage.
+    """
+    with _lock:
+        items = sorted((name, metrics.count, metrics.seconds, metrics.rows, metrics.quantiles()) for name, metrics in _metrics.items())
+    lines = [
+        f"# HELP {METRIC_PREFIX}_latency_seconds Wall time per stage execution.",
+        f"# TYPE {METRIC_PREFIX}_latency_seconds summary",
+    ]
+    for name, count, seconds, _, quantiles in items:
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.extend(f'{METRIC_PREFIX}_latency_seconds{{stage="{label}",quantile="{q}"}} {value!r}' for q, value in quantiles.items())
+        lines.append(f'{METRIC_PREFIX}_latency_seconds_sum{{stage="{label}"}} {seconds!r}')
+        lines.append(f'{METRIC_PREFIX}_latency_seconds_count{{stage="{label}"}} {count}')
+    lines.extend([
+        f"# HELP {METRIC_PREFIX}_rows_total Policies processed per stage.",
+        f"# TYPE {METRIC_PREFIX}_rows_total counter",
+    ])
+    for name, _, _, rows, _ in items:
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'{METRIC_PREFIX}_rows_total{{stage="{label}"}} {rows}')
+    return "\n".join(lines) + "\n"
+
+# --- Sampling profiler ---
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all other threads every `interval` seconds
+    from a background thread. Each sample is keyed by the instrumented stages
+    open on the sampled thread followed by its call stack, so collapsed() can
+    be fed straight to flamegraph.pl or speedscope. Works whether or not
+    instrumentation is enabled (without it, samples carry no stage names).
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL_DEFAULT):
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="aiq-sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread, frame in sys._current_frames().items():
+                if thread == own:
+                    continue
+                calls = []
+                while frame is not None:
+                    calls.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                key = ";".join([f"[{name}]" for name in _active_stages.get(thread, ())] + calls[::-1])
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def collapsed(self) -> str:
+        """
+        One "frame;frame;... count" line per distinct stack, most sampled first.
+        """
+        return "\n".join(f"{key} {count}" for key, count in sorted(self.samples.items(), key=lambda item: -item[1])) + "\n"
+
+# --- Environment switch ---
+
+if os.environ.get(ENABLE_ENV, "").strip().lower() in ("1", "true", "yes", "on"):
+    enable()
+    if os.environ.get(SNAPSHOT_ENV):
+        atexit.register(write_snapshot, os.environ[SNAPSHOT_ENV])
@@ -0,0 +1,223 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, OUTPUT_COLUMNS,
+    require_policy_columns, price_policies
+)
+from application_pages.factor_tables import (
+    CompiledFactorTables, default_factor_tables, encode_column
+)
+
+# Multi-core bulk pricing. The compiled factor tables are published once into a
+# shared-memory block that every worker maps at start-up; each call then copies
+# the encoded policy columns into a shared input block, workers price disjoint
+# row ranges and write straight into a shared output block. Nothing but block
+# names and row bounds is pickled per task, and since every row is priced
+# independently the output is identical for any worker count. submit() returns
+# before the workers finish, so a caller can parse its next chunk meanwhile.
+
+ROWS_PER_TASK_MIN = 65_536
+TASKS_PER_WORKER = 4
+
+# --- Shared-memory blocks ---
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing block. The creating process owns (and unlinks)
+    every block; workers share its resource tracker, so attaching on Python
+    < 3.13 (no `track` argument) only re-registers a name it already tracks.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _pack(arrays: dict) -> tuple:
+    """
+    Copies a dict of 1-D arrays into one new shared-memory block.
+    Returns (block, layout) where layout lists (name, dtype, offset, length).
+    """
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        layout.append((name, array.dtype.str, offset, array.size))
+        offset += -(-array.nbytes // 8) * 8 # keep every column 8-byte aligned
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+    for (name, dtype, start, length), array in zip(layout, arrays.values()):
+        np.ndarray(length, dtype=dtype, buffer=block.buf, offset=start)[:] = array.ravel()
+    return block, layout
+
+def _views(block: shared_memory.SharedMemory, layout: list, shapes: dict | None = None) -> dict:
+    """
+    NumPy views onto the columns of a block packed by _pack.
+    """
+    shapes = shapes or {}
+    return {
+        name: np.ndarray(shapes.get(name, (length,)), dtype=dtype, buffer=block.buf, offset=start)
+        for name, dtype, start, length in layout
+    }
+
+def _release(block: shared_memory.SharedMemory):
+    block.close()
+    block.unlink()
+
+# --- Worker side ---
+
+_worker = {}
+
+def _init_worker(tables_name: str, tables_layout: list, categories: dict, cube_shape: tuple, parameters: dict):
+    block = _attach(tables_name)
+    arrays = _views(block, tables_layout, {"f_hc_cube": cube_shape})
+    cube = arrays.pop("f_hc_cube")
+    _worker["tables_block"] = block
+    _worker["tables"] = CompiledFactorTables(categories, arrays, cube)
+    _worker["parameters"] = parameters
+
+def _price_range(input_name: str, input_layout: list, output_name: str, output_layout: list, start: int, stop: int) -> int:
+    input_block, output_block = _attach(input_name), _attach(output_name)
+    try:
+        columns = {name: values[start:stop] for name, values in _views(input_block, input_layout).items()}
+        results = price_policies(columns, tables=_worker["tables"], **_worker["parameters"])
+        outputs = _views(output_block, output_layout)
+        for name in OUTPUT_COLUMNS:
+            outputs[name][start:stop] = results[name]
+        del columns, outputs
+    finally:
+        input_block.close()
+        output_block.close()
+    return stop - start
+
+# --- Parent side ---
+
+def encode_policies(policies, tables: CompiledFactorTables) -> dict:
+    """
+    Encodes a policy book into flat NumPy columns: int16 category codes and
+    float64 numerics (including any per-policy parameter columns).
+    """
+    columns = require_policy_columns(policies)
+    n = max(np.size(columns[name]) for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+    encoded = {}
+    for name in CATEGORICAL_COLUMNS:
+        encoded[name] = np.broadcast_to(encode_column(tables, name, columns[name]).astype(np.int16), (n,))
+    for name in NUMERIC_COLUMNS + tuple(p for p in PARAMETER_DEFAULTS if p in columns):
+        encoded[name] = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))
+    return encoded
+
+def row_ranges(n: int, workers: int) -> list:
+    """
+    Splits n rows into contiguous [start, stop) ranges: at least one per
+    worker, so none sits idle, and up to TASKS_PER_WORKER per worker so
+    stragglers even out, as long as ranges stay above ROWS_PER_TASK_MIN.
+    """
+    tasks = max(min(workers, n), min(workers * TASKS_PER_WORKER, -(-n // ROWS_PER_TASK_MIN)), 1)
+    bounds = np.linspace(0, n, tasks + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+class PricingJob:
+    """
+    A book being priced across a ParallelPricer's pool. result() waits for
+    it and frees its shared-memory blocks.
+    """
+
+    def __init__(self, pricer: "ParallelPricer", input_block, output_block, output_layout: list, futures: list):
+        self.pricer = pricer
+        self.input_block = input_block
+        self.output_block = output_block
+        self.output_layout = output_layout
+        self.futures = futures
+
+    def result(self) -> dict:
+        """
+        The OUTPUT_COLUMNS arrays in input row order.
+        """
+        try:
+            for future in self.futures:
+                future.result()
+            return {name: values.copy() for name, values in _views(self.output_block, self.output_layout).items()}
+        finally:
+            self.release()
+
+    def release(self):
+        if self in self.pricer._jobs:
+            self.pricer._jobs.remove(self)
+            _release(self.input_block)
+            _release(self.output_block)
+
+class ParallelPricer:
+    """
+    A process pool that prices policy books with the batch pipeline.
+    Keyword arguments are passed through to price_policies in every worker.
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, workers: int | None = None, tables: CompiledFactorTables | None = None, **parameters):
+        self.workers = workers or os.cpu_count() or 1
+        self.tables = tables or default_factor_tables()
+        self.parameters = parameters
+        self._jobs = []
+        self._tables_block, tables_layout = _pack(dict(self.tables.factors, f_hc_cube=self.tables.f_hc_cube))
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(
+                self._tables_block.name, tables_layout, self.tables.categories,
+                self.tables.f_hc_cube.shape, parameters,
+            ),
+        )
+
+    def submit(self, policies) -> PricingJob:
+        """
+        Starts pricing `policies` (as accepted by price_policies) across the
+        pool and returns at once, so the caller can prepare the next book
+        while this one is priced.
+        """
+        encoded = encode_policies(policies, self.tables)
+        n = len(next(iter(encoded.values())))
+        input_block, input_layout = _pack(encoded)
+        output_block, output_layout = _pack({name: np.zeros(n) for name in OUTPUT_COLUMNS})
+        job = PricingJob(self, input_block, output_block, output_layout, [])
+        self._jobs.append(job)
+        try:
+            for start, stop in row_ranges(n, self.workers):
+                job.futures.append(self._pool.submit(
+                    _price_range, input_block.name, input_layout,
+                    output_block.name, output_layout, start, stop,
+                ))
+        except BaseException:
+            job.release()
+            raise
+        return job
+
+    def price(self, policies) -> dict:
+        """
+        Prices `policies` (as accepted by price_policies) across the pool.
+        Returns the OUTPUT_COLUMNS arrays in input row order.
+        """
+        return self.submit(policies).result()
+
+    def close(self):
+        """
+        Shuts the pool down, then frees the tables and the blocks of any job
+        whose result was never collected.
+        """
+        self._pool.shutdown()
+        for job in list(self._jobs):
+            job.release()
+        _release(self._tables_block)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def price_policies_parallel(policies, workers: int | None = None, **parameters) -> dict:
+    """
+    One-shot multi-core price_policies. For repeated calls keep a
+    ParallelPricer open instead, so the pool and shared tables are reused.
+    """
+    with ParallelPricer(workers, **parameters) as pricer:
+        return pricer.price(policies)
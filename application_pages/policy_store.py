@@ -0,0 +1,326 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS,
+    require_policy_columns, price_policies
+)
+from application_pages.factor_tables import (
+    COLUMN_TABLES, CompiledFactorTables, default_factor_tables, encode_categories
+)
+
+# Columnar on-disk policy book. A store is a directory holding one raw
+# little-endian file per column plus meta.json (row count and, for each
+# categorical column, the labels its codes refer to). Columns are opened with
+# np.memmap, so opening a store reads only meta.json and pricing scans the
+# mapped pages without copying them; the premium column is updated in place.
+#
+# Categories are stored as int16 codes of the data_lookups tables and the
+# slider inputs as int16 whole numbers, with salary as float32: 38 bytes per
+# policy, so a 10M-policy book takes 380 MB.
+#
+#   python -m application_pages.policy_store import policies.csv book.aiq
+#   python -m application_pages.policy_store price book.aiq --p-min 25
+
+STORE_FORMAT = "aiq-policy-store"
+STORE_VERSION = 1
+META_FILE = "meta.json"
+PREMIUM_COLUMN = "p_monthly"
+CHUNK_SIZE_DEFAULT = 1_000_000
+
+# Column -> on-disk dtype
+STORE_SCHEMA = {
+    **{name: "<i2" for name in CATEGORICAL_COLUMNS},
+    "years_experience": "<i2",
+    "general_upskilling_progress": "<i2",
+    "firm_specific_upskilling_progress": "<i2",
+    "annual_salary": "<f4",
+    "coverage_percentage": "<i2",
+    "coverage_duration_months": "<i2",
+    "months_elapsed_transition": "<i2",
+    PREMIUM_COLUMN: "<f8", # NaN until priced
+}
+INT16_RANGE = (np.iinfo(np.int16).min, np.iinfo(np.int16).max)
+
+def unstorable_rows(name: str, values) -> np.ndarray:
+    """
+    Mask of the values of numeric column `name` that its int16 storage cannot
+    hold exactly (fractional, missing or out of range). float32 columns accept
+    every value, rounded to the nearest float32.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if STORE_SCHEMA[name] != "<i2":
+        return np.zeros(values.shape, dtype=bool)
+    low, high = INT16_RANGE
+    with np.errstate(invalid="ignore"):
+        return ~((values >= low) & (values <= high) & (values == np.floor(values)))
+
+class PolicyStore:
+    """
+    A memory-mapped policy book. Open an existing store with PolicyStore(path),
+    or PolicyStore(path, writable=True) to append rows and update premiums;
+    create a new one with PolicyStore.create(path).
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        with open(os.path.join(path, META_FILE)) as handle:
+            self.meta = json.load(handle)
+        if self.meta.get("format") != STORE_FORMAT or self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"{path!r} is not a version {STORE_VERSION} policy store")
+        self.categories = {name: tuple(labels) for name, labels in self.meta["categories"].items()}
+        self._map()
+
+    @classmethod
+    def create(cls, path: str, tables: CompiledFactorTables | None = None) -> "PolicyStore":
+        """
+        Creates an empty, writable store whose codes follow `tables`
+        (default_factor_tables() unless given).
+        """
+        tables = tables or default_factor_tables()
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise FileExistsError(f"A policy store already exists at {path!r}")
+        for name in STORE_SCHEMA:
+            open(cls._column_path(path, name), "wb").close()
+        meta = {
+            "format": STORE_FORMAT,
+            "version": STORE_VERSION,
+            "rows": 0,
+            "schema": STORE_SCHEMA,
+            "categories": {name: list(tables.categories[COLUMN_TABLES[name]]) for name in CATEGORICAL_COLUMNS},
+        }
+        cls._write_meta(path, meta)
+        return cls(path, writable=True)
+
+    @staticmethod
+    def _column_path(path: str, name: str) -> str:
+        return os.path.join(path, f"{name}.bin")
+
+    @staticmethod
+    def _write_meta(path: str, meta: dict):
+        # Written to a temporary file and renamed, so readers never see a partial file
+        temporary = os.path.join(path, META_FILE + ".tmp")
+        with open(temporary, "w") as handle:
+            json.dump(meta, handle, indent=2)
+        os.replace(temporary, os.path.join(path, META_FILE))
+
+    def _map(self):
+        rows = self.meta["rows"]
+        self.columns = {}
+        for name, dtype in STORE_SCHEMA.items():
+            mode = "r+" if self.writable and name == PREMIUM_COLUMN else "r"
+            # np.memmap cannot map an empty file
+            self.columns[name] = np.memmap(self._column_path(self.path, name), dtype=dtype, mode=mode, shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    @property
+    def premiums(self) -> np.ndarray:
+        """
+        The memory-mapped premium column (writable if the store is).
+        """
+        return self.columns[PREMIUM_COLUMN]
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def policies(self, start: int = 0, stop: int | None = None) -> dict:
+        """
+        Rows start..stop as a dict of memory-mapped column views (no copies),
+        with categories as codes of self.categories.
+        """
+        return {name: self.columns[name][start:stop] for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS}
+
+    # --- Writing ---
+
+    def append(self, policies) -> slice:
+        """
+        Appends a DataFrame or mapping of policy columns (category labels or
+        codes) and returns the slice of the new rows, whose premiums are NaN
+        until priced. Raises ValueError, before anything is written, if a code
+        is outside the store's categories or an int16 column gets a value it
+        cannot hold exactly.
+        """
+        self._require_writable()
+        columns = require_policy_columns(policies)
+        n = max(np.size(columns[name]) for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+        stored = {}
+        for name in CATEGORICAL_COLUMNS:
+            # Codes are range-checked against the store's categories, so int16 holds them
+            stored[name] = np.broadcast_to(encode_categories(columns[name], self.categories[name], name), (n,))
+        for name in NUMERIC_COLUMNS:
+            values = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))
+            if unstorable_rows(name, values).any():
+                raise ValueError(f"{name} must hold whole numbers in the int16 range to be stored")
+            stored[name] = values
+        stored[PREMIUM_COLUMN] = np.full(n, np.nan)
+
+        start = len(self)
+        for name, dtype in STORE_SCHEMA.items():
+            itemsize = np.dtype(dtype).itemsize
+            with open(self._column_path(self.path, name), "r+b") as handle:
+                handle.truncate(start * itemsize) # drops any tail of an interrupted append
+                handle.seek(0, os.SEEK_END)
+                np.ascontiguousarray(stored[name], dtype=dtype).tofile(handle)
+        self.meta["rows"] = start + n
+        self._write_meta(self.path, self.meta)
+        self._map()
+        return slice(start, start + n)
+
+    def update_premiums(self, rows, values):
+        """
+        Overwrites the premiums of `rows` (an index, slice or mask) in place.
+        """
+        self._require_writable()
+        self.premiums[rows] = values
+        self.flush()
+
+    def flush(self):
+        if isinstance(self.premiums, np.memmap):
+            self.premiums.flush()
+
+    def _require_writable(self):
+        if not self.writable:
+            raise PermissionError(f"Policy store {self.path!r} was opened read-only")
+
+    # --- Pricing ---
+
+    def recode_lookups(self, tables: CompiledFactorTables) -> dict:
+        """
+        column -> array mapping stored codes to codes of `tables`, for the
+        columns whose categories differ from the tables (empty when the store
+        was written with the same tables).
+        """
+        lookups = {}
+        for name in CATEGORICAL_COLUMNS:
+            categories = tables.categories[COLUMN_TABLES[name]]
+            if self.categories[name] != categories:
+                labels = np.array(self.categories[name] + (None,), dtype=object) # stored unknown stays unknown
+                lookups[name] = encode_categories(labels, categories)
+        return lookups
+
+    def price(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+        chunk_size: int = CHUNK_SIZE_DEFAULT,
+        tables: CompiledFactorTables | None = None,
+        **parameters
+    ) -> dict:
+        """
+        Prices rows start..stop chunk by chunk and writes their premiums in
+        place. Keyword parameters are passed to price_policies.
+        Returns the rows priced, elapsed seconds and throughput.
+        """
+        self._require_writable()
+        tables = tables or default_factor_tables()
+        lookups = self.recode_lookups(tables)
+        stop = len(self) if stop is None else min(stop, len(self))
+        begin = time.perf_counter()
+        for low in range(start, stop, chunk_size):
+            high = min(low + chunk_size, stop)
+            columns = self.policies(low, high)
+            for name, lookup in lookups.items():
+                columns[name] = lookup[columns[name]]
+            self.premiums[low:high] = price_policies(columns, tables=tables, **parameters)["p_monthly"]
+        self.flush()
+        elapsed = time.perf_counter() - begin
+        rows = max(stop - start, 0)
+        return {"rows_priced": rows, "elapsed_seconds": elapsed, "rows_per_second": rows / elapsed if elapsed > 0 else float("inf")}
+
+# --- Command line ---
+
+def import_file(input_path: str, path: str, chunk_size: int = CHUNK_SIZE_DEFAULT, rejects_path: str | None = None) -> dict:
+    """
+    Appends a CSV/Parquet policy file to the store at `path` (created if
+    needed). Rows bulk pricing would reject, or that int16 columns cannot hold,
+    are written to `rejects_path` (or dropped if it is None). Raises
+    ValueError, before the store is touched, if the file has per-policy
+    parameter columns, which the store format cannot hold.
+    """
+    from application_pages.bulk_pricing import (
+        REJECT_REASON_COLUMN, ChunkWriter, find_rejects, iter_policy_chunks, policy_file_columns, rejects_schema
+    )
+
+    input_columns = policy_file_columns(input_path)
+    parameter_columns = [name for name in PARAMETER_DEFAULTS if name in input_columns]
+    if parameter_columns:
+        raise ValueError(
+            f"Policy stores cannot hold per-policy parameter columns ({', '.join(parameter_columns)}); "
+            "drop them and pass book-wide values to the price command instead"
+        )
+    store = PolicyStore(path, writable=True) if os.path.exists(os.path.join(path, META_FILE)) else PolicyStore.create(path)
+    summary = {"rows_read": 0, "rows_stored": 0, "rows_rejected": 0}
+    rejects_writer = ChunkWriter(rejects_path, rejects_schema(input_columns)) if rejects_path else None
+    try:
+        for chunk in iter_policy_chunks(input_path, chunk_size):
+            chunk = chunk.reset_index(drop=True)
+            columns, reasons = find_rejects(chunk)
+            for name in NUMERIC_COLUMNS:
+                mask = unstorable_rows(name, columns[name]) & (reasons == "")
+                reasons[mask] = f"{name} is not a whole number"
+            valid = reasons == ""
+            if valid.any():
+                store.append({name: columns[name][valid] for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS})
+            if rejects_writer is not None and not valid.all():
+                rejects_writer.write(chunk[~valid].astype(str).assign(**{REJECT_REASON_COLUMN: reasons[~valid]}))
+            summary["rows_read"] += len(chunk)
+            summary["rows_stored"] += int(valid.sum())
+            summary["rows_rejected"] += int((~valid).sum())
+    finally:
+        if rejects_writer is not None:
+            rejects_writer.close()
+    return summary
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m application_pages.policy_store",
+        description="Build, price and inspect memory-mapped policy stores.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="Append a CSV/Parquet policy file to a store")
+    load.add_argument("input", help="Policy file (.csv or .parquet)")
+    load.add_argument("store", help="Store directory (created if missing)")
+    load.add_argument("--rejects", help="File for rows that cannot be stored")
+    load.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_DEFAULT)
+    price = commands.add_parser("price", help="Price every policy and store the premiums in place")
+    price.add_argument("store")
+    price.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_DEFAULT)
+    for name, default in PARAMETER_DEFAULTS.items():
+        price.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=default, help=f"(default: {default})")
+    info = commands.add_parser("info", help="Show row count, size and premium summary")
+    info.add_argument("store")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "import":
+        try:
+            summary = import_file(args.input, args.store, args.chunk_size, args.rejects)
+        except ValueError as error:
+            print(f"error: {error}", file=sys.stderr)
+            return 2
+        print(f"Stored {summary['rows_stored']:,} of {summary['rows_read']:,} rows ({summary['rows_rejected']:,} rejected)")
+    elif args.command == "price":
+        parameters = {name: getattr(args, name) for name in PARAMETER_DEFAULTS}
+        summary = PolicyStore(args.store, writable=True).price(chunk_size=args.chunk_size, **parameters)
+        print(f"Priced {summary['rows_priced']:,} rows in {summary['elapsed_seconds']:.2f}s: {summary['rows_per_second']:,.0f} rows/s")
+    else:
+        store = PolicyStore(args.store)
+        premiums = store.premiums
+        priced = int(np.count_nonzero(~np.isnan(premiums)))
+        print(f"{len(store):,} policies, {store.nbytes() / 1e6:,.1f} MB, {priced:,} priced")
+        if priced:
+            print(f"premium mean ${np.nanmean(premiums):,.2f}, min ${np.nanmin(premiums):,.2f}, max ${np.nanmax(premiums):,.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import numpy as np
+
+from application_pages.batch_calculations import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, price_policies
+from application_pages.cohorts import CUBE_DIMENSIONS, UNKNOWN_LABEL, PortfolioCube
+from application_pages.factor_tables import CompiledFactorTables, default_factor_tables
+from application_pages.policy_store import CHUNK_SIZE_DEFAULT, PolicyStore
+from application_pages.trajectory import TRAJECTORY_MONTHS_DEFAULT, premium_trajectories
+
+# Portfolio aggregates for charting a whole book. Sending every policy to the
+# browser does not scale, so a book is reduced once, on load, to histograms
+# per PortfolioCube cell (current industry x company type x role):
+#
+#   rasters[axis][cell, x, y]       policies per (V_i or H_i bin, premium bin)
+#   premium_counts[cell, y]         policies per premium bin
+#   trajectory_counts[cell, k, y]   policies per premium bin at month k
+#   trajectory_sums[cell, k]        summed premium at month k
+#
+# Any filter on the cube dimensions is then a sum over the selected cells, so
+# a chart costs the same for 10K or 10M policies. Only a drill-down to the raw
+# rows of a small selection scans the per-policy cell codes.
+
+SCATTER_AXES = ("v_i", "h_i")
+RASTER_BINS = 100
+DRILL_DOWN_ROWS = 5000
+TRAJECTORY_MONTHS = np.arange(TRAJECTORY_MONTHS_DEFAULT + 1)
+
+def bin_edges(low: float, high: float, bins: int = RASTER_BINS) -> np.ndarray:
+    """
+    `bins` equal bins over [low, high], widened by 0.5 on each side when every
+    value is the same (V_i pinned at its floor, for example).
+    """
+    if not high > low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+def bin_index(values, edges: np.ndarray) -> np.ndarray:
+    """
+    Bin of each value for equal-width `edges`; values outside are clipped
+    into the first or last bin.
+    """
+    bins = len(edges) - 1
+    scaled = (np.asarray(values, dtype=np.float64) - edges[0]) * (bins / (edges[-1] - edges[0]))
+    return np.clip(scaled, 0, bins - 1).astype(np.intp)
+
+def histogram_quantiles(counts: np.ndarray, edges: np.ndarray, quantiles) -> np.ndarray:
+    """
+    Quantiles of binned data along the last axis of `counts`, each the centre
+    of the first bin whose cumulative count reaches it (NaN for empty rows).
+    """
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    centres = (edges[:-1] + edges[1:]) / 2
+    result = []
+    for quantile in quantiles:
+        reached = cumulative >= np.maximum(quantile * total, 1)
+        result.append(np.where(total[..., 0] > 0, centres[np.argmax(reached, axis=-1)], np.nan))
+    return np.stack(result)
+
+class PortfolioAggregates:
+    """
+    Binned views of a priced policy store. Build one with
+    PortfolioAggregates.from_store(); filters are keyword arguments naming a
+    CUBE_DIMENSIONS column and one label or a list of labels, as for
+    PortfolioCube.totals().
+    """
+
+    def __init__(self, store: PolicyStore, tables: CompiledFactorTables, parameters: dict):
+        self.store = store
+        self.tables = tables
+        self.parameters = parameters
+        self.cube = PortfolioCube(tables)
+        cells = int(np.prod(self.cube.shape))
+        self.policy_cells = np.empty(len(store), dtype=np.int16)
+        self.outputs = {name: np.empty(len(store), dtype=np.float32) for name in SCATTER_AXES + ("p_monthly",)}
+        self.edges = {}
+        self.rasters = {name: np.zeros((cells, RASTER_BINS, RASTER_BINS), dtype=np.int32) for name in SCATTER_AXES}
+        self.premium_counts = np.zeros((cells, RASTER_BINS), dtype=np.int64)
+        self.trajectory_counts = np.zeros((cells, len(TRAJECTORY_MONTHS), RASTER_BINS), dtype=np.int32)
+        self.trajectory_sums = np.zeros((cells, len(TRAJECTORY_MONTHS)))
+
+    @classmethod
+    def from_store(
+        cls,
+        store: PolicyStore,
+        chunk_size: int = CHUNK_SIZE_DEFAULT,
+        tables: CompiledFactorTables | None = None,
+        **parameters
+    ) -> "PortfolioAggregates":
+        """
+        Prices every policy of `store` (keyword parameters are passed to
+        price_policies) and bins it, chunk by chunk. The first pass prices and
+        fills the cube; the second bins against the book's own ranges.
+        """
+        tables = tables or default_factor_tables()
+        aggregates = cls(store, tables, parameters)
+        lookups = store.recode_lookups(tables)
+        chunks = [(low, min(low + chunk_size, len(store))) for low in range(0, len(store), chunk_size)]
+
+        def chunk_policies(low, high):
+            columns = store.policies(low, high)
+            for name, lookup in lookups.items():
+                columns[name] = lookup[columns[name]]
+            return columns
+
+        # Pass 1: price, keep the charted outputs and premium range
+        premium_range = [np.inf, -np.inf]
+        for low, high in chunks:
+            columns = chunk_policies(low, high)
+            priced = price_policies(columns, tables=tables, **parameters)
+            cells = np.ravel_multi_index([columns[name].astype(np.intp) for name in CUBE_DIMENSIONS], aggregates.cube.shape)
+            aggregates.policy_cells[low:high] = cells
+            for name, values in aggregates.outputs.items():
+                values[low:high] = np.broadcast_to(priced[name], (high - low,))
+            aggregates.cube.add(cells, priced["p_monthly"], priced["e_loss"], priced["l_payout"])
+            # Premium is monotone in H_base(k), which moves one way from month 0
+            # to the end of the transition, so the endpoints bound every path
+            ends = premium_trajectories(columns, months=TRAJECTORY_MONTHS[[0, -1]], tables=tables, **parameters)["p_monthly"]
+            premium_range = [min(premium_range[0], ends.min()), max(premium_range[1], ends.max())]
+
+        for name in SCATTER_AXES:
+            values = aggregates.outputs[name]
+            aggregates.edges[name] = bin_edges(float(values.min()), float(values.max())) if len(values) else bin_edges(0.0, 1.0)
+        aggregates.edges["p_monthly"] = bin_edges(*premium_range) if len(store) else bin_edges(0.0, 1.0)
+
+        # Pass 2: rasters and trajectories per cube cell
+        cells_size = aggregates.trajectory_sums.size
+        for low, high in chunks:
+            cells = aggregates.policy_cells[low:high].astype(np.intp)
+            premium_bins = bin_index(aggregates.outputs["p_monthly"][low:high], aggregates.edges["p_monthly"])
+            for name in SCATTER_AXES:
+                flat = (cells * RASTER_BINS + bin_index(aggregates.outputs[name][low:high], aggregates.edges[name])) * RASTER_BINS + premium_bins
+                aggregates.rasters[name] += np.bincount(flat, minlength=aggregates.rasters[name].size).reshape(aggregates.rasters[name].shape).astype(np.int32)
+            paths = premium_trajectories(chunk_policies(low, high), months=TRAJECTORY_MONTHS, tables=tables, **parameters)["p_monthly"]
+            cell_months = cells[:, None] * len(TRAJECTORY_MONTHS) + np.arange(len(TRAJECTORY_MONTHS))
+            aggregates.trajectory_sums += np.bincount(cell_months.ravel(), paths.ravel(), minlength=cells_size).reshape(aggregates.trajectory_sums.shape)
+            flat = cell_months * RASTER_BINS + bin_index(paths, aggregates.edges["p_monthly"])
+            aggregates.trajectory_counts += np.bincount(flat.ravel(), minlength=aggregates.trajectory_counts.size).reshape(aggregates.trajectory_counts.shape).astype(np.int32)
+        aggregates.premium_counts = aggregates.rasters[SCATTER_AXES[0]].sum(axis=1)
+        return aggregates
+
+    def __len__(self) -> int:
+        return len(self.policy_cells)
+
+    def cell_mask(self, **filters) -> np.ndarray:
+        """
+        PortfolioCube.cell_mask(), flattened to index per-cell aggregates.
+        """
+        return self.cube.cell_mask(**filters).ravel()
+
+    # --- Views ---
+
+    def raster(self, axis: str, **filters) -> dict:
+        """
+        Policies per (axis bin, premium bin) for `axis` in SCATTER_AXES:
+        {"counts": (bins, bins), "x_edges", "y_edges"}.
+        """
+        counts = self.rasters[axis][self.cell_mask(**filters)].sum(axis=0)
+        return {"counts": counts, "x_edges": self.edges[axis], "y_edges": self.edges["p_monthly"]}
+
+    def premium_distribution(self, dimension: str, **filters) -> dict:
+        """
+        Policies per premium bin for each label of `dimension`:
+        {"labels", "counts": (labels, bins), "edges"}, labels without policies
+        left out.
+        """
+        mask = self.cube.cell_mask(**filters)
+        axis = CUBE_DIMENSIONS.index(dimension)
+        others = tuple(position for position in range(len(CUBE_DIMENSIONS)) if position != axis)
+        per_cell = self.premium_counts.reshape(self.cube.shape + (RASTER_BINS,))
+        counts = (per_cell * mask[..., None]).sum(axis=others)
+        held = counts.sum(axis=1) > 0
+        labels = np.array(self.cube.labels[dimension], dtype=object)
+        return {"labels": tuple(labels[held]), "counts": counts[held], "edges": self.edges["p_monthly"]}
+
+    def trajectory_bands(self, quantiles=(0.1, 0.5, 0.9), **filters) -> dict:
+        """
+        The selected policies' premium over transition months k: the exact
+        mean and binned quantiles, {"months", "mean", "quantiles": (q, months)}.
+        """
+        mask = self.cell_mask(**filters)
+        counts = self.trajectory_counts[mask].sum(axis=0)
+        policies = counts.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.trajectory_sums[mask].sum(axis=0) / policies
+        return {"months": TRAJECTORY_MONTHS, "mean": mean, "quantiles": histogram_quantiles(counts, self.edges["p_monthly"], quantiles)}
+
+    def drill_down(self, limit: int = DRILL_DOWN_ROWS, **filters) -> dict | None:
+        """
+        Raw rows of the selected policies, with category labels, their
+        charted outputs and their store row, or None when more than `limit`
+        policies match (the cube count decides without scanning the book).
+        """
+        if self.cube.totals(**filters)["policies"] > limit:
+            return None
+        rows = np.flatnonzero(self.cell_mask(**filters)[self.policy_cells])
+        result = {"row": rows}
+        columns = self.store.policies()
+        for name in CATEGORICAL_COLUMNS:
+            labels = np.array(self.store.categories[name] + (UNKNOWN_LABEL,), dtype=object)
+            result[name] = labels[np.minimum(columns[name][rows], len(labels) - 1)]
+        for name in NUMERIC_COLUMNS:
+            result[name] = np.asarray(columns[name][rows])
+        for name, values in self.outputs.items():
+            result[name] = values[rows]
+        return result
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import streamlit as st
+
+from application_pages import instrumentation
+from application_pages.cohorts import CUBE_DIMENSIONS
+from application_pages.policy_store import CHUNK_SIZE_DEFAULT, META_FILE, PolicyStore
+from application_pages.portfolio import DRILL_DOWN_ROWS, PortfolioAggregates
+from application_pages.synthetic_book import synthetic_policies
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Portfolio Explorer page. A book (a policy store on disk, or a synthetic demo
+# book written to one) is reduced once to PortfolioAggregates, held as a shared
+# resource. Every filter state then maps to a small cached view (100 x 100
+# rasters and per-month bands), so a rerun sends the same few kilobytes to the
+# browser whether the book holds 100K or 10M policies. Raw rows are only read
+# for selections of at most DRILL_DOWN_ROWS policies. Policy stores are only
+# offered from the directory named by AIQ_POLICY_STORE_ROOT, never a free path.
+
+SYNTHETIC_BOOK_SIZES = (100_000, 1_000_000, 10_000_000)
+SYNTHETIC_STORE_PREFIX = "aiq-portfolio-"
+STORE_ROOT_ENV = "AIQ_POLICY_STORE_ROOT"
+BOOK_CACHE_ENTRIES = 2
+VIEW_CACHE_ENTRIES = 256
+DIMENSION_LABELS = {
+    "current_industry": "Current Industry",
+    "company_type": "Company Type",
+    "job_role": "Job Role",
+}
+AXIS_LABELS = {
+    "v_i": "Idiosyncratic Risk (V_i)",
+    "h_i": "Systematic Risk (H_i)",
+}
+
+# --- Books and views ---
+
+@st.cache_resource(max_entries=BOOK_CACHE_ENTRIES, show_spinner="Writing the synthetic book...")
+def synthetic_store(rows: int) -> str:
+    """
+    Path of a policy store holding `rows` synthetic policies. Books are seeded,
+    so each size has one directory under the system temp directory, reused
+    across cache evictions and server restarts; an incomplete one is rewritten.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"{SYNTHETIC_STORE_PREFIX}{rows}")
+    try:
+        if len(PolicyStore(path)) == rows:
+            return path
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(path, ignore_errors=True)
+    store = PolicyStore.create(path)
+    for index, start in enumerate(range(0, rows, CHUNK_SIZE_DEFAULT)):
+        store.append(synthetic_policies(min(CHUNK_SIZE_DEFAULT, rows - start), seed=index, codes=True))
+    return path
+
+def store_names(root: str) -> list:
+    """
+    Names of the policy stores directly under `root`, sorted.
+    """
+    try:
+        entries = os.listdir(root)
+    except OSError:
+        return []
+    return sorted(name for name in entries if os.path.isfile(os.path.join(root, name, META_FILE)))
+
+@st.cache_resource(max_entries=BOOK_CACHE_ENTRIES, show_spinner="Aggregating the book...")
+def book_aggregates(path: str) -> PortfolioAggregates:
+    with instrumentation.stage("app.portfolio.aggregate"):
+        return PortfolioAggregates.from_store(PolicyStore(path))
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def portfolio_view(path: str, filters: dict, axis: str) -> dict:
+    """
+    Everything the page charts for one filter state, as small arrays:
+    {"totals", "raster", "by_industry", "premium_by_industry", "trajectory"}.
+    """
+    aggregates = book_aggregates(path)
+    with instrumentation.stage("app.portfolio.view"):
+        return {
+            "totals": aggregates.cube.totals(**filters),
+            "raster": aggregates.raster(axis, **filters),
+            "by_industry": aggregates.cube.by("current_industry", **filters),
+            "premium_by_industry": aggregates.premium_distribution("current_industry", **filters),
+            "trajectory": aggregates.trajectory_bands(**filters),
+        }
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def drill_down_rows(path: str, filters: dict) -> dict | None:
+    with instrumentation.stage("app.portfolio.drill_down"):
+        return book_aggregates(path).drill_down(**filters)
+
+# --- Figures ---
+# Built from cached views only; plotly is imported inside each builder.
+
+def bin_centres(edges: np.ndarray) -> np.ndarray:
+    return (edges[:-1] + edges[1:]) / 2
+
+def density_figure(raster: dict, axis: str) -> go.Figure:
+    """
+    Premium against V_i or H_i as a density raster, coloured by log10 of the
+    policies per bin (empty bins left blank).
+    """
+    import plotly.graph_objects as go
+    counts = raster["counts"].T
+    with np.errstate(divide="ignore"):
+        shade = np.where(counts > 0, np.log10(counts), np.nan)
+    fig = go.Figure(go.Heatmap(
+        x=bin_centres(raster["x_edges"]), y=bin_centres(raster["y_edges"]), z=shade, customdata=counts,
+        colorscale="Viridis", colorbar={"title": "log10 policies"},
+        hovertemplate=f"{AXIS_LABELS[axis]} %{{x:.1f}}<br>Premium $%{{y:.2f}}<br>%{{customdata:,}} policies<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"Monthly Premium vs {AXIS_LABELS[axis]}",
+        xaxis={'title': {'text': AXIS_LABELS[axis]}},
+        yaxis={'title': {'text': "Monthly Premium ($)"}},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+def premium_distribution_figure(distribution: dict) -> go.Figure:
+    """
+    Each industry's premium distribution as a row of shares (% of that
+    industry's policies per premium bin).
+    """
+    import plotly.graph_objects as go
+    counts = distribution["counts"]
+    shares = 100.0 * counts / counts.sum(axis=1, keepdims=True)
+    fig = go.Figure(go.Heatmap(
+        x=bin_centres(distribution["edges"]), y=list(distribution["labels"]),
+        z=np.where(counts > 0, shares, np.nan), colorscale="Blues", colorbar={"title": "% of industry"},
+        hovertemplate="%{y}<br>Premium $%{x:.2f}<br>%{z:.2f}% of policies<extra></extra>",
+    ))
+    fig.update_layout(
+        title="Premium Distribution by Current Industry",
+        xaxis={'title': {'text': "Monthly Premium ($)"}},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+def industry_totals_figure(by_industry: dict) -> go.Figure:
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=list(by_industry["labels"]), y=by_industry["premium"], name="Monthly Premium ($)", marker_color="darkblue"))
+    fig.add_trace(go.Bar(x=list(by_industry["labels"]), y=by_industry["expected_loss"] / 12.0, name="Expected Loss per Month ($)", marker_color="lightcoral"))
+    fig.update_layout(
+        title="Premium and Expected Loss by Current Industry",
+        barmode="group",
+        yaxis={'title': {'text': "$ per Month"}},
+        legend={'orientation': "h", 'y': -0.4},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+def trajectory_band_figure(bands: dict) -> go.Figure:
+    """
+    Mean premium over transition months k, with the binned median and the
+    10th-90th percentile band of the selected policies.
+    """
+    import plotly.graph_objects as go
+    months = bands["months"]
+    low, median, high = bands["quantiles"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=months, y=high, mode="lines", line={'width': 0}, showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=months, y=low, mode="lines", line={'width': 0}, fill="tonexty", fillcolor="rgba(0, 0, 139, 0.15)", name="10th-90th Percentile"))
+    fig.add_trace(go.Scatter(x=months, y=median, mode="lines", name="Median", line={'color': "gray", 'dash': "dot"}))
+    fig.add_trace(go.Scatter(x=months, y=bands["mean"], mode="lines+markers", name="Mean", line={'color': "darkblue"}))
+    fig.update_layout(
+        title="Book Premium Over the Career Transition",
+        xaxis={'title': {'text': "Months Elapsed Since Transition (k)"}},
+        yaxis={'title': {'text': "Monthly Premium ($)"}},
+        legend={'orientation': "h", 'y': -0.2},
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig
+
+# --- Page ---
+
+def render_portfolio_explorer():
+    """
+    Renders the Portfolio Explorer page: a whole book charted through binned
+    aggregates, filtered by industry, company type and role.
+    """
+    st.title("Portfolio Explorer")
+    st.markdown("""
+    Explore a whole book of policies at once. Charts are drawn from binned aggregates computed when the book is loaded,
+    so filtering stays fast for millions of policies. Narrow the filters to a small selection to see its individual policies.
+    """)
+
+    st.sidebar.header("Book")
+    root = os.environ.get(STORE_ROOT_ENV)
+    source = st.sidebar.radio("Source", options=["Synthetic book"] + (["Policy store"] if root else []), key="portfolio_source")
+    if source == "Synthetic book":
+        rows = st.sidebar.selectbox("Policies", options=SYNTHETIC_BOOK_SIZES, index=1, format_func=lambda n: f"{n:,}", key="portfolio_rows")
+        path = synthetic_store(rows)
+    else:
+        name = st.sidebar.selectbox("Policy store", options=store_names(root), key="portfolio_store", help=f"Stores under {STORE_ROOT_ENV}, written by `python -m application_pages.policy_store import`.")
+        if name is None:
+            st.info(f"No policy stores found under {STORE_ROOT_ENV} ({root}).")
+            return
+        path = os.path.join(root, name)
+    try:
+        aggregates = book_aggregates(path)
+    except (OSError, ValueError) as error:
+        st.error(f"Could not open the policy store: {error}")
+        return
+
+    st.sidebar.header("Filters")
+    filters = {}
+    for name in CUBE_DIMENSIONS:
+        chosen = st.sidebar.multiselect(DIMENSION_LABELS[name], options=list(aggregates.cube.labels[name]), key=f"portfolio_{name}", placeholder="All")
+        if chosen:
+            filters[name] = tuple(chosen)
+    axis = st.sidebar.radio("Premium Chart Against", options=list(AXIS_LABELS), format_func=AXIS_LABELS.get, key="portfolio_axis")
+
+    view = portfolio_view(path, filters, axis)
+    totals = view["totals"]
+    with instrumentation.stage("app.render.portfolio"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Policies", f"{totals['policies']:,.0f}", delta=f"of {len(aggregates):,}", delta_color="off")
+        col2.metric("Monthly Premium", f"${totals['premium']:,.0f}")
+        col3.metric("Annual Expected Loss", f"${totals['expected_loss']:,.0f}")
+        col4.metric("Exposure (L_payout)", f"${totals['exposure']:,.0f}")
+        if not totals["policies"]:
+            st.info("No policies match the filters.")
+            return
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(density_figure(view["raster"], axis), use_container_width=True)
+        with col2:
+            st.plotly_chart(trajectory_band_figure(view["trajectory"]), use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(premium_distribution_figure(view["premium_by_industry"]), use_container_width=True)
+        with col2:
+            st.plotly_chart(industry_totals_figure(view["by_industry"]), use_container_width=True)
+
+    st.markdown("## Policies in the Selection")
+    if totals["policies"] > DRILL_DOWN_ROWS:
+        st.info(f"{totals['policies']:,.0f} policies match. Narrow the filters to at most {DRILL_DOWN_ROWS:,} to list them.")
+        return
+    st.dataframe(drill_down_rows(path, filters), use_container_width=True, hide_index=True)
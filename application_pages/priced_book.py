@@ -0,0 +1,260 @@
+import json
+
+import numpy as np
+
+from application_pages.data_lookups import (
+    W_CR_DEFAULT, W_US_DEFAULT, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    GAMMA_GEN_DEFAULT, GAMMA_SPEC_DEFAULT
+)
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, OUTPUT_COLUMNS,
+    require_policy_columns, resolve_parameters,
+    calculate_upskilling_factor_batch, calculate_idiosyncratic_risk_batch,
+    interpolate_occupational_hazard_batch, calculate_systematic_risk_batch,
+    calculate_total_payout_batch, calculate_annual_claim_probability_batch,
+    calculate_final_monthly_premium_batch
+)
+from application_pages.factor_tables import (
+    COLUMN_TABLES, compile_factor_tables, encode_column,
+    human_capital_factor_from_codes
+)
+
+# A persistent priced book that reprices incrementally. It keeps the encoded
+# inputs, every pipeline intermediate, and for each categorical column an index
+# from category code to the rows holding it. A factor-table or parameter update
+# marks the pipeline stages it feeds as dirty, and only those stages and their
+# downstream dependents are recomputed, only for the affected rows.
+
+# Stage -> stages computed directly from it
+STAGE_DEPENDENTS = {
+    "f_hc": ("v_i",),
+    "f_cr": ("v_i",),
+    "f_us": ("v_i",),
+    "v_i": ("p_claim",),
+    "h_base_t": ("h_i",),
+    "h_i": ("p_claim",),
+    "l_payout": ("e_loss",),
+    "p_claim": ("e_loss",),
+    "e_loss": ("p_monthly",),
+    "p_monthly": (),
+}
+
+# Factor table -> first stage that reads it
+TABLE_STAGES = {
+    "role": "f_hc",
+    "education_level": "f_hc",
+    "education_field": "f_hc",
+    "school_tier": "f_hc",
+    "company": "f_cr",
+    "industry_hazard": "h_base_t",
+}
+
+# Book-wide parameter -> first stage that reads it
+PARAMETER_STAGES = {
+    "economic_climate_modifier": "h_i",
+    "ai_innovation_index": "h_i",
+    "ttv_period": "h_base_t",
+    "beta_systemic": "p_claim",
+    "beta_individual": "p_claim",
+    "lambda_factor": "p_monthly",
+    "p_min": "p_monthly",
+    "w_cr": "v_i",
+    "w_us": "v_i",
+    "w_econ": "h_i",
+    "w_inno": "h_i",
+    "gamma_gen": "f_us",
+    "gamma_spec": "f_us",
+}
+
+MODEL_WEIGHT_DEFAULTS = {
+    "w_cr": W_CR_DEFAULT,
+    "w_us": W_US_DEFAULT,
+    "w_econ": W_ECON_DEFAULT,
+    "w_inno": W_INNO_DEFAULT,
+    "gamma_gen": GAMMA_GEN_DEFAULT,
+    "gamma_spec": GAMMA_SPEC_DEFAULT,
+}
+
+def downstream_stages(stages) -> list:
+    """
+    The given stages plus everything computed from them, in pipeline order.
+    """
+    pending, dirty = list(stages), set()
+    while pending:
+        stage = pending.pop()
+        if stage not in dirty:
+            dirty.add(stage)
+            pending.extend(STAGE_DEPENDENTS[stage])
+    return [stage for stage in OUTPUT_COLUMNS if stage in dirty]
+
+def category_index(codes: np.ndarray, categories: int) -> tuple:
+    """
+    Groups row numbers by category code: rows holding code c are
+    order[offsets[c]:offsets[c + 1]]. Code `categories` means unknown.
+    """
+    order = np.argsort(codes, kind="stable")
+    offsets = np.searchsorted(codes[order], np.arange(categories + 2))
+    return order, offsets
+
+class PricedBook:
+    """
+    A priced policy book that supports incremental repricing.
+
+    Build one with PricedBook.from_policies(), then call update_factor() or
+    set_parameter(); each returns a diff of the premiums that changed.
+    save() and load() persist the whole book, including table overrides.
+    """
+
+    def __init__(self, inputs: dict, parameters: dict, weights: dict, overrides: dict | None = None, outputs: dict | None = None):
+        self.inputs = inputs
+        self.parameters = parameters
+        self.weights = weights
+        self.overrides = overrides or {}
+        self.tables = compile_factor_tables(self.overrides)
+        self.size = len(inputs["job_role"])
+        self.indexes = {
+            name: category_index(inputs[name], self.tables.unknown_code(COLUMN_TABLES[name]))
+            for name in CATEGORICAL_COLUMNS
+        }
+        if outputs is None:
+            outputs = {name: np.empty(self.size) for name in OUTPUT_COLUMNS}
+            self.outputs = outputs
+            self._refresh(slice(None), OUTPUT_COLUMNS)
+        else:
+            self.outputs = outputs
+
+    @classmethod
+    def from_policies(cls, policies, **parameters) -> "PricedBook":
+        """
+        Encodes and prices `policies` (anything price_policies accepts).
+        Keyword arguments set book-wide parameters and model weights.
+        """
+        weights = {name: parameters.pop(name, default) for name, default in MODEL_WEIGHT_DEFAULTS.items()}
+        columns = require_policy_columns(policies)
+        tables = compile_factor_tables()
+        n = max(np.size(columns[name]) for name in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+        inputs = {name: np.broadcast_to(encode_column(tables, name, columns[name]), (n,)).astype(np.int16) for name in CATEGORICAL_COLUMNS}
+        for name in NUMERIC_COLUMNS:
+            inputs[name] = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,)).copy()
+        resolved = resolve_parameters(columns, **parameters)
+        parameters = {name: np.broadcast_to(np.asarray(resolved[name], dtype=np.float64), (n,)).copy() for name in PARAMETER_DEFAULTS}
+        return cls(inputs, parameters, weights)
+
+    # --- Stage evaluation ---
+
+    def _compute(self, stage: str, rows):
+        inputs, params, weights, out, tables = self.inputs, self.parameters, self.weights, self.outputs, self.tables
+        if stage == "f_hc":
+            return human_capital_factor_from_codes(
+                tables, inputs["job_role"][rows], inputs["education_level"][rows],
+                inputs["education_field"][rows], inputs["school_tier"][rows], inputs["years_experience"][rows]
+            )
+        if stage == "f_cr":
+            return tables.factors["company"][inputs["company_type"][rows]]
+        if stage == "f_us":
+            return calculate_upskilling_factor_batch(
+                inputs["general_upskilling_progress"][rows], inputs["firm_specific_upskilling_progress"][rows],
+                weights["gamma_gen"], weights["gamma_spec"]
+            )
+        if stage == "v_i":
+            return calculate_idiosyncratic_risk_batch(out["f_hc"][rows], out["f_cr"][rows], out["f_us"][rows], weights["w_cr"], weights["w_us"])
+        if stage == "h_base_t":
+            hazards = tables.factors["industry_hazard"]
+            return interpolate_occupational_hazard_batch(
+                hazards[inputs["current_industry"][rows]], hazards[inputs["target_industry"][rows]],
+                inputs["months_elapsed_transition"][rows], params["ttv_period"][rows]
+            )
+        if stage == "h_i":
+            return calculate_systematic_risk_batch(
+                out["h_base_t"][rows], params["economic_climate_modifier"][rows], params["ai_innovation_index"][rows],
+                weights["w_econ"], weights["w_inno"]
+            )
+        if stage == "l_payout":
+            return calculate_total_payout_batch(
+                inputs["annual_salary"][rows], inputs["coverage_percentage"][rows], inputs["coverage_duration_months"][rows]
+            )
+        if stage == "p_claim":
+            return calculate_annual_claim_probability_batch(
+                out["h_i"][rows], out["v_i"][rows], params["beta_systemic"][rows], params["beta_individual"][rows]
+            )
+        if stage == "e_loss":
+            return out["p_claim"][rows] * out["l_payout"][rows]
+        return calculate_final_monthly_premium_batch(out["e_loss"][rows], params["lambda_factor"][rows], params["p_min"][rows])
+
+    def _refresh(self, rows, stages):
+        for stage in downstream_stages(stages):
+            self.outputs[stage][rows] = self._compute(stage, rows)
+
+    def _reprice(self, rows, stages) -> dict:
+        old = self.outputs["p_monthly"][rows].copy()
+        self._refresh(rows, stages)
+        new = self.outputs["p_monthly"][rows]
+        if isinstance(rows, slice):
+            rows = np.arange(self.size)
+        changed = old != new
+        return {"rows": rows[changed], "old_premium": old[changed], "new_premium": new[changed]}
+
+    # --- Incremental updates ---
+
+    def rows_with(self, column: str, label: str) -> np.ndarray:
+        """
+        Row numbers of the policies whose `column` holds `label`.
+        """
+        categories = self.tables.categories[COLUMN_TABLES[column]]
+        order, offsets = self.indexes[column]
+        code = categories.index(label)
+        return order[offsets[code]:offsets[code + 1]]
+
+    def update_factor(self, table: str, label: str, value: float) -> dict:
+        """
+        Sets one entry of a factor table (a FACTOR_TABLE_SOURCES name, e.g.
+        "industry_hazard" or "company") and reprices only the policies using it,
+        from the first stage that reads the table onward.
+        Returns {"rows", "old_premium", "new_premium"} for the premiums that changed.
+        """
+        if label not in self.tables.categories[table]:
+            raise KeyError(f"{label!r} is not a category of the {table!r} table")
+        self.overrides.setdefault(table, {})[label] = float(value)
+        self.tables = compile_factor_tables(self.overrides)
+        columns = [column for column, name in COLUMN_TABLES.items() if name == table]
+        rows = self.rows_with(columns[0], label)
+        for column in columns[1:]:
+            rows = np.union1d(rows, self.rows_with(column, label))
+        return self._reprice(np.sort(rows), [TABLE_STAGES[table]])
+
+    def set_parameter(self, name: str, value: float) -> dict:
+        """
+        Sets a book-wide parameter (M_econ, I_AI, betas, lambda, P_min, TTV) or
+        model weight for every policy and reprices from the first stage that
+        reads it onward. Returns the premium diff like update_factor().
+        """
+        if name not in PARAMETER_STAGES:
+            raise KeyError(f"Unknown parameter {name!r}; expected one of {', '.join(PARAMETER_STAGES)}")
+        if name in self.weights:
+            self.weights[name] = float(value)
+        else:
+            self.parameters[name][:] = value
+        return self._reprice(slice(None), [PARAMETER_STAGES[name]])
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        """
+        Writes the book to a single .npz file.
+        """
+        metadata = {"weights": self.weights, "overrides": self.overrides}
+        arrays = {}
+        for group, values in (("input", self.inputs), ("parameter", self.parameters), ("output", self.outputs)):
+            arrays.update({f"{group}:{name}": value for name, value in values.items()})
+        np.savez(path, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "PricedBook":
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            groups = {"input": {}, "parameter": {}, "output": {}}
+            for key in data.files:
+                if ":" in key:
+                    group, name = key.split(":", 1)
+                    groups[group][name] = data[key]
+        return cls(groups["input"], groups["parameter"], metadata["weights"], metadata["overrides"], groups["output"])
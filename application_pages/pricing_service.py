@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+
+import numpy as np
+
+from application_pages import instrumentation
+from application_pages.data_lookups import POLICY_INPUT_RANGES
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, OUTPUT_COLUMNS, price_policies
+)
+from application_pages.factor_tables import COLUMN_TABLES, CompiledFactorTables, default_factor_tables
+
+# Local HTTP pricing service (stdlib asyncio only).
+#
+#   POST /quote    one policy as a JSON object -> its pipeline outputs
+#   POST /quotes   {"policies": [...]}         -> {"quotes": [outputs or {"error": reason}]}
+#   GET  /health   liveness and queue depth
+#   GET  /stats    counters and server-side quote latency percentiles
+#   GET  /metrics  pipeline stage timings in Prometheus text format (--instrument)
+#
+# Concurrent single quotes are queued and priced together: the batcher takes
+# the first waiting quote, collects more for at most max_wait_ms (or until
+# max_batch are waiting) and prices them in one price_policies call. The queue
+# is bounded, and a quote arriving while it is full gets 503 at once rather
+# than waiting behind the backlog.
+#
+#   python -m application_pages.pricing_service --port 8765
+
+HOST_DEFAULT = "127.0.0.1"
+PORT_DEFAULT = 8765
+MAX_BATCH_DEFAULT = 256
+MAX_WAIT_MS_DEFAULT = 1.0
+QUEUE_DEPTH_DEFAULT = 4096
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_POLICIES_PER_REQUEST = 50_000
+BATCH_REQUESTS_MAX = 4 # concurrent /quotes requests before 503
+LATENCY_WINDOW = 10_000 # recent quotes kept for /stats percentiles
+
+# Field order of a validated quote row
+QUOTE_FIELDS = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + tuple(PARAMETER_DEFAULTS)
+
+STATUS_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 503: "Service Unavailable",
+}
+
+class ServiceOverloaded(Exception):
+    """
+    Raised when the quote queue is full.
+    """
+
+# --- Quote validation and pricing ---
+
+def category_codes(tables: CompiledFactorTables) -> dict:
+    """
+    Label -> code maps for each categorical column.
+    """
+    return {
+        name: {label: code for code, label in enumerate(tables.categories[COLUMN_TABLES[name]])}
+        for name in CATEGORICAL_COLUMNS
+    }
+
+def validate_quote(quote, codes: dict) -> tuple:
+    """
+    Checks one quote against the known categories and POLICY_INPUT_RANGES
+    (parameters are optional and default to PARAMETER_DEFAULTS).
+    Returns (row in QUOTE_FIELDS order, "") or (None, reason), with the same
+    reasons as bulk pricing rejects.
+    """
+    if not isinstance(quote, dict):
+        return None, "quote must be a JSON object"
+    row = []
+    for name in CATEGORICAL_COLUMNS:
+        code = codes[name].get(quote.get(name)) if isinstance(quote.get(name), str) else None
+        if code is None:
+            return None, f"unknown {name}"
+        row.append(code)
+    for name in QUOTE_FIELDS[len(CATEGORICAL_COLUMNS):]:
+        value = quote.get(name, PARAMETER_DEFAULTS.get(name))
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None, f"missing or non-numeric {name}"
+        try:
+            value = float(value) # JSON integers are unbounded; float() overflows on huge ones
+        except (OverflowError, ValueError):
+            return None, f"missing or non-numeric {name}"
+        if not math.isfinite(value):
+            return None, f"missing or non-numeric {name}"
+        low, high = POLICY_INPUT_RANGES[name]
+        if value < low or value > high:
+            return None, f"{name} out of range [{low}, {high}]"
+        row.append(value)
+    return row, ""
+
+def price_rows(rows: list, tables: CompiledFactorTables) -> list:
+    """
+    Prices validated rows in one vectorized pass. Returns one dict of
+    OUTPUT_COLUMNS floats per row.
+    """
+    matrix = np.array(rows, dtype=np.float64)
+    columns = {name: matrix[:, i] for i, name in enumerate(QUOTE_FIELDS)}
+    for name in CATEGORICAL_COLUMNS:
+        columns[name] = columns[name].astype(np.int16)
+    results = price_policies(columns, tables=tables)
+    values = [results[name].tolist() for name in OUTPUT_COLUMNS]
+    return [dict(zip(OUTPUT_COLUMNS, quote)) for quote in zip(*values)]
+
+# --- Micro-batching ---
+
+class MicroBatcher:
+    """
+    Coalesces concurrently submitted quote rows into batches of at most
+    `max_batch`, waiting at most `max_wait` seconds after the first one.
+    """
+
+    def __init__(self, tables: CompiledFactorTables, max_batch: int = MAX_BATCH_DEFAULT, max_wait: float = MAX_WAIT_MS_DEFAULT / 1000.0, queue_depth: int = QUEUE_DEPTH_DEFAULT):
+        self.tables = tables
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(maxsize=queue_depth)
+        self.quotes = 0
+        self.batches = 0
+        self.overloaded = 0
+        self.latencies = np.zeros(LATENCY_WINDOW)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, row: list) -> dict:
+        """
+        Queues one validated row and waits for its priced outputs.
+        Raises ServiceOverloaded if the queue is full.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((row, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.overloaded += 1
+            raise ServiceOverloaded() from None
+        return await future
+
+    async def _next_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                with instrumentation.stage("service.micro_batch", len(batch)):
+                    results = price_rows([row for row, _, _ in batch], self.tables)
+            except Exception as error: # fail this batch's quotes, keep serving
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            done = time.perf_counter()
+            for (_, future, queued), result in zip(batch, results):
+                if not future.done(): # the client may have gone away
+                    future.set_result(result)
+                self.latencies[self.quotes % LATENCY_WINDOW] = done - queued
+                self.quotes += 1
+            self.batches += 1
+
+    def stats(self) -> dict:
+        recent = self.latencies[:min(self.quotes, LATENCY_WINDOW)] * 1000.0
+        percentiles = np.percentile(recent, (50, 95, 99)).tolist() if recent.size else [0.0, 0.0, 0.0]
+        return {
+            "quotes": self.quotes,
+            "batches": self.batches,
+            "mean_batch_size": self.quotes / self.batches if self.batches else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "overloaded": self.overloaded,
+            "latency_ms": dict(zip(("p50", "p95", "p99"), percentiles)),
+        }
+
+# --- HTTP service ---
+
+class PricingService:
+    """
+    The HTTP front end: parses requests on keep-alive connections and routes
+    them to the batcher (/quote) or prices them directly (/quotes).
+    """
+
+    def __init__(self, host: str = HOST_DEFAULT, port: int = PORT_DEFAULT, max_batch: int = MAX_BATCH_DEFAULT, max_wait_ms: float = MAX_WAIT_MS_DEFAULT, queue_depth: int = QUEUE_DEPTH_DEFAULT, tables: CompiledFactorTables | None = None):
+        self.host = host
+        self.port = port
+        self.tables = tables or default_factor_tables()
+        self.codes = category_codes(self.tables)
+        self.batcher = MicroBatcher(self.tables, max_batch, max_wait_ms / 1000.0, queue_depth)
+        self.batch_slots = asyncio.Semaphore(BATCH_REQUESTS_MAX)
+        self.server = None
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1] # resolves port 0
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError as error:
+                    if error.partial.strip():
+                        self._respond(writer, 400, {"error": "incomplete request head"}, keep_alive=False)
+                    break
+                request_line, *lines = head.decode("latin-1").split("\r\n")
+                parts = request_line.split()
+                headers = {}
+                for line in lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+                method, target, version = parts
+                # Bodies are framed by Content-Length only; chunked bodies are refused
+                if "transfer-encoding" in headers:
+                    self._respond(writer, 411, {"error": "Transfer-Encoding is not supported; send Content-Length"}, keep_alive=False)
+                    break
+                length = headers.get("content-length", "0") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    self._respond(writer, 400, {"error": "Content-Length is not a non-negative integer"}, keep_alive=False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    self._respond(writer, 413, {"error": f"body exceeds {MAX_BODY_BYTES} bytes"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, payload = await self._route(method, target.split("?", 1)[0], body)
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        if isinstance(payload, str): # /metrics
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            + ("Retry-After: 1\r\n" if status == 503 else "")
+            + "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple:
+        routes = {
+            "/quote": ("POST", self._quote),
+            "/quotes": ("POST", self._quotes),
+            "/health": ("GET", self._health),
+            "/stats": ("GET", self._stats),
+            "/metrics": ("GET", self._metrics),
+        }
+        if path not in routes:
+            return 404, {"error": f"no route {path}"}
+        allowed, handler = routes[path]
+        if method != allowed:
+            return 405, {"error": f"{path} accepts {allowed}"}
+        if method == "POST":
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return 400, {"error": "body is not valid JSON"}
+        return await handler(body)
+
+    async def _quote(self, quote) -> tuple:
+        row, reason = validate_quote(quote, self.codes)
+        if row is None:
+            return 400, {"error": reason}
+        try:
+            return 200, await self.batcher.submit(row)
+        except ServiceOverloaded:
+            return 503, {"error": "quote queue is full, retry later"}
+
+    async def _quotes(self, request) -> tuple:
+        policies = request.get("policies") if isinstance(request, dict) else None
+        if not isinstance(policies, list):
+            return 400, {"error": 'body must be {"policies": [...]}'}
+        if len(policies) > MAX_POLICIES_PER_REQUEST:
+            return 413, {"error": f"at most {MAX_POLICIES_PER_REQUEST} policies per request"}
+        if self.batch_slots.locked():
+            return 503, {"error": "too many concurrent batch requests, retry later"}
+        async with self.batch_slots:
+            # Price and serialize off the event loop so single quotes keep flowing
+            return 200, await asyncio.get_running_loop().run_in_executor(None, self._price_policies, policies)
+
+    def _price_policies(self, policies: list) -> bytes:
+        with instrumentation.stage("service.validate", len(policies)):
+            checked = [validate_quote(quote, self.codes) for quote in policies]
+        valid = [row for row, _ in checked if row is not None]
+        with instrumentation.stage("service.batch_request", len(valid)):
+            priced = iter(price_rows(valid, self.tables) if valid else [])
+        with instrumentation.stage("service.serialize", len(policies)):
+            quotes = [next(priced) if row is not None else {"error": reason} for row, reason in checked]
+            return json.dumps({"quotes": quotes}).encode()
+
+    async def _health(self, _) -> tuple:
+        return 200, {"status": "ok", "queue_depth": self.batcher.queue.qsize()}
+
+    async def _stats(self, _) -> tuple:
+        return 200, self.batcher.stats()
+
+    async def _metrics(self, _) -> tuple:
+        return 200, instrumentation.prometheus_text()
+
+async def serve(host: str, port: int, max_batch: int, max_wait_ms: float, queue_depth: int):
+    service = await PricingService(host, port, max_batch, max_wait_ms, queue_depth).start()
+    print(f"Pricing service listening on http://{service.host}:{service.port}", flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve premium quotes over HTTP with micro-batching.")
+    parser.add_argument("--host", default=HOST_DEFAULT)
+    parser.add_argument("--port", type=int, default=PORT_DEFAULT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_DEFAULT, help="Largest micro-batch of single quotes")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS_DEFAULT, help="Longest wait for a micro-batch to fill")
+    parser.add_argument("--queue-depth", type=int, default=QUEUE_DEPTH_DEFAULT, help="Queued quotes before 503")
+    parser.add_argument("--instrument", action="store_true", help="Record pipeline stage timings for /metrics")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.instrument:
+        instrumentation.enable()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.queue_depth))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+import numpy as np
+
+from application_pages.data_lookups import (
+    W_CR_DEFAULT, W_US_DEFAULT, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    GAMMA_GEN_DEFAULT, GAMMA_SPEC_DEFAULT
+)
+from application_pages.batch_calculations import (
+    require_policy_columns, resolve_parameters, column_factors, price_policies,
+    calculate_experience_factor_batch
+)
+from application_pages.factor_tables import CompiledFactorTables
+
+# Exact sensitivities and premium attribution for a whole book.
+#
+# The premium is a closed-form chain of products, so its partial derivatives
+# follow from the chain rule in one vectorized pass. The two clamps are kinks:
+# V_i(t) = min(100, max(5, V_raw - 50)) passes no change through while pinned
+# at 5 or 100, and P_monthly = max(E[Loss] * lambda / 12, P_min) depends only
+# on P_min while the floor applies. At a kink the derivative of the branch the
+# pipeline selects is reported. Integer inputs (years, months) are
+# differentiated as if continuous.
+
+# Inputs with a partial derivative: numeric columns and parameters, then the
+# looked-up factor value behind each categorical input
+SENSITIVITY_INPUTS = (
+    "years_experience", "general_upskilling_progress", "firm_specific_upskilling_progress",
+    "annual_salary", "coverage_percentage", "coverage_duration_months",
+    "months_elapsed_transition", "ttv_period",
+    "economic_climate_modifier", "ai_innovation_index",
+    "beta_systemic", "beta_individual", "lambda_factor", "p_min",
+    "f_role", "f_level", "f_field", "f_school", "f_cr", "h_current", "h_target",
+)
+
+# The risk premium E[Loss] * lambda / 12 factors into
+#   (lambda / 12) * L_payout * (H_base / 100) * env * beta_systemic * (V_i / 100) * beta_individual
+# with env = w_econ * M_econ + w_inno * I_AI. Attribution splits the premium
+# difference from a reference policy across these factors, plus the P_min floor.
+ATTRIBUTION_FACTORS = (
+    "loading", "payout", "occupational_hazard", "environment",
+    "beta_systemic", "idiosyncratic_risk", "beta_individual",
+)
+ATTRIBUTION_COLUMNS = ATTRIBUTION_FACTORS + ("minimum_premium",)
+
+# Reference policy for attribution: the same policy with every looked-up factor
+# at its fallback (1.0, or a hazard of 50), no experience or upskilling, no
+# transition progress and a neutral environment. None means the table fallback.
+REFERENCE_INPUTS = {
+    "job_role": None, "education_level": None, "education_field": None,
+    "school_tier": None, "company_type": None,
+    "current_industry": None, "target_industry": None,
+    "years_experience": 0.0, "general_upskilling_progress": 0.0,
+    "firm_specific_upskilling_progress": 0.0, "months_elapsed_transition": 0.0,
+    "economic_climate_modifier": 1.0, "ai_innovation_index": 1.0,
+}
+
+def premium_sensitivities(
+    policies,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    Exact partial derivatives of P_monthly with respect to every input in
+    SENSITIVITY_INPUTS, for every policy at once.
+
+    `policies` and the keyword arguments are as for price_policies.
+    Returns {"p_monthly", "pinned_v_i", "pinned_p_min", "partials"}, where
+    "partials" maps each SENSITIVITY_INPUTS name to an array of dP_monthly/dx,
+    "pinned_v_i" marks policies whose V_i(t) sits at the 5 or 100 clamp and
+    "pinned_p_min" those whose premium is the P_min floor.
+    """
+    columns = require_policy_columns(policies)
+    parameters = resolve_parameters(columns, **parameters)
+    priced = price_policies(
+        columns, w_cr=w_cr, w_us=w_us, w_econ=w_econ, w_inno=w_inno,
+        gamma_gen=gamma_gen, gamma_spec=gamma_spec, tables=tables, **parameters
+    )
+    shape = priced["p_monthly"].shape
+    f_hc, f_cr, f_us, v_i = priced["f_hc"], priced["f_cr"], priced["f_us"], priced["v_i"]
+    h_base_t, h_i, l_payout, p_claim, e_loss = priced["h_base_t"], priced["h_i"], priced["l_payout"], priced["p_claim"], priced["e_loss"]
+
+    years = np.asarray(columns["years_experience"], dtype=np.float64)
+    salary = np.asarray(columns["annual_salary"], dtype=np.float64)
+    coverage = np.asarray(columns["coverage_percentage"], dtype=np.float64)
+    duration = np.asarray(columns["coverage_duration_months"], dtype=np.float64)
+    k = np.asarray(columns["months_elapsed_transition"], dtype=np.float64)
+    ttv = np.asarray(parameters["ttv_period"], dtype=np.float64)
+    m_econ = np.asarray(parameters["economic_climate_modifier"], dtype=np.float64)
+    i_ai = np.asarray(parameters["ai_innovation_index"], dtype=np.float64)
+    beta_systemic = np.asarray(parameters["beta_systemic"], dtype=np.float64)
+    beta_individual = np.asarray(parameters["beta_individual"], dtype=np.float64)
+    lambda_factor = np.asarray(parameters["lambda_factor"], dtype=np.float64)
+    p_min = np.asarray(parameters["p_min"], dtype=np.float64)
+    f_role = column_factors("job_role", columns["job_role"], tables)
+    f_level = column_factors("education_level", columns["education_level"], tables)
+    f_field = column_factors("education_field", columns["education_field"], tables)
+    f_school = column_factors("school_tier", columns["school_tier"], tables)
+    f_exp = calculate_experience_factor_batch(years)
+    h_current = column_factors("current_industry", columns["current_industry"], tables)
+    h_target = column_factors("target_industry", columns["target_industry"], tables)
+
+    # Which branch of each clamp the pipeline selected
+    v_shifted = f_hc * (w_cr * f_cr + w_us * f_us) - 50.0
+    pinned_v_i = ~((v_shifted > 5.0) & (v_shifted < 100.0))
+    pinned_p_min = (e_loss * lambda_factor) / 12.0 < p_min
+
+    # Premium Determination
+    d_e_loss = np.where(pinned_p_min, 0.0, lambda_factor / 12.0)
+    d_p_claim = d_e_loss * l_payout
+    d_l_payout = d_e_loss * p_claim
+    d_h_i = d_p_claim * (beta_systemic / 100.0) * (v_i / 100.0 * beta_individual)
+    d_v_i = d_p_claim * (h_i / 100.0 * beta_systemic) * (beta_individual / 100.0)
+
+    # Systematic Risk (Hi)
+    d_h_base = d_h_i * (w_econ * m_econ + w_inno * i_ai)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = k / ttv
+        d_h_base_d_k = np.where((k > 0) & (k < ttv), (h_target - h_current) / ttv, 0.0)
+        d_h_base_d_ttv = np.where((k > 0) & (k < ttv), -ratio * (h_target - h_current) / ttv, 0.0)
+        weight_target = np.where(k >= ttv, 1.0, np.where(k <= 0, 0.0, ratio))
+
+    # Idiosyncratic Risk (Vi(t))
+    d_v_raw = np.where(pinned_v_i, 0.0, d_v_i)
+    d_f_hc = d_v_raw * (w_cr * f_cr + w_us * f_us)
+    d_f_us = d_v_raw * f_hc * w_us
+
+    partials = {
+        "years_experience": d_f_hc * f_role * f_level * f_field * f_school * np.where(years <= 20.0, -0.015, 0.0),
+        "general_upskilling_progress": d_f_us * (-gamma_gen / 100.0),
+        "firm_specific_upskilling_progress": d_f_us * (-gamma_spec / 100.0),
+        "annual_salary": d_l_payout * duration * (coverage / 100.0) / 12.0,
+        "coverage_percentage": d_l_payout * (salary / 12.0) * duration / 100.0,
+        "coverage_duration_months": d_l_payout * (salary / 12.0) * (coverage / 100.0),
+        "months_elapsed_transition": d_h_base * d_h_base_d_k,
+        "ttv_period": d_h_base * d_h_base_d_ttv,
+        "economic_climate_modifier": d_h_i * h_base_t * w_econ,
+        "ai_innovation_index": d_h_i * h_base_t * w_inno,
+        "beta_systemic": d_p_claim * (h_i / 100.0) * (v_i / 100.0 * beta_individual),
+        "beta_individual": d_p_claim * (h_i / 100.0 * beta_systemic) * (v_i / 100.0),
+        "lambda_factor": np.where(pinned_p_min, 0.0, e_loss / 12.0),
+        "p_min": np.where(pinned_p_min, 1.0, 0.0),
+        "f_role": d_f_hc * f_level * f_field * f_school * f_exp,
+        "f_level": d_f_hc * f_role * f_field * f_school * f_exp,
+        "f_field": d_f_hc * f_role * f_level * f_school * f_exp,
+        "f_school": d_f_hc * f_role * f_level * f_field * f_exp,
+        "f_cr": d_v_raw * f_hc * w_cr,
+        "h_current": d_h_base * (1.0 - weight_target),
+        "h_target": d_h_base * weight_target,
+    }
+    return {
+        "p_monthly": priced["p_monthly"],
+        "pinned_v_i": np.broadcast_to(pinned_v_i, shape).copy(),
+        "pinned_p_min": np.broadcast_to(pinned_p_min, shape).copy(),
+        "partials": {name: np.broadcast_to(partials[name], shape).copy() for name in SENSITIVITY_INPUTS},
+    }
+
+def logarithmic_mean(a, b) -> np.ndarray:
+    """
+    L(a, b) = (a - b) / (ln a - ln b), with L(a, a) = a.
+    """
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (a - b) / (np.log(a) - np.log(b))
+    return np.where(a == b, a, mean)
+
+def premium_attribution(
+    policies,
+    reference: dict | None = None,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    Splits each policy's premium difference from a reference policy into
+    dollar contributions, one per ATTRIBUTION_COLUMNS entry.
+
+    The reference is the policy itself with the inputs in `reference`
+    replaced (REFERENCE_INPUTS by default). The risk premium is a product of
+    the ATTRIBUTION_FACTORS, so its change is split log-linearly (each factor
+    gets L(P, P_ref) * ln(x / x_ref), which sums exactly to P - P_ref).
+    Any change due to the P_min floor goes to "minimum_premium". All factors
+    must be positive, which holds across the sidebar ranges.
+    Returns {"premium", "reference_premium", ATTRIBUTION_COLUMNS...}.
+    """
+    columns = require_policy_columns(policies)
+    parameters = resolve_parameters(columns, **parameters)
+    reference_columns = dict(columns)
+    for name, value in (REFERENCE_INPUTS if reference is None else reference).items():
+        reference_columns[name] = np.asarray(value)
+    weights = dict(w_cr=w_cr, w_us=w_us, w_econ=w_econ, w_inno=w_inno, gamma_gen=gamma_gen, gamma_spec=gamma_spec)
+
+    def risk_factors(columns):
+        resolved = resolve_parameters(columns, **parameters)
+        priced = price_policies(columns, tables=tables, **weights, **resolved)
+        factors = {
+            "loading": np.asarray(resolved["lambda_factor"], dtype=np.float64) / 12.0,
+            "payout": priced["l_payout"],
+            "occupational_hazard": priced["h_base_t"] / 100.0,
+            "environment": w_econ * np.asarray(resolved["economic_climate_modifier"], dtype=np.float64)
+                + w_inno * np.asarray(resolved["ai_innovation_index"], dtype=np.float64),
+            "beta_systemic": np.asarray(resolved["beta_systemic"], dtype=np.float64),
+            "idiosyncratic_risk": priced["v_i"] / 100.0,
+            "beta_individual": np.asarray(resolved["beta_individual"], dtype=np.float64),
+        }
+        return priced["p_monthly"], (priced["e_loss"] * np.asarray(resolved["lambda_factor"], dtype=np.float64)) / 12.0, factors
+
+    premium, risk_premium, factors = risk_factors(columns)
+    reference_premium, reference_risk_premium, reference_factors = risk_factors(reference_columns)
+    shape = np.broadcast_shapes(np.shape(premium), np.shape(reference_premium))
+
+    weight = logarithmic_mean(risk_premium, reference_risk_premium)
+    attribution = {
+        name: weight * np.log(factors[name] / reference_factors[name])
+        for name in ATTRIBUTION_FACTORS
+    }
+    attribution["minimum_premium"] = (premium - risk_premium) - (reference_premium - reference_risk_premium)
+    results = dict(premium=premium, reference_premium=reference_premium, **attribution)
+    return {name: np.broadcast_to(value, shape).copy() for name, value in results.items()}
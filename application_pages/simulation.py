@@ -0,0 +1,256 @@
+import math
+
+import numpy as np
+
+from application_pages.data_lookups import (
+    POLICY_INPUT_RANGES, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    BETA_SYSTEMIC_DEFAULT, BETA_INDIVIDUAL_DEFAULT
+)
+from application_pages.batch_calculations import policy_columns, price_policies, resolve_parameters
+
+# Monte Carlo portfolio loss simulation.
+#
+# Each trial draws an environment (M_econ, I_AI) shared by the whole book, and
+# then an independent Bernoulli claim per policy with probability
+#   P_claim(t) = (H_base / 100 * beta_systemic) * (V_i / 100 * beta_individual) * (w_econ * M_econ(t) + w_inno * I_AI(t))
+# paying L_payout. Rather than one uniform per (trial, policy), claims are drawn
+# by thinning: within a block of trials each policy gets Binomial(trials, p_max)
+# candidate claims at distinct random trials, and each candidate is kept with
+# probability P_claim(t) / p_max. This is exact and costs time proportional to
+# the expected number of claims instead of trials x policies. Policies with
+# p_max above DENSE_CLAIM_PROBABILITY, where claims are common anyway, get one
+# Bernoulli draw per trial instead.
+#
+# Randomness is drawn per fixed-size block of trials from a generator seeded by
+# (seed, block index), and every aggregate is order independent (integer
+# histogram counts, exactly rounded sums), so results for a given seed do not
+# depend on chunk_trials.
+
+SIMULATION_BLOCK_TRIALS = 8192
+# Above this p_max a policy's claims are drawn as one Bernoulli per trial:
+# thinning would need nearly every trial as a candidate, and distinct-trial
+# redraws would collide ever more often as p_max nears 1
+DENSE_CLAIM_PROBABILITY = 0.25
+DENSE_BLOCK_CELLS = 1 << 22 # (policy, trial) draws per dense batch
+CHUNK_TRIALS_DEFAULT = 65_536
+HISTOGRAM_BINS_DEFAULT = 8192
+QUANTILES_DEFAULT = (0.5, 0.9, 0.95, 0.99, 0.995, 0.999)
+
+# Environmental scenario distribution: normal around the neutral value, clipped
+# to the range the app allows.
+M_ECON_SD_DEFAULT = 0.15
+I_AI_SD_DEFAULT = 0.15
+
+# --- Streaming aggregates ---
+
+class StreamingLossAggregate:
+    """
+    Running statistics of simulated portfolio losses without storing trials:
+    count, exact sum and sum of squares, min, max, and a fixed-range histogram
+    (with per-bin loss sums) from which quantiles/VaR and TVaR are read.
+    Losses above the histogram range land in an overflow bin. Sums are
+    accumulated over fixed `stride`-sized slices in arrival order, so feeding
+    the same losses in any stride-aligned batches gives identical results.
+    """
+
+    def __init__(self, upper: float, bins: int = HISTOGRAM_BINS_DEFAULT, stride: int = SIMULATION_BLOCK_TRIALS):
+        self.edges = np.linspace(0.0, upper, bins + 1)
+        self.counts = np.zeros(bins + 1, dtype=np.int64) # last slot = overflow
+        self.bin_sums = np.zeros(bins + 1)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.stride = stride
+        self._sums = []
+        self._squares = []
+
+    def update(self, losses: np.ndarray):
+        if losses.size == 0:
+            return
+        bins = len(self.edges) - 1
+        index = np.minimum(np.searchsorted(self.edges, losses, side="right") - 1, bins)
+        self.counts += np.bincount(index, minlength=bins + 1)
+        self.count += losses.size
+        self.min = min(self.min, float(losses.min()))
+        self.max = max(self.max, float(losses.max()))
+        for start in range(0, losses.size, self.stride):
+            part = losses[start:start + self.stride]
+            self.bin_sums += np.bincount(index[start:start + self.stride], weights=part, minlength=bins + 1)
+            self._sums.append(math.fsum(part))
+            self._squares.append(math.fsum(part * part))
+
+    @property
+    def mean(self) -> float:
+        return math.fsum(self._sums) / self.count
+
+    @property
+    def std(self) -> float:
+        mean = self.mean
+        return math.sqrt(max(math.fsum(self._squares) / self.count - mean * mean, 0.0))
+
+    def quantile(self, q: float) -> float:
+        """
+        Loss not exceeded with probability q (VaR_q), interpolated linearly
+        inside the histogram bin that contains it.
+        """
+        target = q * self.count
+        cumulative = np.cumsum(self.counts)
+        b = int(np.searchsorted(cumulative, target, side="left"))
+        if b >= len(self.edges) - 1:
+            return self.max
+        below = cumulative[b] - self.counts[b]
+        fraction = (target - below) / self.counts[b] if self.counts[b] else 0.0
+        return float(self.edges[b] + fraction * (self.edges[b + 1] - self.edges[b]))
+
+    def tail_mean(self, q: float) -> float:
+        """
+        Mean loss in the worst (1 - q) share of trials (TVaR_q). The bin holding
+        VaR_q contributes its upper part, assuming losses uniform within it.
+        """
+        var = self.quantile(q)
+        tail_count = (1.0 - q) * self.count
+        if tail_count <= 0:
+            return self.max
+        bins = len(self.edges) - 1
+        b = min(int(np.searchsorted(self.edges, var, side="right") - 1), bins)
+        total = self.bin_sums[b + 1:].sum()
+        counted = self.counts[b + 1:].sum()
+        if b < bins and counted < tail_count:
+            share = min(tail_count - counted, self.counts[b])
+            total += share * (var + self.edges[b + 1]) / 2.0
+            counted += share
+        return float(total / counted) if counted else var
+
+    def summary(self, quantiles=QUANTILES_DEFAULT) -> dict:
+        return {
+            "trials": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+            "max": self.max,
+            "var": {q: self.quantile(q) for q in quantiles},
+            "tvar": {q: self.tail_mean(q) for q in quantiles},
+            "histogram_edges": self.edges,
+            "histogram_counts": self.counts[:-1].copy(),
+            "overflow_trials": int(self.counts[-1]),
+        }
+
+# --- Scenario and claim draws ---
+
+def draw_environment(rng: np.random.Generator, trials: int, m_econ_sd: float, i_ai_sd: float, correlation: float) -> tuple:
+    """
+    Draws (M_econ, I_AI) per trial: correlated normals around 1.0 clipped to
+    the app's [0.5, 1.5] range.
+    """
+    z = rng.standard_normal((2, trials))
+    z_ai = correlation * z[0] + math.sqrt(1.0 - correlation * correlation) * z[1]
+    m_low, m_high = POLICY_INPUT_RANGES["economic_climate_modifier"]
+    i_low, i_high = POLICY_INPUT_RANGES["ai_innovation_index"]
+    m_econ = np.clip(1.0 + m_econ_sd * z[0], m_low, m_high)
+    i_ai = np.clip(1.0 + i_ai_sd * z_ai, i_low, i_high)
+    return m_econ, i_ai
+
+def draw_block_losses(rng: np.random.Generator, unit_claim: np.ndarray, l_payout: np.ndarray, environment: np.ndarray) -> np.ndarray:
+    """
+    Portfolio loss for each trial of a block, given each policy's claim
+    probability at an environment factor of 1 (`unit_claim`) and the block's
+    environment factors (w_econ * M_econ + w_inno * I_AI).
+    """
+    trials = environment.size
+    p_max = np.minimum(unit_claim * environment.max(), 1.0)
+    dense = np.flatnonzero(p_max > DENSE_CLAIM_PROBABILITY)
+    sparse = np.flatnonzero(p_max <= DENSE_CLAIM_PROBABILITY)
+    losses = np.zeros(trials)
+
+    # Thinning for the (usual) rare claims
+    candidates = rng.binomial(trials, p_max[sparse])
+    policy = np.repeat(sparse, candidates)
+    # Distinct trials per policy: draw with replacement, redraw collisions. With
+    # p_max capped, each pass leaves at most about p_max of the keys colliding.
+    keys = np.sort(policy * trials + rng.integers(0, trials, policy.size))
+    while True:
+        duplicate = np.flatnonzero(keys[1:] == keys[:-1]) + 1
+        if duplicate.size == 0:
+            break
+        keys[duplicate] = (keys[duplicate] // trials) * trials + rng.integers(0, trials, duplicate.size)
+        keys.sort()
+    policy, trial = np.divmod(keys, trials)
+    p_trial = np.minimum(unit_claim[policy] * environment[trial], 1.0)
+    kept = rng.random(keys.size) * p_max[policy] < p_trial
+    losses += np.bincount(trial[kept], weights=l_payout[policy[kept]], minlength=trials)
+
+    # Direct Bernoulli draws where claims are common, a bounded number of policies at a time
+    rows = max(1, DENSE_BLOCK_CELLS // trials)
+    for start in range(0, dense.size, rows):
+        group = dense[start:start + rows]
+        claimed = rng.random((group.size, trials)) < np.minimum(unit_claim[group, None] * environment, 1.0)
+        policy, trial = np.nonzero(claimed)
+        losses += np.bincount(trial, weights=l_payout[group[policy]], minlength=trials)
+    return losses
+
+def histogram_upper_bound(unit_claim: np.ndarray, l_payout: np.ndarray, environment_max: float) -> float:
+    """
+    A loss level essentially never exceeded: the expected loss at the worst
+    environment plus ten standard deviations of the claim noise, capped at the
+    total exposure.
+    """
+    p = np.minimum(unit_claim * environment_max, 1.0)
+    mean = float(np.dot(p, l_payout))
+    sd = math.sqrt(float(np.dot(p * (1.0 - p), l_payout * l_payout)))
+    exposure = float(l_payout.sum())
+    return max(min(mean + 10.0 * sd, exposure), 1.0)
+
+# --- Simulation driver ---
+
+def simulate_portfolio_losses(
+    policies,
+    trials: int,
+    seed: int = 0,
+    chunk_trials: int = CHUNK_TRIALS_DEFAULT,
+    m_econ_sd: float = M_ECON_SD_DEFAULT,
+    i_ai_sd: float = I_AI_SD_DEFAULT,
+    environment_correlation: float = 0.0,
+    bins: int = HISTOGRAM_BINS_DEFAULT,
+    quantiles=QUANTILES_DEFAULT,
+    beta_systemic: float = BETA_SYSTEMIC_DEFAULT,
+    beta_individual: float = BETA_INDIVIDUAL_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    **parameters
+) -> dict:
+    """
+    Simulates `trials` years of annual losses for the whole book.
+    `policies` is anything price_policies accepts; extra keyword arguments are
+    passed to it. Trials are generated in blocks of SIMULATION_BLOCK_TRIALS and
+    aggregated every `chunk_trials` trials, which bounds memory but does not
+    change the results for a given seed.
+    Returns the StreamingLossAggregate summary plus the analytic expected loss
+    of the book (sum of E[Loss] at the pricing environment).
+    """
+    priced = price_policies(
+        policies, beta_systemic=beta_systemic, beta_individual=beta_individual,
+        w_econ=w_econ, w_inno=w_inno, **parameters
+    )
+    betas = resolve_parameters(policy_columns(policies), beta_systemic=beta_systemic, beta_individual=beta_individual)
+    unit_claim = np.broadcast_to(
+        (priced["h_base_t"] / 100.0 * betas["beta_systemic"]) * (priced["v_i"] / 100.0 * betas["beta_individual"]),
+        priced["p_claim"].shape,
+    ).ravel()
+    l_payout = priced["l_payout"].ravel()
+
+    environment_max = w_econ * POLICY_INPUT_RANGES["economic_climate_modifier"][1] + w_inno * POLICY_INPUT_RANGES["ai_innovation_index"][1]
+    aggregate = StreamingLossAggregate(histogram_upper_bound(unit_claim, l_payout, environment_max), bins)
+    blocks_per_chunk = max(1, chunk_trials // SIMULATION_BLOCK_TRIALS)
+    blocks = -(-trials // SIMULATION_BLOCK_TRIALS)
+    for first in range(0, blocks, blocks_per_chunk):
+        chunk = []
+        for block in range(first, min(first + blocks_per_chunk, blocks)):
+            size = min(SIMULATION_BLOCK_TRIALS, trials - block * SIMULATION_BLOCK_TRIALS)
+            rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(block,))))
+            m_econ, i_ai = draw_environment(rng, size, m_econ_sd, i_ai_sd, environment_correlation)
+            chunk.append(draw_block_losses(rng, unit_claim, l_payout, w_econ * m_econ + w_inno * i_ai))
+        aggregate.update(np.concatenate(chunk))
+
+    summary = aggregate.summary(quantiles)
+    summary["expected_loss_analytic"] = float(priced["e_loss"].sum())
+    return summary
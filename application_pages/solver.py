@@ -0,0 +1,223 @@
+import numpy as np
+
+from application_pages.data_lookups import (
+    W_CR_DEFAULT, W_US_DEFAULT, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    GAMMA_GEN_DEFAULT, GAMMA_SPEC_DEFAULT, POLICY_INPUT_RANGES
+)
+from application_pages.batch_calculations import (
+    require_policy_columns, resolve_parameters, price_policies, column_factors,
+    calculate_upskilling_factor_batch, calculate_idiosyncratic_risk_batch,
+    interpolate_occupational_hazard_batch, calculate_systematic_risk_batch,
+    calculate_total_payout_batch, calculate_annual_claim_probability_batch,
+    calculate_final_monthly_premium_batch
+)
+from application_pages.factor_tables import CompiledFactorTables
+
+# Inverse pricing: for every policy in a book, the value of one input that
+# brings its monthly premium down to a target. With non-negative weights the
+# float pipeline is monotone in each solved input (every step is a correctly
+# rounded monotone operation, and the V_i and P_min clamps are min/max), so
+# the values meeting a target form one interval of the input's range:
+#
+#   1. pricing both ends of the range decides "already met" and "infeasible"
+#   2. an analytic inverse of the formulas, ignoring rounding, estimates the
+#      boundary
+#   3. bisection over float64 bit patterns, started a few ulps around the
+#      estimate, finds the exact boundary by re-pricing with the batch
+#      functions, so the answer is the first float that prices at or below
+#      the target even on the clamps
+#
+# Transition months are whole numbers, so each month in range is priced.
+
+BRACKET_ULPS = 64 # half-width of the initial bracket around the estimate
+
+def first_true(predicate, low, high, estimate) -> np.ndarray:
+    """
+    For each row, the smallest float64 x in (low, high] with predicate(x) True.
+    `predicate` maps an array of x (one per row) to booleans and must be
+    monotone in x, False at `low` and True at `high` (both non-negative).
+    `estimate` only narrows the search; the result is exact regardless.
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    # Non-negative floats order like their int64 bit patterns
+    lo = np.broadcast_to(low, np.shape(estimate)).view(np.int64).copy()
+    hi = np.broadcast_to(high, np.shape(estimate)).view(np.int64).copy()
+    guess = np.clip(np.where(np.isfinite(estimate), estimate, low), low, high).view(np.int64)
+    for probe in (guess - BRACKET_ULPS, guess + BRACKET_ULPS):
+        probe = np.clip(probe, lo, hi)
+        ok = predicate(probe.view(np.float64))
+        hi = np.where(ok, probe, hi)
+        lo = np.where(ok, lo, probe)
+    while True:
+        active = hi - lo > 1
+        if not active.any():
+            return hi.view(np.float64)
+        mid = lo + (hi - lo) // 2
+        ok = predicate(mid.view(np.float64))
+        hi = np.where(active & ok, mid, hi)
+        lo = np.where(active & ~ok, mid, lo)
+
+def _book_stages(policies, target_premium, weights: dict, tables, parameters: dict) -> tuple:
+    """
+    (priced stages, resolved parameters, target) for a book, every value
+    broadcast to one entry per policy.
+    """
+    columns = require_policy_columns(policies)
+    stages = price_policies(columns, tables=tables, **weights, **parameters)
+    resolved = resolve_parameters(columns, **parameters)
+    n = max([np.size(values) for values in stages.values()] + [np.size(target_premium)])
+
+    def per_policy(value):
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+
+    stages = {name: per_policy(values) for name, values in stages.items()}
+    resolved = {name: per_policy(value) for name, value in resolved.items()}
+    resolved.update({name: per_policy(columns[name]) for name in ("general_upskilling_progress", "firm_specific_upskilling_progress", "annual_salary", "coverage_duration_months")})
+    resolved["current_industry"] = per_policy(column_factors("current_industry", columns["current_industry"], tables))
+    resolved["target_industry"] = per_policy(column_factors("target_industry", columns["target_industry"], tables))
+    return stages, resolved, per_policy(target_premium)
+
+def _solution(value, premium, target, p_min, unreachable: str) -> dict:
+    """
+    Solver output: {"value", "premium", "feasible", "reason"}, NaN value and
+    premium for infeasible policies, whose reason says why ("" if feasible).
+    """
+    feasible = ~np.isnan(value)
+    reason = np.full(value.shape, "", dtype=object)
+    reason[~feasible] = unreachable
+    reason[~feasible & (target < p_min)] = "target is below the minimum premium"
+    return {"value": value, "premium": np.where(feasible, premium, np.nan), "feasible": feasible, "reason": reason}
+
+def required_upskilling(
+    policies,
+    target_premium,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    The minimum general upskilling progress (0-100%) at which each policy's
+    premium is at most `target_premium` (a scalar or one per policy), all
+    other inputs unchanged. `policies` is anything price_policies accepts.
+    Returns {"value", "premium" (at that value), "feasible", "reason"}.
+    """
+    weights = {"w_cr": w_cr, "w_us": w_us, "w_econ": w_econ, "w_inno": w_inno, "gamma_gen": gamma_gen, "gamma_spec": gamma_spec}
+    stages, inputs, target = _book_stages(policies, target_premium, weights, tables, parameters)
+    low, high = POLICY_INPUT_RANGES["general_upskilling_progress"]
+
+    def premium_at(progress, rows):
+        # price_policies from F_US onward
+        f_us = calculate_upskilling_factor_batch(progress, inputs["firm_specific_upskilling_progress"][rows], gamma_gen, gamma_spec)
+        v_i = calculate_idiosyncratic_risk_batch(stages["f_hc"][rows], stages["f_cr"][rows], f_us, w_cr, w_us)
+        p_claim = calculate_annual_claim_probability_batch(stages["h_i"][rows], v_i, inputs["beta_systemic"][rows], inputs["beta_individual"][rows])
+        return calculate_final_monthly_premium_batch(p_claim * stages["l_payout"][rows], inputs["lambda_factor"][rows], inputs["p_min"][rows])
+
+    every = slice(None)
+    at_low = premium_at(np.full(target.shape, float(low)), every)
+    at_high = premium_at(np.full(target.shape, float(high)), every)
+    value = np.where(at_low <= target, float(low), np.nan)
+    search = np.flatnonzero((at_high <= target) & ~(at_low <= target))
+    if search.size:
+        with np.errstate(all="ignore"):
+            # Invert P_monthly -> P_claim -> V_i -> V_raw -> F_US -> P_gen
+            v_i = target * 12.0 / inputs["lambda_factor"] / stages["l_payout"] / (stages["h_i"] / 100.0 * inputs["beta_systemic"]) / inputs["beta_individual"] * 100.0
+            f_us = ((v_i + 50.0) / stages["f_hc"] - w_cr * stages["f_cr"]) / w_us
+            estimate = (1 - f_us - gamma_spec * inputs["firm_specific_upskilling_progress"] / 100.0) / gamma_gen * 100.0
+        value[search] = first_true(
+            lambda progress: premium_at(progress, search) <= target[search],
+            low, high, estimate[search],
+        )
+    premium = premium_at(np.where(np.isnan(value), low, value), every)
+    return _solution(value, premium, target, inputs["p_min"], "target not reached even at 100% general upskilling")
+
+def maximum_coverage(
+    policies,
+    target_premium,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    The maximum coverage percentage (10-75%) at which each policy's premium is
+    at most `target_premium`, all other inputs unchanged.
+    Returns {"value", "premium" (at that value), "feasible", "reason"}.
+    """
+    weights = {"w_cr": w_cr, "w_us": w_us, "w_econ": w_econ, "w_inno": w_inno, "gamma_gen": gamma_gen, "gamma_spec": gamma_spec}
+    stages, inputs, target = _book_stages(policies, target_premium, weights, tables, parameters)
+    low, high = POLICY_INPUT_RANGES["coverage_percentage"]
+
+    def premium_at(coverage, rows):
+        # price_policies from L_payout onward
+        l_payout = calculate_total_payout_batch(inputs["annual_salary"][rows], coverage, inputs["coverage_duration_months"][rows])
+        return calculate_final_monthly_premium_batch(stages["p_claim"][rows] * l_payout, inputs["lambda_factor"][rows], inputs["p_min"][rows])
+
+    every = slice(None)
+    at_low = premium_at(np.full(target.shape, float(low)), every)
+    at_high = premium_at(np.full(target.shape, float(high)), every)
+    value = np.where(at_high <= target, float(high), np.nan)
+    search = np.flatnonzero((at_low <= target) & ~(at_high <= target))
+    if search.size:
+        with np.errstate(all="ignore"):
+            # Invert P_monthly -> E[Loss] -> L_payout -> coverage
+            estimate = target * 12.0 / inputs["lambda_factor"] / stages["p_claim"] / (inputs["annual_salary"] / 12.0 * inputs["coverage_duration_months"]) * 100.0
+        # The first coverage priced above the target, then one float back
+        above = first_true(
+            lambda coverage: ~(premium_at(coverage, search) <= target[search]),
+            low, high, estimate[search],
+        )
+        value[search] = np.nextafter(above, -np.inf)
+    premium = premium_at(np.where(np.isnan(value), low, value), every)
+    return _solution(value, premium, target, inputs["p_min"], "target not reached even at 10% coverage")
+
+def required_transition_months(
+    policies,
+    target_premium,
+    max_months: int | None = None,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    The fewest whole months into the career transition (0..max_months,
+    default 24) at which each policy's premium is at most `target_premium`.
+    Returns {"value", "premium" (at that month), "feasible", "reason"}.
+    """
+    weights = {"w_cr": w_cr, "w_us": w_us, "w_econ": w_econ, "w_inno": w_inno, "gamma_gen": gamma_gen, "gamma_spec": gamma_spec}
+    stages, inputs, target = _book_stages(policies, target_premium, weights, tables, parameters)
+    max_months = POLICY_INPUT_RANGES["months_elapsed_transition"][1] if max_months is None else max_months
+
+    value = np.full(target.shape, np.nan)
+    premium = np.full(target.shape, np.nan)
+    for month in range(max_months + 1):
+        # price_policies from H_base(k) onward
+        h_base_t = interpolate_occupational_hazard_batch(inputs["current_industry"], inputs["target_industry"], month, inputs["ttv_period"])
+        h_i = calculate_systematic_risk_batch(h_base_t, inputs["economic_climate_modifier"], inputs["ai_innovation_index"], w_econ, w_inno)
+        p_claim = calculate_annual_claim_probability_batch(h_i, stages["v_i"], inputs["beta_systemic"], inputs["beta_individual"])
+        at_month = calculate_final_monthly_premium_batch(p_claim * stages["l_payout"], inputs["lambda_factor"], inputs["p_min"])
+        met = np.isnan(value) & (at_month <= target)
+        value[met] = month
+        premium[met] = at_month[met]
+    return _solution(value, premium, target, inputs["p_min"], f"target not reached within {max_months} months")
+
+# Solvable input -> solver
+SOLVERS = {
+    "general_upskilling_progress": required_upskilling,
+    "coverage_percentage": maximum_coverage,
+    "months_elapsed_transition": required_transition_months,
+}
@@ -0,0 +1,54 @@
+import numpy as np
+
+from application_pages.data_lookups import (
+    ROLE_MULTIPLIERS, EDUCATION_LEVEL_FACTORS, EDUCATION_FIELD_FACTORS,
+    SCHOOL_TIER_FACTORS, COMPANY_RISK_FACTORS, INDUSTRY_HAZARDS,
+    POLICY_INPUT_RANGES
+)
+from application_pages.batch_calculations import PARAMETER_DEFAULTS
+from application_pages.factor_tables import default_factor_tables, encode_column
+
+# Reproducible random policy books for benchmarks, load tests and demos. Every
+# value is one the sidebar could produce: known category labels, whole-step
+# sliders, and salaries on the $5,000 number-input grid.
+
+CATEGORY_CHOICES = {
+    "job_role": tuple(ROLE_MULTIPLIERS),
+    "education_level": tuple(EDUCATION_LEVEL_FACTORS),
+    "education_field": tuple(EDUCATION_FIELD_FACTORS),
+    "school_tier": tuple(SCHOOL_TIER_FACTORS),
+    "company_type": tuple(COMPANY_RISK_FACTORS),
+    "current_industry": tuple(INDUSTRY_HAZARDS),
+    "target_industry": tuple(INDUSTRY_HAZARDS),
+}
+# Inputs drawn as whole numbers across their range
+INTEGER_INPUTS = (
+    "years_experience", "general_upskilling_progress", "firm_specific_upskilling_progress",
+    "coverage_percentage", "coverage_duration_months", "months_elapsed_transition",
+)
+SALARY_STEP = 5000.0
+
+def synthetic_policies(n: int, seed: int = 0, codes: bool = False, parameters: bool = False) -> dict:
+    """
+    A random book of `n` policies as a dict of column arrays, accepted by
+    price_policies (wrap it in pd.DataFrame for a table).
+    With `codes`, categorical columns hold int16 codes of default_factor_tables()
+    instead of labels. With `parameters`, every PARAMETER_DEFAULTS column is
+    also drawn per policy, uniformly over its sidebar range.
+    """
+    rng = np.random.default_rng(seed)
+    book = {}
+    for name, choices in CATEGORY_CHOICES.items():
+        drawn = rng.integers(0, len(choices), n)
+        labels = np.array(choices, dtype=object)
+        book[name] = encode_column(default_factor_tables(), name, labels)[drawn] if codes else labels[drawn]
+    for name in INTEGER_INPUTS:
+        low, high = POLICY_INPUT_RANGES[name]
+        book[name] = rng.integers(low, high + 1, n).astype(np.float64)
+    low, high = POLICY_INPUT_RANGES["annual_salary"]
+    book["annual_salary"] = low + SALARY_STEP * rng.integers(0, int((high - low) // SALARY_STEP) + 1, n)
+    if parameters:
+        for name in PARAMETER_DEFAULTS:
+            low, high = POLICY_INPUT_RANGES[name]
+            book[name] = rng.integers(low, high + 1, n).astype(np.float64) if name == "ttv_period" else rng.uniform(low, high, n)
+    return book
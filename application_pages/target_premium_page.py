@@ -0,0 +1,46 @@
+import math
+
+import streamlit as st
+
+from application_pages import instrumentation
+from application_pages.app_stages import target_premium_stage
+
+# Solved input -> (metric label, how the exact threshold snaps to the sidebar's
+# whole steps without leaving the feasible side, unit)
+TARGET_INPUTS = {
+    "general_upskilling_progress": ("Minimum General Upskilling", math.ceil, "%"),
+    "coverage_percentage": ("Maximum Coverage", math.floor, "%"),
+    "months_elapsed_transition": ("Months Into Transition", int, " months"),
+}
+
+@st.fragment
+def render_target_premium_section(profile: dict, p_monthly: float):
+    """
+    Renders the Target Premium section: for a premium the user wants to reach,
+    the general upskilling, coverage or transition months that get there with
+    every other input at its sidebar value. As a fragment, changing the target
+    reruns only this section.
+    """
+    st.markdown("## Target Premium")
+    st.markdown("""
+    Enter the monthly premium you want to reach. For each input below, the solver finds the value that gets you there with every other input held at your sidebar values:
+    the least general upskilling, the most coverage, or the fewest months into your career transition.
+    """)
+    # No upper bound: the premium itself is unbounded (salary, coverage and λ can push it past $1,000)
+    target = st.number_input(
+        "Target Monthly Premium ($)", min_value=0.0,
+        value=float(max(math.floor(p_monthly) - 5, profile["p_min"], 0.0)), step=1.0, format="%.2f", key="target_premium",
+    )
+
+    with instrumentation.stage("app.render.target_premium"):
+        solutions = target_premium_stage(profile, target)
+        for column, (name, solution) in zip(st.columns(len(TARGET_INPUTS)), solutions.items()):
+            label, snap, unit = TARGET_INPUTS[name]
+            with column:
+                if not solution["feasible"]:
+                    st.metric(label, "Not reachable")
+                    st.caption(solution["reason"].capitalize() + ".")
+                    continue
+                value = snap(solution["value"])
+                st.metric(label, f"{value}{unit}", delta=f"{value - profile[name]:+g} from your current value", delta_color="off")
+                st.caption(f"Exact threshold {solution['value']:.4g}{unit}, premium there ${solution['premium']:.2f}.")
@@ -0,0 +1,93 @@
+import numpy as np
+
+from application_pages.data_lookups import (
+    W_CR_DEFAULT, W_US_DEFAULT, W_ECON_DEFAULT, W_INNO_DEFAULT,
+    GAMMA_GEN_DEFAULT, GAMMA_SPEC_DEFAULT
+)
+from application_pages.batch_calculations import (
+    require_policy_columns, resolve_parameters, column_factors,
+    calculate_human_capital_factor_batch, calculate_company_risk_factor_batch,
+    calculate_upskilling_factor_batch, calculate_idiosyncratic_risk_batch,
+    interpolate_occupational_hazard_batch, calculate_systematic_risk_batch,
+    calculate_total_payout_batch, calculate_annual_claim_probability_batch,
+    calculate_final_monthly_premium_batch
+)
+from application_pages.factor_tables import CompiledFactorTables
+
+# Month-by-month premium paths over a career transition. Only H_base(k) depends
+# on the month, so F_HC, F_CR, F_US, V_i(t) and L_payout are computed once per
+# policy and the month axis is added by broadcasting from H_base onward.
+
+TRAJECTORY_MONTHS_DEFAULT = 24
+
+# Outputs that vary with the month (shape policies x months)
+TRAJECTORY_COLUMNS = ("h_base_t", "h_i", "p_claim", "e_loss", "p_monthly")
+# Outputs fixed over the transition (shape policies)
+INVARIANT_COLUMNS = ("f_hc", "f_cr", "f_us", "v_i", "l_payout")
+
+def premium_trajectories(
+    policies,
+    months=None,
+    w_cr: float = W_CR_DEFAULT,
+    w_us: float = W_US_DEFAULT,
+    w_econ: float = W_ECON_DEFAULT,
+    w_inno: float = W_INNO_DEFAULT,
+    gamma_gen: float = GAMMA_GEN_DEFAULT,
+    gamma_spec: float = GAMMA_SPEC_DEFAULT,
+    tables: CompiledFactorTables | None = None,
+    **parameters
+) -> dict:
+    """
+    Computes each policy's premium path over transition months k.
+
+    `policies` is anything price_policies accepts (its months_elapsed_transition
+    column is ignored); `months` defaults to k = 0..TRAJECTORY_MONTHS_DEFAULT.
+    TTV comes from a ttv_period column or keyword, so it can differ per policy.
+    Row i, column j of every TRAJECTORY_COLUMNS output equals what
+    price_policies gives for policy i with months_elapsed_transition = months[j].
+    Returns {"months": months, TRAJECTORY_COLUMNS: (n, m), INVARIANT_COLUMNS: (n,)}.
+    """
+    columns = require_policy_columns(policies)
+    parameters = resolve_parameters(columns, **parameters)
+    months = np.arange(TRAJECTORY_MONTHS_DEFAULT + 1) if months is None else np.asarray(months)
+
+    # Month-invariant stages, once per policy
+    f_hc = calculate_human_capital_factor_batch(
+        columns["job_role"], columns["education_level"], columns["education_field"],
+        columns["school_tier"], columns["years_experience"], tables
+    )
+    f_cr = calculate_company_risk_factor_batch(columns["company_type"], tables)
+    f_us = calculate_upskilling_factor_batch(
+        columns["general_upskilling_progress"], columns["firm_specific_upskilling_progress"],
+        gamma_gen, gamma_spec
+    )
+    v_i = calculate_idiosyncratic_risk_batch(f_hc, f_cr, f_us, w_cr, w_us)
+    l_payout = calculate_total_payout_batch(
+        columns["annual_salary"], columns["coverage_percentage"], columns["coverage_duration_months"]
+    )
+    h_current = column_factors("current_industry", columns["current_industry"], tables)
+    h_target = column_factors("target_industry", columns["target_industry"], tables)
+
+    invariant = dict(zip(INVARIANT_COLUMNS, (f_hc, f_cr, f_us, v_i, l_payout)))
+    n = max(np.size(value) for value in list(invariant.values()) + [h_current, h_target])
+    invariant = {name: np.broadcast_to(value, (n,)).copy() for name, value in invariant.items()}
+
+    def per_policy(value):
+        # (n,) or scalar -> (n, 1), so it broadcasts against the month axis
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))[:, None]
+
+    # Month-dependent stages, (policies x months) in one pass
+    h_base_t = interpolate_occupational_hazard_batch(
+        per_policy(h_current), per_policy(h_target), months[None, :], per_policy(parameters["ttv_period"])
+    )
+    h_i = calculate_systematic_risk_batch(
+        h_base_t, per_policy(parameters["economic_climate_modifier"]), per_policy(parameters["ai_innovation_index"]),
+        w_econ, w_inno
+    )
+    p_claim = calculate_annual_claim_probability_batch(
+        h_i, invariant["v_i"][:, None], per_policy(parameters["beta_systemic"]), per_policy(parameters["beta_individual"])
+    )
+    e_loss = p_claim * invariant["l_payout"][:, None]
+    p_monthly = calculate_final_monthly_premium_batch(e_loss, per_policy(parameters["lambda_factor"]), per_policy(parameters["p_min"]))
+
+    return dict(invariant, months=months, **dict(zip(TRAJECTORY_COLUMNS, (h_base_t, h_i, p_claim, e_loss, p_monthly))))
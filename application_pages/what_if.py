@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from application_pages.data_lookups import POLICY_INPUT_RANGES
+from application_pages.batch_calculations import (
+    CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, PARAMETER_DEFAULTS, price_policies
+)
+
+# What-if sweeps: evaluate the pricing pipeline for one profile over a grid of
+# one to three varying inputs in a single vectorized pass. Each axis becomes a
+# broadcast dimension, so an n x m grid costs one price_policies call over
+# n*m cells instead of n*m reruns. Surfaces are memoized by parameter set in
+# a least-recently-used cache bounded by bytes, not entries: a 3-axis sweep at
+# 100 points holds 1e6 cells x 10 outputs (80 MB), so an entry count alone
+# could pin gigabytes across sessions.
+
+# Inputs that can be swept, with the sidebar label used for axis titles
+SWEEP_PARAMETERS = {
+    "general_upskilling_progress": "General Skills Upskilling Progress (%)",
+    "firm_specific_upskilling_progress": "Firm-Specific Skills Upskilling Progress (%)",
+    "years_experience": "Years of Experience",
+    "months_elapsed_transition": "Months Elapsed Since Transition (k)",
+    "economic_climate_modifier": "Economic Climate Modifier (M_econ)",
+    "ai_innovation_index": "AI Innovation Index (I_AI)",
+    "coverage_percentage": "Coverage Percentage (%)",
+    "coverage_duration_months": "Coverage Duration (Months)",
+    "annual_salary": "Annual Salary ($)",
+    "beta_systemic": "Systemic Event Base Probability (β_systemic)",
+    "beta_individual": "Individual Loss Base Probability (β_individual)",
+    "lambda_factor": "Loading Factor (λ)",
+    "p_min": "Minimum Premium (P_min)",
+}
+# Inputs the sidebar only offers in whole steps
+INTEGER_SWEEP_PARAMETERS = {
+    "general_upskilling_progress", "firm_specific_upskilling_progress",
+    "years_experience", "months_elapsed_transition",
+    "coverage_percentage", "coverage_duration_months",
+}
+MAX_SWEEP_AXES = 3
+SWEEP_CACHE_BYTES = 256 * 1024 * 1024 # sweeps larger than this are never cached
+
+_sweep_cache = OrderedDict() # (profile, axes) -> results, least recently used first
+_sweep_cache_lock = threading.Lock()
+
+def sweep_axis(name: str, points: int = 101) -> np.ndarray:
+    """
+    Evenly spaced values covering the valid range of a sweepable input,
+    rounded to whole steps (and de-duplicated) for integer inputs.
+    """
+    low, high = POLICY_INPUT_RANGES[name]
+    values = np.linspace(low, high, points)
+    if name in INTEGER_SWEEP_PARAMETERS:
+        values = np.unique(np.round(values))
+    return values
+
+def _sweep(profile: tuple, axes: tuple) -> dict:
+    key = (profile, axes)
+    with _sweep_cache_lock:
+        if key in _sweep_cache:
+            _sweep_cache.move_to_end(key)
+            return _sweep_cache[key]
+    columns = {name: np.asarray(value) for name, value in profile}
+    for position, (name, values) in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[position] = len(values)
+        columns[name] = np.asarray(values, dtype=np.float64).reshape(shape)
+    results = price_policies(columns)
+    for values in results.values():
+        values.flags.writeable = False # shared between cache hits
+    size = sweep_nbytes(results)
+    with _sweep_cache_lock:
+        if size <= SWEEP_CACHE_BYTES:
+            _sweep_cache[key] = results
+            while sum(sweep_nbytes(cached) for cached in _sweep_cache.values()) > SWEEP_CACHE_BYTES:
+                _sweep_cache.popitem(last=False)
+    return results
+
+def sweep_nbytes(results: dict) -> int:
+    """
+    Bytes held by a sweep's output arrays.
+    """
+    return sum(values.nbytes for values in results.values())
+
+def sweep_premium(profile: dict, axes: dict) -> dict:
+    """
+    Evaluates the pipeline for `profile` (one value per input, as collected by
+    the sidebar) over the grid spanned by `axes`, an ordered mapping of up to
+    MAX_SWEEP_AXES names from SWEEP_PARAMETERS to 1-D value arrays.
+    Returns every price_policies output as an array of shape
+    (len(axis 1), len(axis 2), ...). Results are cached and read-only.
+    """
+    if not 1 <= len(axes) <= MAX_SWEEP_AXES:
+        raise ValueError(f"A sweep takes 1 to {MAX_SWEEP_AXES} axes, got {len(axes)}")
+    unknown = [name for name in axes if name not in SWEEP_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Cannot sweep {', '.join(unknown)}; choose from {', '.join(SWEEP_PARAMETERS)}")
+    inputs = CATEGORICAL_COLUMNS + NUMERIC_COLUMNS + tuple(PARAMETER_DEFAULTS)
+    frozen_profile = tuple(sorted(
+        (name, value.item() if isinstance(value, np.generic) else value)
+        for name, value in profile.items() if name in inputs and name not in axes
+    ))
+    frozen_axes = tuple((name, tuple(np.asarray(values, dtype=np.float64).tolist())) for name, values in axes.items())
+    return _sweep(frozen_profile, frozen_axes)
+
+def clear_sweep_cache():
+    with _sweep_cache_lock:
+        _sweep_cache.clear()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import streamlit as st
+
+from application_pages import instrumentation
+from application_pages.what_if import (
+    SWEEP_PARAMETERS, MAX_SWEEP_AXES, sweep_axis, sweep_premium
+)
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Outputs that can be plotted as a surface
+SURFACE_OUTPUTS = {
+    "p_monthly": "Monthly Premium ($)",
+    "e_loss": "Annual Expected Loss ($)",
+    "p_claim": "Annual Claim Probability",
+    "l_payout": "Total Payout Amount ($)",
+    "v_i": "Idiosyncratic Risk (V_i)",
+    "h_i": "Systematic Risk (H_i)",
+}
+
+def build_surface_figure(surface: np.ndarray, axes: dict, output: str, profile: dict) -> go.Figure:
+    """
+    A line chart for one swept input, a heatmap for two. The current sidebar
+    profile is marked on the chart.
+    """
+    import plotly.graph_objects as go
+    names = list(axes)
+    x = axes[names[0]]
+    if len(names) == 1:
+        fig = go.Figure(go.Scatter(x=x, y=surface, mode="lines", name=SURFACE_OUTPUTS[output]))
+        fig.add_vline(x=profile[names[0]], line_dash="dash", line_color="red")
+        fig.update_layout(yaxis_title=SURFACE_OUTPUTS[output])
+    else:
+        y = axes[names[1]]
+        fig = go.Figure(go.Heatmap(x=x, y=y, z=surface.T, colorscale="Viridis", colorbar={"title": SURFACE_OUTPUTS[output]}))
+        fig.add_trace(go.Scatter(
+            x=[profile[names[0]]], y=[profile[names[1]]], mode="markers",
+            marker={"color": "red", "size": 12, "symbol": "x"}, name="Your profile",
+        ))
+        fig.update_layout(yaxis_title=SWEEP_PARAMETERS[names[1]])
+    fig.update_layout(xaxis_title=SWEEP_PARAMETERS[names[0]], margin=dict(l=20, r=20, t=30, b=20))
+    return fig
+
+@st.fragment
+def render_what_if_section(profile: dict):
+    """
+    Renders the What-If Explorer: the premium (or another output) over a grid of
+    up to three inputs around the current sidebar profile. As a fragment, its
+    own widgets rerun only this section, not the whole page.
+    """
+    st.markdown("## What-If Explorer")
+    st.markdown("""
+    Instead of moving one slider at a time, pick up to three inputs and see how the premium responds across their whole range at once.
+    All other inputs stay at your sidebar values; your current profile is marked in red.
+    """)
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        params = st.multiselect(
+            "Inputs to sweep", options=list(SWEEP_PARAMETERS),
+            default=["general_upskilling_progress", "months_elapsed_transition"],
+            max_selections=MAX_SWEEP_AXES, format_func=SWEEP_PARAMETERS.get, key="what_if_params",
+        )
+    with col2:
+        output = st.selectbox("Output", options=list(SURFACE_OUTPUTS), format_func=SURFACE_OUTPUTS.get, key="what_if_output")
+    with col3:
+        resolution = st.slider("Grid points per axis", min_value=10, max_value=100, value=50, step=10, key="what_if_resolution")
+
+    if not params:
+        st.info("Select at least one input to sweep.")
+        return
+
+    axes = {name: sweep_axis(name, resolution) for name in params}
+    with instrumentation.stage("app.what_if.sweep", int(np.prod([len(values) for values in axes.values()]))):
+        surface = sweep_premium(profile, axes)[output]
+    if len(params) == 3:
+        third = params[2]
+        values = axes.pop(third)
+        index = st.select_slider(
+            SWEEP_PARAMETERS[third], options=list(range(len(values))),
+            value=int(np.abs(values - profile[third]).argmin()),
+            format_func=lambda i: f"{values[i]:g}", key="what_if_slice",
+        )
+        surface = surface[:, :, index]
+    with instrumentation.stage("app.render.what_if"):
+        st.plotly_chart(build_surface_figure(surface, axes, output, profile), use_container_width=True)
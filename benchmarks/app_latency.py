@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+# Measures per-interaction rerun latency of the Streamlit app headlessly with
+# streamlit's AppTest harness. Each scenario steps one sidebar widget through
+# fresh values (so nothing downstream of it can be served from a cache) and
+# times the resulting reruns.
+#
+#   python benchmarks/app_latency.py --repeats 20
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# Scenario name -> (widget kind, widget label, list of values to step through)
+SCENARIOS = {
+    "p_min": ("number_input", "Minimum Premium ($P_{min}$)", [float(v) for v in range(0, 100)]),
+    "annual_salary": ("number_input", "Annual Salary ($)", [10000.0 + 5000.0 * i for i in range(98)]),
+    "general_upskilling": ("slider", "General Skills Upskilling Progress (%)", list(range(101))),
+    "economic_climate": ("slider", "Economic Climate Modifier ($M_{econ}$)", [round(0.5 + 0.05 * i, 2) for i in range(21)]),
+    "months_elapsed": ("slider", "Months Elapsed Since Transition ($k$)", list(range(25))),
+}
+
+def find_widget(app: AppTest, kind: str, label: str):
+    for widget in getattr(app.sidebar, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No sidebar {kind} labelled {label!r}")
+
+def measure(repeats: int = 20) -> dict:
+    """
+    Returns {scenario: {"median_ms", "p90_ms", "max_ms"}} plus the cold first run.
+    """
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    results = {"first_run": {"median_ms": (time.perf_counter() - start) * 1000.0}}
+    for name, (kind, label, values) in SCENARIOS.items():
+        timings = []
+        for i in range(repeats):
+            find_widget(app, kind, label).set_value(values[(i + 1) % len(values)])
+            start = time.perf_counter()
+            app.run()
+            timings.append((time.perf_counter() - start) * 1000.0)
+            if app.exception:
+                raise RuntimeError(app.exception[0].value)
+        timings.sort()
+        results[name] = {
+            "median_ms": statistics.median(timings),
+            "p90_ms": timings[int(0.9 * (len(timings) - 1))],
+            "max_ms": timings[-1],
+        }
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure Streamlit rerun latency per interaction.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args(argv)
+    results = measure(args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, stats in results.items():
+            print(f"{name:20s} " + "  ".join(f"{key}={value:8.1f}" for key, value in stats.items()))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold import cost of the pricing modules. Each module is imported in a fresh
+# interpreter (as a worker process or short-lived job would), timed with
+# perf_counter around the import alone, and checked for which heavy
+# dependencies it dragged in.
+#
+#   python benchmarks/import_time.py --repeats 10
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points, from the dependency-light core outwards
+MODULES = (
+    "application_pages.calculations",
+    "application_pages.batch_calculations",
+    "application_pages.parallel_pricing",
+    "application_pages.pricing_service",
+    "application_pages.bulk_pricing",
+    "application_pages.app_stages",
+)
+HEAVY_DEPENDENCIES = ("numpy", "pandas", "pyarrow", "streamlit", "plotly")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, *[name for name in {heavy!r} if name in sys.modules])
+"""
+
+def import_once(module: str) -> tuple:
+    """
+    (seconds, heavy dependencies loaded) for importing `module` in a new interpreter.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_DEPENDENCIES)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), output[1:]
+
+def measure(modules=MODULES, repeats: int = 10) -> dict:
+    """
+    {module: {"median_ms", "min_ms", "loads"}} over `repeats` cold imports each.
+    """
+    results = {}
+    for module in modules:
+        runs = [import_once(module) for _ in range(repeats)]
+        times = [seconds * 1000.0 for seconds, _ in runs]
+        results[module] = {"median_ms": statistics.median(times), "min_ms": min(times), "loads": runs[-1][1]}
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the pricing modules.")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to import (default: the pricing entry points)")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args(argv)
+    results = measure(args.modules, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            print(f"{module:<40} median={result['median_ms']:7.1f}ms  min={result['min_ms']:7.1f}ms  loads: {', '.join(result['loads']) or '-'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
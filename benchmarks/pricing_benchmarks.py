@@ -0,0 +1,333 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application_pages import calculations
+from application_pages.data_lookups import (
+    BETA_SYSTEMIC_DEFAULT, BETA_INDIVIDUAL_DEFAULT, LAMBDA_FACTOR_DEFAULT,
+    P_MIN_DEFAULT, M_ECON_DEFAULT, I_AI_DEFAULT, TTV_PERIOD_DEFAULT
+)
+from application_pages.batch_calculations import OUTPUT_COLUMNS, PARAMETER_DEFAULTS, price_policies
+from application_pages.cohorts import CohortBook
+from application_pages.bulk_pricing import CHUNK_SIZE_DEFAULT, peak_memory_mb, price_chunk
+from application_pages.parallel_pricing import ParallelPricer
+from application_pages.policy_store import PolicyStore
+from application_pages.priced_book import PricedBook
+from application_pages.synthetic_book import synthetic_policies
+from application_pages.trajectory import premium_trajectories
+
+# Benchmark and regression suite for the pricing pipeline. Three kinds of path
+# are measured, each reporting throughput, latency percentiles and peak traced
+# memory:
+#
+#   scalar        the calculations.py functions, one policy at a time
+#   app_sequence  the calculations behind one app.py rerun for one profile
+#   bulk_<rows>   price_policies over a synthetic book streamed in chunks
+#
+# A correctness cross-check then compares every fast path against the scalar
+# reference on a sample book, bit for bit. Results can be saved as a baseline
+# and later runs compared against it:
+#
+#   python benchmarks/pricing_benchmarks.py --save-baseline
+#   python benchmarks/pricing_benchmarks.py --compare --threshold 0.30
+#
+# The exit status is 1 if the cross-check finds a mismatch or a metric
+# regresses past the threshold, and 2 if there is no baseline to compare with.
+# Baselines are machine specific, so none is committed.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BULK_SIZES_DEFAULT = (10_000, 1_000_000, 10_000_000)
+SCALAR_POLICIES_DEFAULT = 20_000
+SCALAR_BATCH_POLICIES = 100
+APP_PROFILES_DEFAULT = 200
+MEMORY_SAMPLE_POLICIES = 200
+CROSS_CHECK_POLICIES = 2000
+REGRESSION_THRESHOLD_DEFAULT = 0.30
+REPEATS_DEFAULT = 3
+PERCENTILES = (50, 95, 99)
+
+# Metric -> direction in which a change is a regression
+REGRESSION_METRICS = {
+    "throughput_per_s": "lower",
+    "p50_ms": "higher",
+    "p95_ms": "higher",
+    "peak_memory_mb": "higher",
+}
+
+# --- Measurement helpers ---
+
+def summarize(timings: list, items: int) -> dict:
+    """
+    Throughput (items per second of measured time) and latency percentiles
+    (ms per timed call).
+    """
+    timings = np.asarray(timings)
+    summary = {"items": items, "throughput_per_s": items / timings.sum()}
+    for q, value in zip(PERCENTILES, np.percentile(timings * 1000.0, PERCENTILES)):
+        summary[f"p{q}_ms"] = float(value)
+    return summary
+
+def traced_peak_mb(work) -> float:
+    """
+    Peak memory traced by tracemalloc while `work()` runs, in MB.
+    """
+    tracemalloc.start()
+    try:
+        work()
+        return tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+    finally:
+        tracemalloc.stop()
+
+def profile_rows(book: dict) -> list:
+    """
+    The rows of a column book as dicts of native Python values, as the
+    sidebar would provide them.
+    """
+    n = len(next(iter(book.values())))
+    return [{name: values[i].item() if isinstance(values[i], np.generic) else values[i] for name, values in book.items()} for i in range(n)]
+
+def scalar_premium(row: dict) -> dict:
+    """
+    The scalar reference: the calculations.py pipeline for one policy.
+    """
+    f_hc = calculations.calculate_human_capital_factor(
+        row["job_role"], row["education_level"], row["education_field"], row["school_tier"], row["years_experience"]
+    )
+    f_cr = calculations.calculate_company_risk_factor(row["company_type"])
+    f_us = calculations.calculate_upskilling_factor(row["general_upskilling_progress"], row["firm_specific_upskilling_progress"])
+    v_i = calculations.calculate_idiosyncratic_risk(f_hc, f_cr, f_us)
+    h_base_t = calculations.calculate_base_occupational_hazard(
+        row["current_industry"], row["target_industry"], row["months_elapsed_transition"], row.get("ttv_period", TTV_PERIOD_DEFAULT)
+    )
+    h_i = calculations.calculate_systematic_risk(h_base_t, row.get("economic_climate_modifier", M_ECON_DEFAULT), row.get("ai_innovation_index", I_AI_DEFAULT))
+    l_payout = calculations.calculate_total_payout(row["annual_salary"], row["coverage_percentage"], row["coverage_duration_months"])
+    p_claim = calculations.calculate_annual_claim_probability(h_i, v_i, row.get("beta_systemic", BETA_SYSTEMIC_DEFAULT), row.get("beta_individual", BETA_INDIVIDUAL_DEFAULT))
+    e_loss = calculations.calculate_expected_loss(p_claim, l_payout)
+    p_monthly = calculations.calculate_final_monthly_premium(e_loss, row.get("lambda_factor", LAMBDA_FACTOR_DEFAULT), row.get("p_min", P_MIN_DEFAULT))
+    return dict(zip(OUTPUT_COLUMNS, (f_hc, f_cr, f_us, v_i, h_base_t, h_i, l_payout, p_claim, e_loss, p_monthly)))
+
+# --- Benchmarked paths ---
+
+def bench_scalar(policies: int, seed: int) -> dict:
+    rows = profile_rows(synthetic_policies(policies, seed))
+    for row in rows: # warm-up pass
+        scalar_premium(row)
+    # A single call is close to the timer resolution, so latency is taken per
+    # batch of SCALAR_BATCH_POLICIES policies and divided back down.
+    timings = []
+    for start in range(0, policies, SCALAR_BATCH_POLICIES):
+        batch = rows[start:start + SCALAR_BATCH_POLICIES]
+        began = time.perf_counter()
+        for row in batch:
+            scalar_premium(row)
+        timings.append((time.perf_counter() - began) / len(batch))
+    summary = summarize(timings, policies)
+    summary["throughput_per_s"] = 1.0 / np.mean(timings)
+    summary["peak_memory_mb"] = traced_peak_mb(lambda: [scalar_premium(row) for row in rows[:MEMORY_SAMPLE_POLICIES]])
+    return summary
+
+def bench_app_sequence(profiles: int, seed: int) -> dict:
+    # Import here: app_stages pulls in streamlit, which is only needed for this path
+    from streamlit.logger import set_log_level
+    set_log_level("error") # silence the "no runtime" cache warnings of bare mode
+    from application_pages.app_stages import idiosyncratic_stage, systematic_stage, premium_stage
+    from application_pages.sensitivity import premium_sensitivities, premium_attribution
+
+    def rerun(profile: dict):
+        # The uncached stage functions, called as app.py calls them
+        f_hc, f_cr, f_us, v_i = idiosyncratic_stage.__wrapped__(
+            profile["job_role"], profile["education_level"], profile["education_field"], profile["school_tier"],
+            profile["years_experience"], profile["company_type"],
+            profile["general_upskilling_progress"], profile["firm_specific_upskilling_progress"]
+        )
+        h_base_t, h_i = systematic_stage.__wrapped__(
+            profile["current_industry"], profile["target_industry"], profile["months_elapsed_transition"],
+            profile["economic_climate_modifier"], profile["ai_innovation_index"]
+        )
+        premium_stage.__wrapped__(
+            profile["annual_salary"], profile["coverage_percentage"], profile["coverage_duration_months"], h_i, v_i,
+            profile["beta_systemic"], profile["beta_individual"], profile["lambda_factor"], profile["p_min"]
+        )
+        premium_trajectories(profile)
+        premium_sensitivities(profile)
+        premium_attribution(profile)
+
+    book = synthetic_policies(profiles, seed, parameters=True)
+    del book["ttv_period"] # the app uses the default TTV
+    rows = profile_rows(book)
+    rerun(rows[0]) # warm imports and table compilation
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        rerun(row)
+        timings.append(time.perf_counter() - start)
+    summary = summarize(timings, profiles)
+    summary["peak_memory_mb"] = traced_peak_mb(lambda: [rerun(row) for row in rows[:MEMORY_SAMPLE_POLICIES]])
+    return summary
+
+def bench_bulk(rows: int, chunk_rows: int, seed: int) -> dict:
+    timings = []
+    for index, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = synthetic_policies(min(chunk_rows, rows - start), seed + index)
+        began = time.perf_counter()
+        price_policies(chunk)
+        timings.append(time.perf_counter() - began)
+    summary = summarize(timings, rows)
+    # Memory is bounded by the chunk, so one traced chunk (inputs included) is representative
+    summary["peak_memory_mb"] = traced_peak_mb(lambda: price_policies(synthetic_policies(min(chunk_rows, rows), seed)))
+    return summary
+
+# --- Correctness cross-check ---
+
+def cross_check(policies: int, seed: int, workers: int) -> dict:
+    """
+    Number of policies whose outputs differ from the scalar reference in any
+    bit, per fast path.
+    """
+    book = synthetic_policies(policies, seed, parameters=True)
+    reference = [scalar_premium(row) for row in profile_rows(book)]
+    expected = {name: np.array([row[name] for row in reference]) for name in OUTPUT_COLUMNS}
+
+    def mismatches(results: dict) -> int:
+        differs = np.zeros(policies, dtype=bool)
+        for name in OUTPUT_COLUMNS:
+            differs |= ~((results[name] == expected[name]) | (np.isnan(results[name]) & np.isnan(expected[name])))
+        return int(differs.sum())
+
+    checks = {
+        "price_policies": lambda: price_policies(book),
+        "price_policies_codes": lambda: price_policies(synthetic_policies(policies, seed, codes=True, parameters=True)),
+        "bulk_price_chunk": lambda: {name: values.to_numpy() for name, values in price_chunk(pd.DataFrame(book))[0].items()},
+        "priced_book": lambda: PricedBook.from_policies(book).outputs,
+        "cohort_book": lambda: CohortBook.from_policies(book).policy_outputs(),
+    }
+    if workers > 1:
+        def parallel():
+            with ParallelPricer(workers) as pricer:
+                return pricer.price(book)
+        checks["parallel_pricing"] = parallel
+    results = {name: mismatches(check()) for name, check in checks.items()}
+
+    # Trajectories: each policy's path at its own month
+    paths = premium_trajectories(book, months=np.arange(25))
+    month = book["months_elapsed_transition"].astype(np.int64)
+    trajectory = {name: paths[name][np.arange(policies), month] if paths[name].ndim == 2 else paths[name] for name in OUTPUT_COLUMNS}
+    results["premium_trajectories"] = mismatches(trajectory)
+
+    # Policy store: premiums only, priced with the default parameters
+    with tempfile.TemporaryDirectory() as path:
+        store = PolicyStore.create(path)
+        store.append(book)
+        store.price()
+        premiums = np.array([scalar_premium({name: value for name, value in row.items() if name not in PARAMETER_DEFAULTS})["p_monthly"] for row in profile_rows(book)])
+        results["policy_store"] = int(np.count_nonzero(store.premiums != premiums))
+    return results
+
+# --- Baseline comparison ---
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    One message per metric that moved in the wrong direction by more than
+    `threshold` (a fraction) relative to the baseline. Paths missing from
+    either side are skipped.
+    """
+    regressions = []
+    for path, metrics in results.items():
+        before = baseline.get(path)
+        if before is None:
+            continue
+        for metric, direction in REGRESSION_METRICS.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (direction == "higher" and change > threshold) or (direction == "lower" and -change > threshold):
+                regressions.append(f"{path}.{metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+def best_of(repeats: int, measure) -> dict:
+    """
+    The run with the highest throughput out of `repeats`, which filters out
+    interference from other load on the machine.
+    """
+    return max((measure() for _ in range(max(repeats, 1))), key=lambda summary: summary["throughput_per_s"])
+
+def run(args) -> dict:
+    benchmarks = {
+        "scalar": best_of(args.repeats, lambda: bench_scalar(args.scalar_policies, args.seed)),
+        "app_sequence": best_of(args.repeats, lambda: bench_app_sequence(args.app_profiles, args.seed)),
+    }
+    for rows in args.sizes:
+        benchmarks[f"bulk_{rows}"] = best_of(args.repeats, lambda: bench_bulk(rows, args.chunk_rows, args.seed))
+    return {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "chunk_rows": args.chunk_rows,
+            "repeats": args.repeats,
+            "process_peak_rss_mb": peak_memory_mb(),
+        },
+        "benchmarks": benchmarks,
+        "cross_check": cross_check(args.cross_check_policies, args.seed, args.workers),
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the pricing pipeline and check for regressions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BULK_SIZES_DEFAULT), help="Bulk book sizes in rows")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_SIZE_DEFAULT)
+    parser.add_argument("--scalar-policies", type=int, default=SCALAR_POLICIES_DEFAULT)
+    parser.add_argument("--app-profiles", type=int, default=APP_PROFILES_DEFAULT)
+    parser.add_argument("--cross-check-policies", type=int, default=CROSS_CHECK_POLICIES)
+    parser.add_argument("--workers", type=int, default=2, help="Workers for the parallel cross-check (0 or 1 skips it)")
+    parser.add_argument("--repeats", type=int, default=REPEATS_DEFAULT, help="Runs per path; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, metavar="PATH", help="Write results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD_DEFAULT, help="Allowed relative regression")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.compare and not os.path.exists(args.compare):
+        # Checked before the run, which can take minutes
+        print(f"No baseline at {args.compare}; record one on this machine with --save-baseline", file=sys.stderr)
+        return 2
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for path, stats in results["benchmarks"].items():
+            print(f"{path:18s} " + "  ".join(f"{key}={value:12.4g}" for key, value in stats.items() if key != "items"))
+        for path, count in results["cross_check"].items():
+            print(f"cross-check {path:22s} {'ok' if count == 0 else f'{count} mismatching policies'}")
+
+    failed = any(results["cross_check"].values())
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["benchmarks"]
+        regressions = find_regressions(results["benchmarks"], baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+        failed = failed or bool(regressions)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump(results, handle, indent=2)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application_pages.synthetic_book import synthetic_policies
+
+# Load test for the local pricing service. Starts the service in a subprocess
+# (or targets a running one with --port), opens many keep-alive connections
+# that each send single quotes back to back, and reports throughput, latency
+# percentiles and status counts, plus the service's own queue-to-result
+# latency from /stats.
+#
+#   python benchmarks/service_load.py --connections 64 --requests 50000
+#   python benchmarks/service_load.py --port 8765 --batch-size 1000 --requests 200
+
+HOST = "127.0.0.1"
+QUOTE_BODIES = 1000 # distinct synthetic quotes cycled through
+
+def request_bytes(path: str, payload) -> bytes:
+    body = json.dumps(payload).encode()
+    return (
+        f"POST {path} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+
+async def read_response(reader: asyncio.StreamReader) -> tuple:
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def get_json(port: int, path: str) -> dict:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n".encode())
+    _, body = await read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+async def client(port: int, requests: list, count: int, latencies: list, statuses: dict):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    for i in range(count):
+        start = time.perf_counter()
+        writer.write(requests[i % len(requests)])
+        status, _ = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+async def load(port: int, connections: int, total: int, batch_size: int) -> dict:
+    book = {name: values.tolist() for name, values in synthetic_policies(QUOTE_BODIES, seed=1).items()}
+    quotes = [{name: values[i] for name, values in book.items()} for i in range(QUOTE_BODIES)]
+    if batch_size:
+        requests = [request_bytes("/quotes", {"policies": [quotes[(i + j) % QUOTE_BODIES] for j in range(batch_size)]}) for i in range(8)]
+    else:
+        requests = [request_bytes("/quote", quote) for quote in quotes]
+    latencies, statuses = [], {}
+    per_client = [total // connections + (i < total % connections) for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests[i:] + requests[:i], count, latencies, statuses) for i, count in enumerate(per_client)))
+    elapsed = time.perf_counter() - start
+    latencies = np.asarray(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    return {
+        "requests": total,
+        "quotes": total * (batch_size or 1),
+        "seconds": elapsed,
+        "requests_per_s": total / elapsed,
+        "quotes_per_s": total * (batch_size or 1) / elapsed,
+        "client_latency_ms": {"p50": p50, "p95": p95, "p99": p99, "max": latencies.max()},
+        "statuses": statuses,
+        "service": await get_json(port, "/stats"),
+    }
+
+def spawn_service(args) -> tuple:
+    """
+    Starts the service on a free port; returns (process, port).
+    """
+    command = [
+        sys.executable, "-m", "application_pages.pricing_service", "--port", "0",
+        "--max-batch", str(args.max_batch), "--max-wait-ms", str(args.max_wait_ms), "--queue-depth", str(args.queue_depth),
+    ]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline() # "Pricing service listening on http://host:port"
+    return process, int(line.rsplit(":", 1)[1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the local pricing service.")
+    parser.add_argument("--port", type=int, help="Target a running service instead of starting one")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=0, help="Send /quotes requests of this many policies instead of single quotes")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=1.0)
+    parser.add_argument("--queue-depth", type=int, default=4096)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args(argv)
+
+    process, port = (None, args.port) if args.port else spawn_service(args)
+    try:
+        results = asyncio.run(load(port, args.connections, args.requests, args.batch_size))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        client_ms, service = results["client_latency_ms"], results["service"]
+        print(f"{results['requests']} requests over {args.connections} connections in {results['seconds']:.2f}s")
+        print(f"throughput  {results['requests_per_s']:.0f} requests/s, {results['quotes_per_s']:.0f} quotes/s")
+        print("client      " + "  ".join(f"{key}={value:.2f}ms" for key, value in client_ms.items()))
+        print("service     " + "  ".join(f"{key}={value:.2f}ms" for key, value in service["latency_ms"].items())
+              + f"  mean_batch={service['mean_batch_size']:.1f}  overloaded={service['overloaded']}")
+        print(f"statuses    {results['statuses']}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,8 @@
+import streamlit as st
+
+from application_pages.portfolio_page import render_portfolio_explorer
+
+st.set_page_config(page_title="AI-Q Portfolio Explorer", layout="wide")
+st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
+st.sidebar.divider()
+render_portfolio_explorer()
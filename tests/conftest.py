@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from benchmarks.pricing_benchmarks import profile_rows, scalar_premium
+from application_pages.synthetic_book import synthetic_policies
+from application_pages.batch_calculations import OUTPUT_COLUMNS
+
+BOOK_POLICIES = 300
+
+@pytest.fixture(scope="session")
+def book() -> dict:
+    """
+    A small synthetic book with every per-policy parameter column.
+    """
+    return synthetic_policies(BOOK_POLICIES, seed=7, parameters=True)
+
+@pytest.fixture(scope="session")
+def reference(book) -> dict:
+    """
+    The scalar calculations.py outputs for `book`, one array per output.
+    """
+    rows = [scalar_premium(row) for row in profile_rows(book)]
+    return {name: np.array([row[name] for row in rows]) for name in OUTPUT_COLUMNS}
@@ -0,0 +1,10 @@
+import pytest
+
+from application_pages.priced_book import PricedBook
+from application_pages.trajectory import premium_trajectories
+from application_pages.synthetic_book import synthetic_policies
+
+@pytest.mark.parametrize("price", [PricedBook.from_policies, premium_trajectories])
+def test_misspelt_parameter_raises(price):
+    with pytest.raises(KeyError, match="lamda_factor"):
+        price(synthetic_policies(10), lamda_factor=2.0)
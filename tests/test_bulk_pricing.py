@@ -0,0 +1,47 @@
+import gzip
+
+import pandas as pd
+import pytest
+
+from application_pages.bulk_pricing import main, price_file
+from application_pages.synthetic_book import synthetic_policies
+
+def write_policies(path, n=200, **columns):
+    frame = pd.DataFrame(synthetic_policies(n))
+    frame = frame.assign(**columns)
+    frame.to_csv(path, index=False)
+    return frame
+
+def test_gzip_output_is_compressed(tmp_path):
+    write_policies(tmp_path / "policies.csv")
+    summary = price_file(str(tmp_path / "policies.csv"), str(tmp_path / "priced.csv.gz"), chunk_size=50)
+    with gzip.open(tmp_path / "priced.csv.gz", "rt") as handle:
+        priced = pd.read_csv(handle)
+    assert summary["rows_priced"] == len(priced) == 200
+    assert "p_monthly" in priced.columns
+
+def test_output_created_when_every_row_is_rejected(tmp_path):
+    write_policies(tmp_path / "policies.csv", job_role="Astronaut")
+    summary = price_file(str(tmp_path / "policies.csv"), str(tmp_path / "priced.parquet"), str(tmp_path / "rejects.csv"), chunk_size=50)
+    assert summary["rows_rejected"] == 200
+    priced = pd.read_parquet(tmp_path / "priced.parquet")
+    assert len(priced) == 0 and "p_monthly" in priced.columns
+    assert len(pd.read_csv(tmp_path / "rejects.csv")) == 200
+
+def test_pass_through_columns_keep_a_fixed_schema(tmp_path):
+    # Null-only and integer-only in the first chunk, text in the second
+    write_policies(tmp_path / "policies.csv", note=[None] * 100 + ["vip"] * 100, branch=list(range(100)) + ["B"] * 100)
+    price_file(str(tmp_path / "policies.csv"), str(tmp_path / "priced.parquet"), chunk_size=100)
+    priced = pd.read_parquet(tmp_path / "priced.parquet")
+    assert priced["note"].isna().sum() == 100
+    assert priced["branch"].tolist()[99:101] == ["99", "B"]
+
+@pytest.mark.parametrize("flag", [["--p-min", "-5"], ["--beta-systemic", "2"], ["--ttv-period", "nan"]])
+def test_cli_parameters_are_range_checked(tmp_path, capsys, flag):
+    write_policies(tmp_path / "policies.csv")
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path / "policies.csv"), str(tmp_path / "priced.csv"), *flag])
+    assert exit_info.value.code == 2
+    error = capsys.readouterr().err
+    assert f"{flag[0]} " in error and "out of range" in error
+    assert not (tmp_path / "priced.csv").exists()
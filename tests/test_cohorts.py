@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from application_pages.cohorts import CohortBook
+from application_pages.synthetic_book import synthetic_policies
+
+def test_append_rejects_new_parameter_columns():
+    book = CohortBook.from_policies(synthetic_policies(1000))
+    with pytest.raises(KeyError, match="lambda_factor"):
+        book.append(synthetic_policies(1000, seed=2, parameters=True))
+    assert len(book) == 1000
+
+def test_append_rejects_missing_parameter_columns():
+    book = CohortBook.from_policies(synthetic_policies(1000, parameters=True))
+    with pytest.raises(KeyError, match="Missing"):
+        book.append(synthetic_policies(1000, seed=2))
+    assert len(book) == 1000
+    assert np.isfinite(book.policy_outputs()["p_monthly"]).all()
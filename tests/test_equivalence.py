@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from application_pages.batch_calculations import OUTPUT_COLUMNS, PARAMETER_DEFAULTS, price_policies
+from application_pages.bulk_pricing import price_chunk
+from application_pages.cohorts import CohortBook
+from application_pages.policy_store import PolicyStore
+from application_pages.priced_book import PricedBook
+from application_pages.trajectory import premium_trajectories
+from benchmarks.pricing_benchmarks import profile_rows, scalar_premium
+from application_pages.synthetic_book import synthetic_policies
+
+# Every fast path must match the scalar calculations.py pipeline bit for bit.
+
+def assert_outputs_equal(outputs: dict, reference: dict):
+    for name in OUTPUT_COLUMNS:
+        values = np.broadcast_to(np.asarray(outputs[name], dtype=np.float64), reference[name].shape)
+        np.testing.assert_array_equal(values, reference[name], err_msg=name)
+
+def test_price_policies(book, reference):
+    assert_outputs_equal(price_policies(book), reference)
+
+def test_price_policies_dataframe(book, reference):
+    assert_outputs_equal(price_policies(pd.DataFrame(book)), reference)
+
+def test_price_policies_codes(reference):
+    coded = synthetic_policies(len(reference["p_monthly"]), seed=7, codes=True, parameters=True)
+    assert_outputs_equal(price_policies(coded), reference)
+
+def test_bulk_price_chunk(book, reference):
+    priced, rejected = price_chunk(pd.DataFrame(book))
+    assert len(rejected) == 0
+    assert_outputs_equal({name: priced[name].to_numpy() for name in OUTPUT_COLUMNS}, reference)
+
+def test_priced_book(book, reference):
+    assert_outputs_equal(PricedBook.from_policies(book).outputs, reference)
+
+def test_priced_book_update_matches_full_reprice(book):
+    priced = PricedBook.from_policies(book)
+    priced.set_parameter("lambda_factor", 2.0)
+    without_column = {name: values for name, values in book.items() if name != "lambda_factor"}
+    np.testing.assert_array_equal(priced.outputs["p_monthly"], price_policies(without_column, lambda_factor=2.0)["p_monthly"])
+
+def test_cohort_book(book, reference):
+    assert_outputs_equal(CohortBook.from_policies(book).policy_outputs(), reference)
+
+def test_cohort_book_append_and_reprice(book):
+    half = len(book["job_role"]) // 2
+    cohorts = CohortBook.from_policies({name: values[:half] for name, values in book.items()})
+    cohorts.append({name: values[half:] for name, values in book.items()})
+    cohorts.reprice(w_cr=0.5)
+    assert_outputs_equal(cohorts.policy_outputs(), price_policies(book, w_cr=0.5))
+    assert np.isclose(cohorts.cube.totals()["premium"], cohorts.policy_outputs()["p_monthly"].sum())
+
+def test_premium_trajectories(book, reference):
+    paths = premium_trajectories(book)
+    month = book["months_elapsed_transition"].astype(np.intp)
+    rows = np.arange(len(month))
+    at_month = {name: paths[name][rows, month] if paths[name].ndim == 2 else paths[name] for name in OUTPUT_COLUMNS}
+    assert_outputs_equal(at_month, reference)
+
+def test_policy_store(tmp_path, book):
+    # The store holds no parameter columns, so compare against default parameters
+    inputs = {name: values for name, values in book.items() if name not in PARAMETER_DEFAULTS}
+    store = PolicyStore.create(str(tmp_path / "book"))
+    rows = store.append(inputs)
+    store.price(rows.start, rows.stop)
+    expected = np.array([scalar_premium(row)["p_monthly"] for row in profile_rows(inputs)])
+    np.testing.assert_array_equal(PolicyStore(str(tmp_path / "book")).premiums, expected)
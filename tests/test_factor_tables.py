@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from application_pages.batch_calculations import price_policies
+from application_pages.factor_tables import COLUMN_TABLES, default_factor_tables, encode_column
+from application_pages.synthetic_book import synthetic_policies
+
+def test_codes_in_range_pass_through():
+    tables = default_factor_tables()
+    unknown = len(tables.categories[COLUMN_TABLES["job_role"]])
+    codes = np.array([0, unknown], dtype=np.int16)
+    np.testing.assert_array_equal(encode_column(tables, "job_role", codes), codes)
+
+@pytest.mark.parametrize("code", [-1, -3, 99])
+def test_out_of_range_codes_raise(code):
+    policies = synthetic_policies(10, codes=True)
+    policies["job_role"] = np.full(10, code, dtype=np.int16)
+    with pytest.raises(ValueError, match="job_role codes"):
+        price_policies(policies)
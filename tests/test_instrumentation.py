@@ -0,0 +1,61 @@
+import re
+import threading
+
+import pytest
+
+from application_pages import instrumentation
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_disabled_stage_records_nothing():
+    instrumentation.reset()
+    with instrumentation.stage("test.off", rows=10):
+        pass
+    assert instrumentation.snapshot() == {}
+
+def test_counters_and_percentiles(enabled):
+    metrics = instrumentation.StageMetrics()
+    for millisecond in range(1, 101):
+        metrics.record(millisecond / 1000.0, rows=3)
+    assert (metrics.count, metrics.rows, metrics.max_seconds) == (100, 300, 0.1)
+    assert metrics.seconds == pytest.approx(5.05)
+    quantiles = metrics.quantiles()
+    assert quantiles[0.5] == pytest.approx(0.0505)
+    assert quantiles[0.99] == pytest.approx(0.09901)
+
+    for _ in range(5):
+        with instrumentation.stage("test.stage", rows=7):
+            pass
+    recorded = instrumentation.snapshot()["test.stage"]
+    assert recorded["count"] == 5 and recorded["rows"] == 35
+    assert 0.0 <= recorded["p50_ms"] <= recorded["p99_ms"] <= recorded["max_ms"]
+
+def test_prometheus_text_format(enabled):
+    with instrumentation.stage('test."quoted"', rows=4):
+        pass
+    text = instrumentation.prometheus_text()
+    assert text.endswith("\n")
+    sample = re.compile(r'^aiq_stage_[a-z_]+\{stage="(?:[^"\\]|\\.)*"(?:,quantile="[0-9.]+")?\} \S+$')
+    for line in text.splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or sample.match(line), line
+    assert 'aiq_stage_latency_seconds_count{stage="test.\\"quoted\\""} 1' in text
+    assert 'aiq_stage_rows_total{stage="test.\\"quoted\\""} 4' in text
+    assert "# TYPE aiq_stage_latency_seconds summary" in text
+
+def test_finished_threads_leave_no_stage_stacks(enabled):
+    def work():
+        with instrumentation.stage("test.outer"):
+            with instrumentation.stage("test.inner"):
+                pass
+    threads = [threading.Thread(target=work) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert instrumentation._active_stages == {}
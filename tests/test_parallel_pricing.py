@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.batch_calculations import OUTPUT_COLUMNS, price_policies
+from application_pages.bulk_pricing import price_file
+from application_pages.parallel_pricing import ParallelPricer, row_ranges
+from application_pages.synthetic_book import synthetic_policies
+
+def test_row_ranges_give_every_worker_a_task():
+    for n, workers in [(250_000, 16), (250_000, 1), (5, 8)]:
+        ranges = row_ranges(n, workers)
+        assert len(ranges) >= min(workers, n)
+        assert [start for start, _ in ranges] == [0] + [stop for _, stop in ranges[:-1]]
+        assert ranges[-1][1] == n
+    assert row_ranges(0, 4) == []
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_parallel_matches_batch_for_any_worker_count(workers):
+    book = synthetic_policies(10_000, seed=3, parameters=True)
+    expected = price_policies(book)
+    with ParallelPricer(workers) as pricer:
+        jobs = [pricer.submit(book), pricer.submit(book)] # two in flight at once
+        for job in jobs:
+            priced = job.result()
+            for name in OUTPUT_COLUMNS:
+                np.testing.assert_array_equal(priced[name], np.broadcast_to(expected[name], priced[name].shape))
+
+def test_price_file_output_independent_of_workers(tmp_path):
+    frame = pd.DataFrame(synthetic_policies(1000, seed=5))
+    frame.loc[::7, "job_role"] = "Astronaut"
+    frame.to_csv(tmp_path / "policies.csv", index=False)
+    outputs = []
+    for workers in (1, 2, 4):
+        output = tmp_path / f"priced-{workers}.parquet"
+        summary = price_file(str(tmp_path / "policies.csv"), str(output), chunk_size=128, workers=workers)
+        assert summary["rows_read"] == 1000 and summary["rows_rejected"] == 143
+        outputs.append(pd.read_parquet(output))
+    for priced in outputs[1:]:
+        pd.testing.assert_frame_equal(priced, outputs[0], check_exact=True)
@@ -0,0 +1,26 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.policy_store import PolicyStore, import_file, main
+from application_pages.synthetic_book import synthetic_policies
+
+@pytest.mark.parametrize("code", [-2, 65536 + 1])
+def test_store_rejects_out_of_range_codes(tmp_path, code):
+    store = PolicyStore.create(str(tmp_path / "store"))
+    store.append(synthetic_policies(10, codes=True))
+    policies = synthetic_policies(10, seed=2, codes=True)
+    policies["company_type"] = np.full(10, code, dtype=np.int64)
+    with pytest.raises(ValueError, match="company_type codes"):
+        store.append(policies)
+    assert len(PolicyStore(store.path)) == 10
+
+def test_import_refuses_per_policy_parameter_columns(tmp_path, capsys):
+    pd.DataFrame(synthetic_policies(20, parameters=True)).to_csv(tmp_path / "policies.csv", index=False)
+    with pytest.raises(ValueError, match="beta_systemic.*p_min"):
+        import_file(str(tmp_path / "policies.csv"), str(tmp_path / "store"))
+    assert not os.path.exists(tmp_path / "store")
+    assert main(["import", str(tmp_path / "policies.csv"), str(tmp_path / "store")]) == 2
+    assert "ttv_period" in capsys.readouterr().err
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from application_pages.batch_calculations import price_policies
+from application_pages.portfolio import PortfolioAggregates, TRAJECTORY_MONTHS, bin_index
+from application_pages.policy_store import PolicyStore
+from application_pages.synthetic_book import synthetic_policies
+from application_pages.trajectory import premium_trajectories
+
+FILTERS = [{}, {"current_industry": "Retail (E-commerce Shift)"}, {"company_type": ["Startup (High Risk)", "Big Firm (Lower Risk)"], "job_role": "Paralegal"}]
+
+@pytest.fixture(scope="module")
+def book(tmp_path_factory):
+    store = PolicyStore.create(str(tmp_path_factory.mktemp("portfolio") / "store"))
+    store.append(synthetic_policies(3000, seed=8, codes=True))
+    aggregates = PortfolioAggregates.from_store(store, chunk_size=700)
+    policies = {name: np.asarray(values) for name, values in store.policies().items()}
+    return aggregates, policies, price_policies(policies), premium_trajectories(policies, months=TRAJECTORY_MONTHS)["p_monthly"]
+
+def selected(aggregates, policies, filters):
+    mask = np.ones(len(aggregates), dtype=bool)
+    for name, chosen in filters.items():
+        chosen = [chosen] if isinstance(chosen, str) else chosen
+        labels = np.array(aggregates.cube.labels[name], dtype=object)[policies[name]]
+        mask &= np.isin(labels, chosen)
+    return mask
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_aggregates_match_direct_sums(book, filters):
+    aggregates, policies, priced, paths = book
+    mask = selected(aggregates, policies, filters)
+    assert mask.any()
+
+    totals = aggregates.cube.totals(**filters)
+    assert totals["policies"] == mask.sum()
+    for measure, output in (("premium", "p_monthly"), ("expected_loss", "e_loss"), ("exposure", "l_payout")):
+        assert totals[measure] == pytest.approx(priced[output][mask].sum(), rel=1e-12)
+
+    # Binned views hold the same float32 outputs the aggregates chart
+    premium_bins = bin_index(priced["p_monthly"][mask].astype(np.float32), aggregates.edges["p_monthly"])
+    for axis in ("v_i", "h_i"):
+        raster = aggregates.raster(axis, **filters)["counts"]
+        x_bins = bin_index(np.broadcast_to(priced[axis], mask.shape)[mask].astype(np.float32), aggregates.edges[axis])
+        expected = np.zeros_like(raster)
+        np.add.at(expected, (x_bins, premium_bins), 1)
+        np.testing.assert_array_equal(raster, expected)
+
+    distribution = aggregates.premium_distribution("current_industry", **filters)
+    industries = np.array(aggregates.cube.labels["current_industry"], dtype=object)[policies["current_industry"][mask]]
+    for label, counts in zip(distribution["labels"], distribution["counts"]):
+        np.testing.assert_array_equal(counts, np.bincount(premium_bins[industries == label], minlength=counts.size))
+    assert distribution["counts"].sum() == mask.sum()
+
+    bands = aggregates.trajectory_bands(**filters)
+    np.testing.assert_allclose(bands["mean"], paths[mask].mean(axis=0), rtol=1e-12)
+
+@pytest.mark.parametrize("filters", FILTERS[1:])
+def test_drill_down_lists_the_selected_rows(book, filters):
+    aggregates, policies, priced, _ = book
+    rows = aggregates.drill_down(**filters)
+    np.testing.assert_array_equal(rows["row"], np.flatnonzero(selected(aggregates, policies, filters)))
+    np.testing.assert_array_equal(rows["p_monthly"], priced["p_monthly"][rows["row"]].astype(np.float32))
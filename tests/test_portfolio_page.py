@@ -0,0 +1,25 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from application_pages.policy_store import PolicyStore
+from application_pages.portfolio_page import STORE_ROOT_ENV, store_names
+from application_pages.synthetic_book import synthetic_policies
+
+PAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "portfolio_explorer.py")
+
+def test_stores_are_listed_from_the_root_only(tmp_path, monkeypatch):
+    PolicyStore.create(str(tmp_path / "book")).append(synthetic_policies(500, codes=True))
+    (tmp_path / "not-a-store").mkdir()
+    assert store_names(str(tmp_path)) == ["book"]
+    assert store_names(str(tmp_path / "missing")) == []
+
+    monkeypatch.setenv(STORE_ROOT_ENV, str(tmp_path))
+    at = AppTest.from_file(PAGE_PATH, default_timeout=60)
+    at.session_state["portfolio_source"] = "Policy store"
+    at.run()
+    assert not at.exception
+    assert not at.sidebar.text_input
+    [store] = [widget for widget in at.sidebar.selectbox if widget.label == "Policy store"]
+    assert store.options == ["book"]
+    assert at.metric[0].value == "500"
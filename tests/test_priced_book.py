@@ -0,0 +1,37 @@
+import numpy as np
+
+from application_pages.batch_calculations import OUTPUT_COLUMNS, price_policies
+from application_pages.factor_tables import compile_factor_tables
+from application_pages.priced_book import PricedBook
+from application_pages.synthetic_book import synthetic_policies
+
+# Weights that leave V_i off its clamps for most policies, so company factors matter
+WEIGHTS = {"w_cr": 60.0, "w_us": 60.0}
+UPDATES = [
+    ("industry_hazard", "Retail (E-commerce Shift)", 42.0, ("current_industry", "target_industry")),
+    ("company", "Big Firm (Lower Risk)", 0.6, ("company_type",)),
+]
+
+def test_update_factor_matches_a_full_reprice():
+    book = synthetic_policies(3000, seed=4, parameters=True)
+    priced = PricedBook.from_policies(book, **WEIGHTS)
+    overrides = {}
+    for table, label, value, columns in UPDATES:
+        before = {name: values.copy() for name, values in priced.outputs.items()}
+        diff = priced.update_factor(table, label, value)
+
+        overrides.setdefault(table, {})[label] = value
+        expected = price_policies(book, tables=compile_factor_tables(overrides), **WEIGHTS)
+        for name in OUTPUT_COLUMNS:
+            np.testing.assert_array_equal(priced.outputs[name], np.broadcast_to(expected[name], (3000,)))
+        changed = np.flatnonzero(before["p_monthly"] != expected["p_monthly"])
+        np.testing.assert_array_equal(diff["rows"], changed)
+        np.testing.assert_array_equal(diff["old_premium"], before["p_monthly"][changed])
+        np.testing.assert_array_equal(diff["new_premium"], expected["p_monthly"][changed])
+
+        using = np.zeros(3000, dtype=bool)
+        for column in columns:
+            using |= np.asarray(book[column]) == label
+        assert len(changed) and set(changed) <= set(np.flatnonzero(using))
+        for name in OUTPUT_COLUMNS:
+            np.testing.assert_array_equal(priced.outputs[name][~using], before[name][~using])
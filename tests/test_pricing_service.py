@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+import pytest
+
+from application_pages.pricing_service import PricingService
+from application_pages.synthetic_book import synthetic_policies
+
+async def exchange(request: bytes) -> bytes:
+    service = await PricingService(port=0).start()
+    try:
+        reader, writer = await asyncio.open_connection(service.host, service.port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+    finally:
+        await service.close()
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"\xb2"])
+def test_bad_content_length_gets_a_response(length):
+    response = asyncio.run(exchange(b"POST /quote HTTP/1.1\r\nConnection: close\r\nContent-Length: " + length + b"\r\n\r\n{}"))
+    assert response.startswith(b"HTTP/1.1 400")
+
+def test_chunked_body_is_refused():
+    request = b"POST /quote HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n2\r\n{}\r\n0\r\n\r\n"
+    assert asyncio.run(exchange(request)).startswith(b"HTTP/1.1 411")
+
+def post(path: str, payload) -> bytes:
+    body = json.dumps(payload).encode()
+    return f"POST {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+def test_oversized_integer_is_rejected():
+    book = synthetic_policies(2)
+    quotes = [{name: values[i].item() if hasattr(values[i], "item") else values[i] for name, values in book.items()} for i in range(2)]
+    quotes[0]["years_experience"] = 10 ** 400
+    response = asyncio.run(exchange(post("/quote", quotes[0])))
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"years_experience" in response
+    response = asyncio.run(exchange(post("/quotes", {"policies": quotes})))
+    assert response.startswith(b"HTTP/1.1 200")
+    priced = json.loads(response.split(b"\r\n\r\n", 1)[1])["quotes"]
+    assert "years_experience" in priced[0]["error"]
+    assert "p_monthly" in priced[1]
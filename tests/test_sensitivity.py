@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from application_pages.batch_calculations import price_policies
+from application_pages.sensitivity import (
+    ATTRIBUTION_COLUMNS, SENSITIVITY_INPUTS, premium_attribution, premium_sensitivities
+)
+from application_pages.synthetic_book import synthetic_policies
+
+# Partials of the inputs that are policy columns (not looked-up factors)
+COLUMN_INPUTS = tuple(name for name in SENSITIVITY_INPUTS if not name.startswith(("f_", "h_")))
+# Inputs whose only route to the premium is through V_i(t)
+V_I_INPUTS = (
+    "years_experience", "general_upskilling_progress", "firm_specific_upskilling_progress",
+    "f_role", "f_level", "f_field", "f_school", "f_cr",
+)
+
+@pytest.fixture(scope="module")
+def policies():
+    book = synthetic_policies(2000, seed=11, parameters=True)
+    return {name: np.asarray(values, dtype=np.float64) if name in COLUMN_INPUTS else values for name, values in book.items()}
+
+@pytest.mark.parametrize("name", COLUMN_INPUTS)
+def test_partials_match_central_differences(policies, name):
+    partials = premium_sensitivities(policies)["partials"][name]
+    x = policies[name]
+    step = 1e-6 * np.maximum(np.abs(x), 1.0)
+    premium = price_policies(policies)["p_monthly"]
+    up = price_policies(dict(policies, **{name: x + step}))["p_monthly"]
+    down = price_policies(dict(policies, **{name: x - step}))["p_monthly"]
+    forward, backward = (up - premium) / step, (premium - down) / step
+    scale = np.maximum(np.abs(forward), np.abs(backward)) + 1e-9
+    smooth = np.abs(forward - backward) <= 1e-4 * scale # no kink within one step
+    assert smooth.mean() > 0.5
+    np.testing.assert_allclose(partials[smooth], ((up - down) / (2 * step))[smooth], rtol=1e-4, atol=1e-7)
+
+def test_partials_vanish_while_v_i_is_pinned():
+    policies = synthetic_policies(500, seed=12)
+    for weights in ({"w_cr": 0.0, "w_us": 0.0}, {"w_cr": 60.0, "w_us": 60.0}): # V_i pinned at 5 or 100
+        result = premium_sensitivities(policies, **weights)
+        pinned = result["pinned_v_i"] & ~result["pinned_p_min"]
+        assert pinned.any()
+        for name in V_I_INPUTS:
+            assert (result["partials"][name][pinned] == 0.0).all(), name
+        assert (result["partials"]["annual_salary"][pinned] > 0.0).all()
+
+def test_only_p_min_moves_a_floored_premium():
+    policies = synthetic_policies(500, seed=13)
+    result = premium_sensitivities(policies, p_min=1e6)
+    assert result["pinned_p_min"].all()
+    for name in SENSITIVITY_INPUTS:
+        assert (result["partials"][name] == (1.0 if name == "p_min" else 0.0)).all(), name
+
+@pytest.mark.parametrize("p_min", [0.0, 50.0])
+def test_attribution_reconciles_to_the_premium_change(policies, p_min):
+    book = {name: values for name, values in policies.items() if name != "p_min"}
+    attribution = premium_attribution(book, p_min=p_min)
+    total = sum(attribution[name] for name in ATTRIBUTION_COLUMNS)
+    change = attribution["premium"] - attribution["reference_premium"]
+    np.testing.assert_allclose(total, change, rtol=1e-9, atol=1e-9 * np.abs(attribution["premium"]).max())
+    if p_min:
+        assert (attribution["minimum_premium"] != 0.0).any()
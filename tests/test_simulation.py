@@ -0,0 +1,19 @@
+import numpy as np
+
+from application_pages.simulation import simulate_portfolio_losses
+from application_pages.synthetic_book import synthetic_policies
+
+# Weights that push V_i (and so the claim probability) close to 1
+HIGH_CLAIM = {"beta_systemic": 1.0, "beta_individual": 1.0, "w_cr": 60.0, "w_us": 60.0}
+
+def test_high_claim_probability_book_matches_expected_loss():
+    book = synthetic_policies(200, seed=1)
+    result = simulate_portfolio_losses(book, 8192, seed=3, **HIGH_CLAIM)
+    assert np.isclose(result["mean"], result["expected_loss_analytic"], rtol=0.01)
+
+def test_results_do_not_depend_on_chunk_size():
+    book = synthetic_policies(200, seed=1)
+    first = simulate_portfolio_losses(book, 16384, seed=5, chunk_trials=8192, **HIGH_CLAIM)
+    second = simulate_portfolio_losses(book, 16384, seed=5, chunk_trials=16384, **HIGH_CLAIM)
+    assert first["mean"] == second["mean"]
+    np.testing.assert_array_equal(first["histogram_counts"], second["histogram_counts"])
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from application_pages.batch_calculations import price_policies
+from application_pages.data_lookups import POLICY_INPUT_RANGES
+from application_pages.solver import SOLVERS
+from application_pages.synthetic_book import synthetic_policies
+
+# Weights that leave V_i off its clamps for part of the book, so upskilling matters
+WEIGHTS = {"w_cr": 45.0, "w_us": 45.0}
+# Direction in which each input lowers the premium
+IMPROVES = {"general_upskilling_progress": np.inf, "coverage_percentage": -np.inf, "months_elapsed_transition": np.inf}
+
+@pytest.fixture(scope="module")
+def policies():
+    return synthetic_policies(4000, seed=21, parameters=True)
+
+def premium_with(policies, name, values):
+    return price_policies(dict(policies, **{name: values}), **WEIGHTS)
+
+def best_end(name):
+    low, high = POLICY_INPUT_RANGES[name]
+    return low if IMPROVES[name] < 0 else high
+
+def targets(policies, name) -> np.ndarray:
+    """
+    Per policy, in turn: a random target from well below to just above today's
+    premium (some under P_min), exactly P_min, and exactly the premium at the
+    best end of the range (where V_i often sits on its clamp).
+    """
+    premium = price_policies(policies, **WEIGHTS)["p_monthly"]
+    target = premium * np.random.default_rng(21).uniform(0.05, 1.05, premium.shape)
+    target[1::3] = policies["p_min"][1::3]
+    target[2::3] = premium_with(policies, name, np.full(premium.shape, float(best_end(name))))["p_monthly"][2::3]
+    return target
+
+@pytest.mark.parametrize("name", SOLVERS)
+def test_each_value_is_the_boundary(policies, name):
+    target = targets(policies, name)
+    solved = SOLVERS[name](policies, target, **WEIGHTS)
+    feasible = solved["feasible"]
+    low, high = POLICY_INPUT_RANGES[name]
+    value = np.where(feasible, solved["value"], best_end(name))
+
+    priced = premium_with(policies, name, value)
+    assert (priced["p_monthly"][feasible] <= target[feasible]).all()
+    np.testing.assert_array_equal(priced["p_monthly"][feasible], solved["premium"][feasible])
+    # Infeasible policies miss the target even at the best end of the range
+    assert (priced["p_monthly"][~feasible] > target[~feasible]).all()
+
+    # One step toward the wrong side prices above the target
+    if name == "months_elapsed_transition":
+        worse = value - 1.0
+    else:
+        worse = np.nextafter(value, -IMPROVES[name])
+    inside = feasible & (worse >= low) & (worse <= high)
+    assert inside.any()
+    assert (premium_with(policies, name, worse)["p_monthly"][inside] > target[inside]).all()
+
+    # Some boundaries are where the premium reaches the P_min floor, and for
+    # upskilling where V_i reaches its clamp at 5
+    assert (inside & (priced["p_monthly"] == policies["p_min"])).any()
+    if name == "general_upskilling_progress":
+        assert (inside & (np.broadcast_to(priced["v_i"], value.shape) == 5.0)).any()
+
+@pytest.mark.parametrize("name", SOLVERS)
+def test_infeasible_reasons(policies, name):
+    target = targets(policies, name)
+    solved = SOLVERS[name](policies, target, **WEIGHTS)
+    below_floor = target < policies["p_min"]
+    assert below_floor.any() and (~solved["feasible"] & ~below_floor).any()
+    assert (solved["reason"][below_floor] == "target is below the minimum premium").all()
+    unreachable = ~solved["feasible"] & ~below_floor
+    assert all(reason.startswith("target not reached") for reason in solved["reason"][unreachable])
+    assert (solved["reason"][solved["feasible"]] == "").all()
+    assert np.isnan(solved["value"][~solved["feasible"]]).all() and np.isnan(solved["premium"][~solved["feasible"]]).all()
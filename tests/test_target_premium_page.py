@@ -0,0 +1,30 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def set_sidebar(at: AppTest, widgets: str, label: str, value):
+    [widget] = [widget for widget in getattr(at.sidebar, widgets) if widget.label.startswith(label)]
+    widget.set_value(value)
+
+def test_high_premium_profile_renders_target_section():
+    # P_monthly = $1,687.50, above any fixed cap on the target input
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    set_sidebar(at, "number_input", "Annual Salary", 300000.0)
+    set_sidebar(at, "slider", "Coverage Percentage", 75)
+    set_sidebar(at, "slider", "Coverage Duration", 12)
+    set_sidebar(at, "number_input", "Loading Factor", 3.0)
+    set_sidebar(at, "number_input", "Systemic Event", 1.0)
+    set_sidebar(at, "number_input", "Individual Loss", 1.0)
+    at.run()
+
+    assert not at.exception
+    assert any(metric.value == "$1687.50" for metric in at.metric)
+
+    # A target just below the premium is accepted and solved
+    [target] = [widget for widget in at.number_input if widget.label.startswith("Target Monthly Premium")]
+    target.set_value(1682.0)
+    at.run()
+    assert not at.exception
@@ -0,0 +1,35 @@
+import numpy as np
+
+from application_pages import what_if
+from application_pages.batch_calculations import CATEGORICAL_COLUMNS
+from application_pages.factor_tables import COLUMN_TABLES, default_factor_tables, encode_column
+from application_pages.what_if import SWEEP_CACHE_BYTES, sweep_axis, sweep_nbytes, sweep_premium
+
+PROFILE = {
+    "job_role": "Mid-level Professional", "years_experience": 10,
+    "education_level": "Master's Degree", "education_field": "Engineering/Computer Science/Quant",
+    "school_tier": "Tier 1 (Ivy/Top Global)", "company_type": "Big Firm (Lower Risk)",
+    "general_upskilling_progress": 50, "firm_specific_upskilling_progress": 20,
+    "annual_salary": 90000.0, "coverage_percentage": 25, "coverage_duration_months": 6,
+    "current_industry": "Retail (E-commerce Shift)", "target_industry": "Retail (E-commerce Shift)",
+    "months_elapsed_transition": 0,
+}
+
+def test_profile_uses_real_table_labels():
+    tables = default_factor_tables()
+    for name in CATEGORICAL_COLUMNS:
+        assert encode_column(tables, name, PROFILE[name])[0] < tables.unknown_code(COLUMN_TABLES[name]), name
+
+def test_sweep_cache_is_bounded_by_bytes():
+    what_if.clear_sweep_cache()
+    for offset in range(6):
+        axes = {name: sweep_axis(name, 100) + offset for name in ("annual_salary", "beta_systemic", "lambda_factor")}
+        surface = sweep_premium(PROFILE, axes)
+        assert surface["p_monthly"].shape == (100, 100, 100)
+    assert sum(sweep_nbytes(results) for results in what_if._sweep_cache.values()) <= SWEEP_CACHE_BYTES
+
+def test_cached_sweep_is_reused():
+    what_if.clear_sweep_cache()
+    axes = {"general_upskilling_progress": sweep_axis("general_upskilling_progress", 11)}
+    assert sweep_premium(PROFILE, axes) is sweep_premium(PROFILE, axes)
+    assert np.all(np.diff(sweep_premium(PROFILE, axes)["f_us"]) < 0)